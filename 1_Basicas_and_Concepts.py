@@ -107,3 +107,27 @@ matches = matcher(doc)
 print("Total matches found:", len(matches))
 for match_id, start, end in matches: print("Match found:", doc[start:end].text)
 ################################################################################
+
+# Saving Rules as a Bundle
+################################################################################
+# Re-adding every pattern on each start is slow with thousands of rules.
+    # A RuleBundle validates the rules once, stores them pre-hashed on disk, and
+    # load_matcher() turns the file back into a Matcher in one step.
+    # Benchmark: python -m benchmarks.bench_rule_bundle
+from pspacy import RuleBundle, load_matcher, pipe_matches
+RULES = {
+    "IPHONE_X_PATTERN": [[{"TEXT": "iPhone"}, {"TEXT": "X"}]],
+    "IOS_VERSION_PATTERN": [[{"TEXT": "iOS"}, {"IS_DIGIT": True}]],
+    "DOWNLOAD_THINGS_PATTERN": [[{"LEMMA": "download"}, {"POS": "PROPN"}]],
+    "ADJ_NOUN_PATTERN": [[{"POS": "ADJ"}, {"POS": "NOUN"}, {"POS": "NOUN", "OP": "?"}]],
+}
+RuleBundle(RULES).to_disk("rules.msgpack", nlp.vocab)
+matcher = load_matcher("rules.msgpack", nlp.vocab)
+TEXTS = [
+    "Upcoming iPhone X release date leaked as Apple reveals pre-orders",
+    "Most of iOS 11's furniture remains the same as in iOS 10.",
+    "i downloaded Fortnite on my laptop and can't open the game at all.",
+]
+for doc, matches in pipe_matches(nlp, TEXTS, matcher):
+    print({label: [span.text for span in spans] for label, spans in matches.items()})
+################################################################################
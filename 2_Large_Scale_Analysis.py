@@ -1,6 +1,6 @@
 import spacy
-import en_core_web_sm
-nlp = en_core_web_sm.load()
+from pspacy import get_nlp
+nlp = get_nlp("en_core_web_sm")
 
 # Tokens have attrs like pos_, dep_ etc. that depend on the context
     # Lexemes seem to be independent
@@ -30,6 +30,26 @@ person_string = nlp.vocab.strings[person_hash]
 print(person_string)
 ################################################################################
 
+# 2.2 Keeping the StringStore Bounded
+    # Every new string is interned into nlp.vocab.strings for good, so a worker fed
+    #   user-generated text keeps growing. BoundedPipeline checks the store every
+    #   check_every docs and reloads the pipeline from its snapshot once it is over
+    #   budget, which leaves only the base model's strings.
+    # A StringTable is a memory-mapped, read-only copy of the base strings that
+    #   processes can share to turn hashes back into text. It doesn't replace
+    #   nlp.vocab.strings: a process running the pipeline still has its own.
+    #   Write it before any text is processed, or runtime strings end up in it.
+################################################################################
+from pspacy import BoundedPipeline, StringTable, write_string_table
+bounded = BoundedPipeline("en_core_web_sm", max_bytes=50 * 2**20, check_every=1000)
+write_string_table(bounded.nlp.vocab.strings, "base_strings.bin")
+doc = bounded("I have a cat called Zorbulon")
+print(bounded.stats())
+table = StringTable("base_strings.bin")
+print(len(table), "strings,", table.nbytes, "bytes:", table.lookup([cat_hash]))
+print("Zorbulon" in bounded.nlp.vocab.strings, bounded.nlp.vocab.strings["Zorbulon"] in table) # True False
+################################################################################
+
 # 3.1 Data Structures: Doc, Span and Token Subtleties
 ################################################################################
 from spacy.tokens import Doc
@@ -82,16 +102,33 @@ token_texts = [token.text for token in doc]
 pos_tags = [token.pos_ for token in doc]
 
 for token in doc:
-    if token.pos_ == 'PROPN' and doc[token.i+1].pos_ == "VERB":
+    # check the bound first: doc[token.i+1] raises IndexError on the last token
+    if token.pos_ == 'PROPN' and token.i + 1 < len(doc) and doc[token.i+1].pos_ == "VERB":
         print("Found proper noun before a verb:", token.text)
 
 ################################################################################
 
+################################################################################
+# 3.1.5 Token Attributes as Columns
+    # At corpus scale, creating Token objects is the main cost. to_columns() uses
+    #   Doc.to_array to turn many Docs into NumPy columns (ORTH, POS, DEP, HEAD,
+    #   ENT_TYPE + Doc offsets), and find_sequence() runs the "PROPN followed by
+    #   VERB" query over the arrays, never crossing from one Doc into the next.
+################################################################################
+from pspacy import find_sequence, to_columns
+from pspacy.columns import decode
+docs = list(nlp.pipe(["Berlin looks like a nice city", "I visited Berlin", "Paris is lovely"]))
+columns = to_columns(docs)
+token_texts = decode(columns["ORTH"], nlp.vocab)
+pos_tags = decode(columns["POS"], nlp.vocab)
+for doc_i, token_i in zip(*find_sequence(columns, "POS", ["PROPN", "VERB"], nlp.vocab)):
+    print("Found proper noun before a verb:", docs[doc_i][token_i].text)
+################################################################################
+
 ################################################################################
 # 4.1 Similarity - Doc., Span., Token.
 ################################################################################
-import en_core_web_md
-nlp = en_core_web_md.load()
+nlp = get_nlp("en_core_web_md")
 doc = nlp("Two bananas in pyjamas")
 bananas_vector = doc[1].vector
 print(bananas_vector)
@@ -115,6 +152,34 @@ similarity = span1.similarity(span2)
 print(similarity)
 ################################################################################
 
+# 4.1.3 Similarity in Bulk
+    # One .similarity() call per pair doesn't scale to all-pairs or nearest neighbours.
+    # VectorIndex stacks the normalized vectors once; pairs and top-k become matrix
+    #   multiplies, and save()/load() share the matrix between processes via mmap.
+    # Benchmark: python -m benchmarks.bench_similarity
+################################################################################
+from pspacy import VectorIndex
+spans = [doc[3:5], doc[12:15], doc[4:5], doc[14:15]] # "great restaurant", "really nice bar", ...
+index = VectorIndex.from_objects(spans)
+print(index.similarity([0], [1])) # same value as span1.similarity(span2)
+neighbours, scores = index.all_pairs_topk(k=2)
+for i, span in enumerate(spans):
+    print(span.text, "->", [(spans[j].text, round(float(score), 3)) for j, score in zip(neighbours[i], scores[i])])
+################################################################################
+
+# 4.1.4 Sharing Vectors Between Processes
+    # Every process that runs spacy.load("en_core_web_md") reads its own copy of
+    #   the vector table. Export it once, then load_shared() memory-maps it, so all
+    #   workers share one copy through the OS page cache (float16 halves it again).
+    # Benchmark: python -m benchmarks.bench_shared_vectors
+################################################################################
+from pspacy import export_vectors, load_shared
+export_vectors(nlp, "md_vectors", dtype="float16")
+shared_nlp = load_shared("en_core_web_md", "md_vectors")
+doc_shared = shared_nlp("This was a great restaurant. Afterwards, we went to a really nice bar.")
+print(span1.similarity(span2), doc_shared[3:5].similarity(doc_shared[12:15]))
+################################################################################
+
 ################################################################################
 # 5.1 Debugging Patterns
 from spacy.matcher import Matcher
@@ -139,6 +204,22 @@ for match_id, start, end in matcher(doc):
     print(doc.vocab.strings[match_id], doc[start:end].text)
 ################################################################################
 
+# 5.1.1 Profiling Patterns
+    # With thousands of rules, printing matches doesn't show which keys cost the
+    #   time, which never match and which keep many partial matches alive.
+    # profile_matcher() wraps a Matcher (or a PhraseMatcher plus its rules=): calls
+    #   go to the real matcher, matches are counted per key, and sample_rate of
+    #   the Docs are profiled per key (partial states, evaluations, ms per 1k
+    #   tokens), so it can stay on for live traffic.
+    # Benchmark: python -m benchmarks.bench_pattern_profile
+################################################################################
+from pspacy import profile_matcher
+matcher.add("WILDCARD", [[{"LOWER": "amazon"}, {"OP": "*"}, {"LOWER": "viewing"}]])
+profiled = profile_matcher(matcher, sample_rate=1.0)
+profiled(doc)
+profiled.profiler.print_report()
+################################################################################
+
 ################################################################################
 # 6.1 Efficient Phrase Matching
     # Sometimes it’s more efficient to match exact strings instead of writing patterns 
@@ -149,7 +230,7 @@ with open("countries.json", encoding="utf8") as f: COUNTRIES = json.loads(f.read
 doc = nlp("Czech Republic may help Slovakia protect its airspace")
 from spacy.matcher import PhraseMatcher
 matcher = PhraseMatcher(nlp.vocab)
-patterns = list(nlp.pipe(COUNTRIES))
+patterns = list(nlp.tokenizer.pipe(COUNTRIES)) # patterns only need tokens, not the full pipeline
 matcher.add("COUNTRY", [*patterns])
 matches = matcher(doc)
 print([doc[start:end] for match_id, start, end in matches])
@@ -160,19 +241,38 @@ print([doc[start:end] for match_id, start, end in matches])
     # Overwrite the entities in doc.ents and add the matched span.
     # Get the matched span’s root head token.
     # Print the text of the head token and the span.
+    # Setting doc.ents = list(doc.ents) + [span] per match is quadratic and raises on
+    #   overlapping matches, so all matches are collected and assigned once
+    #   (pspacy.ents, overlaps resolved longest-first). overlay_matches() returns the
+    #   matches that became entities, so the loop skips those lost to an overlap.
+    #   Benchmark: python -m benchmarks.bench_entity_overlay
 ################################################################################
 import json
+from pspacy import overlay_matches
 with open("countries.json", encoding="utf8") as f: COUNTRIES = json.loads(f.read())
 with open("country_text.txt", encoding="utf8") as f: TEXT = f.read()
 matcher = PhraseMatcher(nlp.vocab)
-patterns = list(nlp.pipe(COUNTRIES))
+patterns = list(nlp.tokenizer.pipe(COUNTRIES)) # patterns only need tokens, not the full pipeline
 matcher.add("COUNTRY", [*patterns])
 doc = nlp(TEXT)
-doc.ents = []
-for match_id, start, end in matcher(doc):
-    span = Span(doc, start, end, label="GPE")
-    doc.ents = list(doc.ents) + [span]
+spans = overlay_matches(doc, matcher, label="GPE", policy="longest", keep_existing=False)
+for span in spans:
     span_root_head = span.root.head
     print(span_root_head.text, "-->", span.text)
 print([(ent.text, ent.label_) for ent in doc.ents if ent.label_ == "GPE"])    
 ################################################################################
+
+# 6.1.2 Long Documents in Chunks
+    # nlp(TEXT) handles the whole text as one Doc, on one core. process_long()
+    #   splits it at paragraph/sentence ends, runs the chunks through nlp.pipe
+    #   (n_process=N) and joins them with Doc.from_docs. Text, tokens, character
+    #   offsets and PhraseMatcher matches are the same as for nlp(TEXT).
+    # With n_process > 1 on Windows/macOS, call it under if __name__ == "__main__":
+    # Benchmark: python -m benchmarks.bench_long_docs
+################################################################################
+from pspacy import process_long
+doc = process_long(nlp, TEXT, max_chars=1000, n_process=1)
+assert doc.text == TEXT
+spans = overlay_matches(doc, matcher, label="GPE", policy="longest", keep_existing=False)
+print([(span.text, span.start_char, span.end_char) for span in spans][:5])
+################################################################################
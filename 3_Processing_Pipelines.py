@@ -1,9 +1,11 @@
-import en_core_web_sm
 import spacy
 from spacy.matcher import PhraseMatcher
 from spacy.tokens import Span
 from spacy.language import Language
-nlp = en_core_web_sm.load()
+from pspacy import get_nlp, print_registry
+# get_nlp() hands out one shared, already loaded pipeline per (model, disabled components);
+    # fresh=True gives a private copy for sections that add components to it
+nlp = get_nlp("en_core_web_sm", fresh=True)
 print(nlp.pipe_names)
 print(nlp.pipeline)
 
@@ -25,9 +27,9 @@ doc = nlp("This is a sentence.")
 # Use the PhraseMatcher to find animal names in the document and adds the matched
     #  spans to the doc.ents
 ################################################################################
-nlp = spacy.load("en_core_web_sm")
+nlp = get_nlp("en_core_web_sm", fresh=True)
 animals = ["Golden Retriever", "cat", "turtle", "Rattus norvegicus"]
-animal_patterns = list(nlp.pipe(animals))
+animal_patterns = list(nlp.tokenizer.pipe(animals)) # tokens are all the PhraseMatcher needs
 print("animal_patterns:", animal_patterns)
 matcher = PhraseMatcher(nlp.vocab)
 matcher.add("ANIMAL", animal_patterns)
@@ -45,6 +47,19 @@ doc = nlp("I have a cat and a Golden Retriever")
 print([(ent.text, ent.label_) for ent in doc.ents])
 ################################################################################
 
+# 2.1 Timing Each Component
+    # Printing from inside a component (like length_component) doesn't tell which
+    #   stage is slow. instrument() wraps every component in nlp.pipeline and
+    #   records per-doc and per-batch wall time as histograms.
+    # - sample_rate=0.01 times only 1% of the calls, cheap enough to leave on.
+################################################################################
+from pspacy import instrument
+with instrument(nlp) as timer:
+    docs = list(nlp.pipe(["I have a cat and a Golden Retriever"] * 200))
+    timer.print_report()
+    print(timer.to_prometheus().splitlines()[-1])
+################################################################################
+
 
 ################################################################################
 # 3.1 Custom Extensions
@@ -53,16 +68,31 @@ print([(ent.text, ent.label_) for ent in doc.ents])
     # Below - custome attribute on token
 ################################################################################
 from spacy.tokens import Token
-nlp = en_core_web_sm.load()
+nlp = get_nlp("en_core_web_sm")
 Token.set_extension("is_country", default=False)
 doc = nlp("I live in Spain.")
 doc[3]._.is_country = True
 print([(token.text, token._.is_country) for token in doc])
 ################################################################################
 
+# 3.1.1 Typed Token Attributes
+    # Every token value set above is its own entry in doc.user_data. A typed
+    #   extension keeps one NumPy array per Doc instead: same token._ access,
+    #   plus bulk reads/writes and a compact DocBin (pspacy.typed_extensions).
+    # Benchmark: python -m benchmarks.bench_typed_extensions
+################################################################################
+import numpy
+from pspacy import get_values, set_typed_extension, set_values
+set_typed_extension(Token, "is_country", "bool", force=True)
+doc = nlp("I live in Spain and work in France.")
+doc[3]._.is_country = True
+set_values(doc, "is_country", numpy.array([token.text in ("Spain", "France") for token in doc]))
+print([(token.text, token._.is_country) for token in doc], get_values(doc, "is_country", raw=True))
+################################################################################
+
 # 3.2 Custom Property on Token
 ################################################################################
-nlp = en_core_web_sm.load()
+nlp = get_nlp("en_core_web_sm")
 def get_reversed(token): return token.text[::-1]
 Token.set_extension("reversed", getter=get_reversed, force=True) # force => overwrite
 doc = nlp("All generalizations are false, including this one.")
@@ -72,7 +102,7 @@ for token in doc: print("reversed:", token._.reversed)
 # 3.3 Custom Property on Doc 
 ################################################################################
 from spacy.tokens import Doc
-nlp = en_core_web_sm.load()
+nlp = get_nlp("en_core_web_sm")
 def get_has_number(doc): return any(token.like_num for token in doc)
 Doc.set_extension("has_number", getter=get_has_number)
 doc = nlp("The museum closed for five years in 2012.")
@@ -91,7 +121,7 @@ print(span._.to_html("strong"))
 
 # 3.5 Mix of Extensions ######################################################
 ################################################################################
-nlp = spacy.load("en_core_web_sm")
+nlp = get_nlp("en_core_web_sm")
 def get_wikipedia_url(span):
     # Get a Wikipedia URL if the span has one of the labels
     if span.label_ in ("PERSON", "ORG", "GPE", "LOCATION"):
@@ -147,12 +177,68 @@ doc = nlp("Czech Republic may help Slovakia protect its airspace")
 print([(ent.text, ent.label_, ent._.capital) for ent in doc.ents])
 ################################################################################
 
+# 3.6.1 Attributes from a Memory-Mapped Table
+    # CAPITALS lives in every process's heap, and get_wikipedia_url() rebuilds its
+    #   string on every read.
+    # build_kb() writes the table once (here with the URL precomputed) as sorted
+    #   key hashes plus one column per field; KnowledgeBase memory-maps it.
+    # "kb_attributes" looks up all doc.ents of a batch of Docs at once and adds a
+    #   Span extension per field (prefix "kb_" here, so 3.6's "capital" stays).
+    # Benchmark: python -m benchmarks.bench_kb
+################################################################################
+from pspacy.kb import KnowledgeBase, build_kb
+
+url = lambda name: "https://en.wikipedia.org/w/index.php?search=" + name.replace(" ", "_")
+build_kb({name: {"capital": capital, "wikipedia_url": url(name)} for name, capital in CAPITALS.items()},
+         "capitals_kb")
+print(KnowledgeBase("capitals_kb").lookup(["czech republic", "Slovakia", "Atlantis"], field="capital"))
+nlp_kb = English()
+nlp_kb.add_pipe("countries_component")
+nlp_kb.add_pipe("kb_attributes", config={"path": "capitals_kb", "prefix": "kb_"})
+for doc in nlp_kb.pipe(["Czech Republic may help Slovakia protect its airspace"]):
+    print([(ent.text, ent._.kb_capital, ent._.kb_wikipedia_url) for ent in doc.ents])
+################################################################################
+
+# 3.7 Cached Properties
+    # Getters run again on every read: has_number scans the whole Doc each time.
+    # set_cached_extension() keeps one value per Doc/Span/Token and recomputes it
+    #   only when the Doc changes in a way the getter depends on (depends_on=).
+    #   Token count and entity changes are seen on read; other in-place changes
+    #   are announced with invalidate(doc, ...).
+################################################################################
+from pspacy import cache_stats, set_cached_extension
+def get_n_countries(doc): return sum(ent.label_ == "GPE" for ent in doc.ents)
+set_cached_extension(Doc, "has_number", get_has_number, force=True)
+set_cached_extension(Doc, "n_countries", get_n_countries, depends_on=("ents",))
+set_cached_extension(Span, "capital", get_capital, force=True)
+doc = nlp("Czech Republic may help Slovakia protect its airspace since 2012")
+for _ in range(3): print(doc._.has_number, doc._.n_countries, [ent._.capital for ent in doc.ents])
+doc.ents = [] # n_countries is recomputed after doc.ents changes
+print(doc._.n_countries)
+print(cache_stats())
+################################################################################
+
+# 3.8 Gazetteer Component
+    # countries_component as a configurable, serializable component: patterns are
+    #   built with the tokenizer only, attr="LOWER" matches case-insensitively, and
+    #   the saved entries are only read back when the first Doc comes through.
+    # Benchmark: python -m benchmarks.bench_gazetteer
+################################################################################
+from pspacy import Gazetteer # registers the "gazetteer" factory
+nlp = English()
+nlp.add_pipe("gazetteer", config={"label": "GPE", "attr": "LOWER"}).add_phrases(COUNTRIES)
+nlp.to_disk("countries_pipeline")
+nlp = spacy.load("countries_pipeline")
+doc = nlp("czech republic may help SLOVAKIA protect its airspace")
+print([(ent.text, ent.label_) for ent in doc.ents])
+################################################################################
+
 ################################################################################
 # 4. Processing Streams
 ################################################################################
-nlp = en_core_web_sm.load()
+nlp = get_nlp("en_core_web_sm")
 with open("tweets.json", encoding="utf8") as f: TEXTS = json.loads(f.read())
-​
+
 # Process the texts and print the adjectives
 # BAD
 for text in TEXTS:
@@ -173,6 +259,49 @@ patterns = list(nlp.pipe(people))
 
 ################################################################################
 
+# 4.1 Streaming a Corpus to Disk
+    # list(nlp.pipe(TEXTS)) still keeps every Doc in memory. run_corpus() reads the
+    #   file lazily, picks batch_size from the text lengths, and writes the Docs to
+    #   rotating DocBin shards while printing docs/s and words/s.
+################################################################################
+from pspacy import read_shards, run_corpus
+stats = run_corpus(nlp, "tweets.json", "tweets_docs", shard_size=10_000, n_process=1)
+for doc in read_shards(nlp.vocab, stats["shards"]):
+    print([token.text for token in doc if token.pos_ == "ADJ"])
+################################################################################
+
+# 4.2 Caching Processed Docs
+    # Retweets and boilerplate repeat the same text many times. DocCache keys each
+    #   text by its hash plus the pipeline identity (model, version, active
+    #   components), so repeats skip the model: first from an in-memory LRU
+    #   bounded in bytes, then from an on-disk tier that survives restarts.
+################################################################################
+from pspacy import DocCache
+cache = DocCache(nlp, max_bytes=64 * 2**20, disk_path="doc_cache/tweets.sqlite")
+for doc in cache.pipe(TEXTS * 10): # ten copies of every tweet, each processed once
+    adjectives = [token.text for token in doc if token.pos_ == "ADJ"]
+print(cache.metrics())
+cache.close()
+################################################################################
+
+# 4.3 Serving One Text at a Time
+    # A service receives single texts from many clients, so it can't call nlp.pipe
+    #   on a list. MicroBatcher collects concurrent requests into nlp.pipe batches
+    #   (up to max_batch_size, waiting at most max_wait_ms) and runs the model
+    #   off the event loop.
+    # Load test: python -m benchmarks.bench_service
+################################################################################
+import asyncio
+from pspacy import MicroBatcher
+def get_adjectives(doc): return [token.text for token in doc if token.pos_ == "ADJ"]
+async def serve_tweets():
+    async with MicroBatcher(nlp, max_batch_size=32, max_wait_ms=5, postprocess=get_adjectives) as service:
+        results = await asyncio.gather(*(service.process(text) for text in TEXTS))
+        print(results)
+        print(service.metrics())
+asyncio.run(serve_tweets())
+################################################################################
+
 ################################################################################
 # 5. Processing Data with Contexts ############################################
     # Using custom attributes to add author and book meta information to quotes.
@@ -200,11 +329,30 @@ for doc, context in nlp.pipe(DATA, as_tuples=True):
     print(f"{doc.text}\n — '{doc._.book}' by {doc._.author}\n")
 ################################################################################
 
+################################################################################
+# 5.1 Contexts Across Processes
+    # With n_process > 1, nlp.pipe sends every Doc back with doc.to_bytes(), and
+    #   every extension value as its own msgpack (key, value) pair.
+    # pipe_tuples() keeps the contexts in the parent, in input order. on_doc runs
+    #   in the workers, and the extension values come back as compact columns.
+    # on_doc and the extensions must be defined at module level. With n_process > 1
+    #   on Windows/macOS, call it under if __name__ == "__main__":
+    # Benchmark: python -m benchmarks.bench_parallel_tuples
+################################################################################
+from pspacy.parallel import pipe_tuples
+
+def set_book_info(doc, context):
+    doc._.book = context["book"]
+    doc._.author = context["author"]
+
+for doc, context in pipe_tuples(DATA, "en_core_web_sm", n_process=1, on_doc=set_book_info):
+    print(f"{doc.text}\n — '{doc._.book}' by {doc._.author} ({[ent.text for ent in doc.ents]})\n")
+################################################################################
+
 ################################################################################
 # 6.1 Selective Processing #####################################################
 ################################################################################
-import spacy
-nlp = spacy.load("en_core_web_sm")
+nlp = get_nlp("en_core_web_sm")
 text = (
     "Chick-fil-A is an American fast food restaurant chain headquartered in "
     "the city of College Park, Georgia, specializing in chicken sandwiches."
@@ -221,3 +369,25 @@ with nlp.disable_pipes("tagger", "parser"):
     print(doc.ents)
 ################################################################################
 
+# 6.3 Planning What to Disable
+    # Instead of picking components by hand, declare the attributes the job reads.
+    #   The planner keeps the components that set them (and what those need) and
+    #   disables everything else.
+################################################################################
+from pspacy import measure_speedup, plan_pipeline, pruned_pipeline
+print(plan_pipeline(nlp, ["ents"]))
+print(plan_pipeline(nlp, ["pos_", "lemma_"]))
+with pruned_pipeline(nlp, ["ents"]):
+    doc = nlp(text)
+    print(doc.ents)
+report = measure_speedup(nlp, ["ents"], [text] * 200)
+print(f"expected {report['expected_speedup']:.1f}x, measured {report['measured_speedup']:.1f}x")
+################################################################################
+
+################################################################################
+# 7. Reusing Loaded Pipelines
+    # Every get_nlp() call above after the first returned the same Language object.
+    # Load time and resident memory per registry entry:
+################################################################################
+print_registry()
+################################################################################
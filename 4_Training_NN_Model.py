@@ -40,6 +40,19 @@ for doc in list(nlp.pipe(TEXTS)):
 print(*TRAINING_DATA, sep="\n")
 ################################################################################
 
+# 1.3 Weak Labeling at Scale
+    # The same GADGET rules as a RuleBundle, run over the texts by weak_label():
+    #   duplicate texts are skipped, overlapping matches resolved, and the labeled
+    #   Docs written to DocBin shards with per-label coverage stats.
+    # - Use n_process > 1 for millions of texts (under if __name__ == "__main__":
+    #   on Windows/macOS).
+################################################################################
+from pspacy import RuleBundle, weak_label
+bundle = RuleBundle({"GADGET": [pattern1, pattern2]})
+report = weak_label(TEXTS, bundle, "gadget_weak", model="blank:en", n_process=1)
+print(report["docs"], "docs,", report["duplicates"], "duplicates,", report["labels"])
+################################################################################
+
 ################################################################################
 # 2.1 Set up the pipeline
 ################################################################################
@@ -82,6 +95,23 @@ for itn in range(10): # epochs
         print(losses)
 ################################################################################
 
+# 2.3 A Faster Training Loop
+    # The loop above tokenizes and rebuilds every Example in every epoch.
+    # - Convert TRAINING_DATA into Examples once (ExampleStore), optionally saved as
+    #   a DocBin for the next run.
+    # - Shuffle indices, grow the batch size from 2 to 8 with compounding, and log
+    #   examples/s, words/s and epoch time next to the losses.
+################################################################################
+from pspacy import ExampleStore, train
+nlp = spacy.blank("en")
+nlp.add_pipe("ner").add_label("GADGET")
+store = ExampleStore.from_data(nlp, TRAINING_DATA)
+store.to_disk("gadget_train.spacy")
+store = ExampleStore.from_disk(nlp, "gadget_train.spacy")
+nlp.initialize(lambda: store.examples)
+train(nlp, store, n_iter=10, start=2, stop=8, compound=1.1)
+################################################################################
+
 # 3. Good Data vs. Bad Data
 ################################################################################
 TRAINING_DATA = [
@@ -101,6 +131,24 @@ TRAINING_DATA = [
 ]
 ################################################################################
 
+# 3.1 Finding Misspelled Places
+    # An exact PhraseMatcher over capitals.json never finds "amsterdem". The
+    #   fuzzy_gazetteer component matches entries within max_edits typos through a
+    #   precomputed deletion index and sets kb_id_ to the entry as written, e.g. to
+    #   label or check examples like the one above.
+    # Benchmark: python -m benchmarks.bench_fuzzy_gazetteer
+################################################################################
+import json
+from pspacy import FuzzyGazetteer # registers the "fuzzy_gazetteer" factory
+with open("capitals.json", encoding="utf8") as f: CAPITALS = json.loads(f.read())
+nlp = spacy.blank("en")
+# min_chars=6: with 5, "parks" is one edit away from "Paris"
+fuzzy = nlp.add_pipe("fuzzy_gazetteer", config={"label": "GPE", "max_edits": 1, "min_chars": 6})
+fuzzy.add_phrases([capital for capital in CAPITALS.values() if capital] + ["Amsterdam"])
+for doc in nlp.pipe(text for text, _ in TRAINING_DATA):
+    print([(ent.text, ent.start_char, ent.end_char, ent.kb_id_) for ent in doc.ents])
+################################################################################
+
 # 4. Training Multiple Labels
 # 4.1
 ################################################################################
@@ -116,6 +164,7 @@ TRAINING_DATA = [
     ),
     # And so on...
 ]
+TRAINING_DATA_4_1 = TRAINING_DATA # compared with 4.2 in 4.3
 ################################################################################
 
 # 4.2
@@ -135,6 +184,39 @@ TRAINING_DATA = [
 ]
 ################################################################################
 
+# 4.2.1 Checking Entity Offsets
+    # (0, 5, "WEBSITE") in 4.1 ends inside the token "Reddit": Example.from_dict
+    #   makes it missing annotation and training goes on without it.
+    # validate_offsets() tokenizes the whole set once and checks all spans at
+    #   once (NumPy), reporting out-of-range, misaligned, empty and overlapping
+    #   ones. snap= moves misaligned spans to token boundaries ("expand",
+    #   "contract", "nearest"); with a path, the cleaned Docs go to a DocBin that
+    #   ExampleStore.from_disk reads.
+    # Real datasets: n_process > 1, under if __name__ == "__main__": on Windows/macOS.
+    # Benchmark: python -m benchmarks.bench_alignment
+################################################################################
+from pspacy import print_issues, validate_offsets
+report = validate_offsets(TRAINING_DATA_4_1, "website_train.spacy", snap="expand")
+print_issues(report, TRAINING_DATA_4_1) # (0, 5, 'WEBSITE') 'Reddi': misaligned -> (0, 6)
+store = ExampleStore.from_disk(nlp, "website_train.spacy")
+print([(ent.text, ent.label_) for ent in store[0].reference.ents])
+################################################################################
+
+# 4.3 Comparing Labeling Schemes
+    # Instead of retraining one version after the other and eyeballing the
+    #   output, train both versions on k folds and score them on the same
+    #   held-out labels (reference=): P/R/F per label, early stopping, and only
+    #   the best checkpoint of each fold saved.
+    # Real datasets: n_process > 1, under if __name__ == "__main__": on Windows/macOS.
+    # Benchmark: python -m benchmarks.bench_cross_validation
+################################################################################
+from pspacy import make_jobs, print_summary, run_jobs, summarize
+variants = {"4.1 (0, 5, WEBSITE)": TRAINING_DATA_4_1, "4.2 corrected": TRAINING_DATA}
+jobs = make_jobs(variants, k=3, reference=TRAINING_DATA, out_dir="website_cv", n_iter=20, patience=3)
+results = run_jobs(jobs, n_process=1)
+print_summary(summarize(results))
+################################################################################
+
 # Learnings
 # * Extract linguistic features: pos, dep_, ner
 # * Work with pre-trained statistical models, such as en_core_web_sm
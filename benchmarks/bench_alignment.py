@@ -0,0 +1,112 @@
+# Entity offset validation: per-example char_span checks vs. validate_offsets()
+    # Data: tweets.json and the sentences of country_text.txt repeated to
+    #   N_EXAMPLES, with every country mention as a GPE entity. CORRUPT of the
+    #   examples get one broken span: end one char short, start one char late,
+    #   past the end of the text, or a copy overlapping the first entity.
+    # Tokenizing alone is most of the cost of both; its time is printed first.
+    # Baselines: nlp.make_doc + doc.char_span() per span, the usual one-off
+    #   check, and ExampleStore.from_data(...).to_disk() for the DocBin, on the
+    #   uncorrupted data (Example.from_dict raises on overlapping spans).
+    # validate_offsets() (snap=None) must flag the same misaligned spans, and its
+    #   DocBin must hold the same entities as Example.from_dict for the clean
+    #   examples; ExampleStore.from_disk reads it back.
+    # Run from the repository root: python -m benchmarks.bench_alignment
+################################################################################
+import json
+import os
+import random
+import re
+import tempfile
+import time
+
+import spacy
+from spacy.training import Example
+
+from pspacy.alignment import validate_offsets
+from pspacy.training import ExampleStore
+
+N_EXAMPLES = 100_000
+CORRUPT = 0.05
+PROCESSES = (1, 2, 4)
+
+
+def make_data(n, corrupt=CORRUPT, seed=0):
+    rng = random.Random(seed)
+    with open("countries.json", encoding="utf8") as f: countries = json.loads(f.read())
+    with open("tweets.json", encoding="utf8") as f: texts = json.loads(f.read())
+    with open("country_text.txt", encoding="utf8") as f: texts += re.split(r"(?<=[.!?])\s+", f.read())
+    pattern = re.compile(r"\b(" + "|".join(sorted(map(re.escape, countries), key=len, reverse=True)) + r")\b")
+    texts = [text for text in texts if text.strip()]
+    data = []
+    for i in range(n):
+        text = texts[i % len(texts)]
+        entities = [(m.start(), m.end(), "GPE") for m in pattern.finditer(text)]
+        if entities and rng.random() < corrupt:
+            start, end, label = entities[0]
+            kind = rng.choice(("short", "late", "past", "overlap"))
+            if kind == "short": entities[0] = (start, end - 1, label)
+            elif kind == "late": entities[0] = (start + 1, end, label)
+            elif kind == "past": entities.append((len(text) - 1, len(text) + 5, label))
+            else: entities.append((start, end, "LOC"))
+        data.append((text, {"entities": entities}))
+    return data
+
+
+def char_span_check(nlp, data):
+    # (index, start, end) of every span char_span() can't place
+    bad = []
+    for i, (text, annots) in enumerate(data):
+        doc = nlp.make_doc(text)
+        for start, end, label in annots["entities"]:
+            if 0 <= start < end <= len(text) and doc.char_span(start, end, label=label) is None:
+                bad.append((i, start, end))
+    return bad
+
+
+def main():
+    data = make_data(N_EXAMPLES)
+    nlp = spacy.blank("en")
+    n_spans = sum(len(annots["entities"]) for _, annots in data)
+    print(f"{len(data)} examples, {n_spans} spans")
+
+    start = time.perf_counter()
+    list(spacy.blank("en").tokenizer.pipe(text for text, _ in data))
+    print(f"{'tokenizer only':>22}{time.perf_counter() - start:>8.2f}s")
+    start = time.perf_counter()
+    expected = char_span_check(nlp, data)
+    base_s = time.perf_counter() - start
+    print(f"{'char_span per span':>22}{base_s:>8.2f}s")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "train.spacy")
+        start = time.perf_counter()
+        ExampleStore.from_data(nlp, make_data(N_EXAMPLES, corrupt=0)).to_disk(path) # raises on overlaps
+        store_s = time.perf_counter() - start
+        print(f"{'ExampleStore + DocBin':>22}{store_s:>8.2f}s")
+        for n_process in PROCESSES:
+            for out_path, baseline in ((None, base_s), (path, store_s)):
+                start = time.perf_counter()
+                report = validate_offsets(data, out_path, n_process=n_process, chunk_size=2000)
+                seconds = time.perf_counter() - start
+                found = [(issue["index"], issue["start"], issue["end"]) for issue in report["issues"]
+                         if issue["issue"] == "misaligned"]
+                assert sorted(found) == sorted(expected), "misaligned spans differ from char_span()"
+                name = f"validate x{n_process}" + (" + DocBin" if out_path else "")
+                print(f"{name:>22}{seconds:>8.2f}s  speedup {baseline / seconds:4.2f}x")
+        print(", ".join(f"{key}: {report[key]}" for key in
+                        ("ok_examples", "kept", "out_of_range", "misaligned", "overlapping")))
+
+        store = ExampleStore.from_disk(nlp, path)
+        flagged = {issue["index"] for issue in report["issues"]}
+        clean = [i for i in range(0, len(data), 97) if i not in flagged]
+        for i in clean:
+            reference = Example.from_dict(nlp.make_doc(data[i][0]), data[i][1]).reference
+            got = store[i].reference
+            assert [(e.start, e.end, e.label_) for e in got.ents] == [(e.start, e.end, e.label_) for e in reference.ents]
+        print(f"{len(store)} examples read back with ExampleStore.from_disk, {len(clean)} clean ones checked")
+
+    negatives = [(text, {"entities": []}) for text, _ in data[:3000]]
+    assert validate_offsets(negatives, chunk_size=1000)["ok_examples"] == len(negatives), "chunks without entities"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Cross-validation wall clock over 1, 2 and 4 processes
+    # Two labeling variants of a generated WEBSITE/PERSON dataset: offsets as
+    #   they should be, and every WEBSITE span cut one character short (the
+    #   (0, 5, "WEBSITE") mistake from chapter 4, section 4.1). Each gets k folds,
+    #   scored against the correct offsets.
+    # "cpu s" is the summed CPU time of the jobs, so cpu s / wall s is the number
+    #   of cores actually used.
+    # Run from the repository root: python -m benchmarks.bench_cross_validation
+################################################################################
+import random
+import string
+import tempfile
+import time
+import warnings
+
+from pspacy.evaluation import make_jobs, print_summary, run_jobs, summarize
+
+N_EXAMPLES = 300
+K = 3
+PROCESSES = (1, 2, 4)
+SETTINGS = {"n_iter": 8, "patience": 2}
+PEOPLE = ["Alexis Ohanian", "Jack Conte", "Felix Kjellberg", "Susan Wojcicki", "Steve Huffman", "Ana Martins"]
+SITES = ["Reddit", "Patreon", "YouTube", "Twitch", "Wikipedia", "Tumblr", "Instagram", "Pinterest"]
+TEMPLATES = ["{site} founder {person} gave away two tickets to fans", "{person} smashes {site} record",
+             "{site} partners with {other} to help creators", "Yesterday {person} left {site} for {other}",
+             "Why {person} thinks {site} is better than {other}"]
+
+
+def make_data(n, seed=0):
+    # (text, {"entities": [...]}) from TEMPLATES, offsets tracked while filling in
+    rng = random.Random(seed)
+    labels = {"site": "WEBSITE", "other": "WEBSITE", "person": "PERSON"}
+    data = []
+    for _ in range(n):
+        values = {"site": rng.choice(SITES), "other": rng.choice(SITES), "person": rng.choice(PEOPLE)}
+        text, entities = "", []
+        for literal, field, _, _ in string.Formatter().parse(rng.choice(TEMPLATES)):
+            text += literal
+            if field:
+                entities.append((len(text), len(text) + len(values[field]), labels[field]))
+                text += values[field]
+        data.append((text, {"entities": entities}))
+    return data
+
+
+def cut_websites(data):
+    return [(text, {"entities": [(start, end - 1, label) if label == "WEBSITE" else (start, end, label)
+                                 for start, end, label in annots["entities"]]}) for text, annots in data]
+
+
+def main():
+    warnings.filterwarnings("ignore", message=r"\[W030\]")
+    data = make_data(N_EXAMPLES)
+    variants = {"corrected": data, "websites cut short": cut_websites(data)}
+    print(f"{'procs':>6}{'wall s':>9}{'cpu s':>9}{'cores used':>12}{'speedup':>9}")
+    for n_process in PROCESSES:
+        with tempfile.TemporaryDirectory() as tmp:
+            jobs = make_jobs(variants, k=K, reference=data, out_dir=tmp, **SETTINGS)
+            start = time.perf_counter()
+            results = run_jobs(jobs, n_process=n_process)
+            wall = time.perf_counter() - start
+        single = wall if n_process == 1 else single
+        cpu_s = sum(result["cpu_seconds"] for result in results)
+        print(f"{n_process:>6}{wall:>9.2f}{cpu_s:>9.2f}{cpu_s / wall:>12.2f}{single / wall:>9.2f}")
+    print_summary(summarize(results))
+
+
+if __name__ == "__main__":
+    main()
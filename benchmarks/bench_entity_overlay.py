@@ -0,0 +1,56 @@
+# Benchmark: per-match doc.ents rebuilding vs. one bulk assignment (pspacy.ents)
+    # country_text.txt is repeated to book length and matched with the countries
+    #   PhraseMatcher. Time per match should stay flat for the bulk overlay and grow
+    #   with the match count for the per-match loop.
+    # Run from the repository root: python -m benchmarks.bench_entity_overlay
+################################################################################
+import json
+import time
+
+import spacy
+from spacy.matcher import PhraseMatcher
+from spacy.tokens import Span
+
+from pspacy.ents import resolve_overlaps, set_entities
+
+SCALES = (1, 4, 16, 64, 256, 1024)
+PER_MATCH_LIMIT = 1_024 # the quadratic loop gets too slow to wait for beyond this
+
+
+def per_match(doc, spans):
+    doc.ents = []
+    for span in spans:
+        doc.ents = list(doc.ents) + [span]
+
+
+def bulk(doc, spans):
+    doc.ents = []
+    set_entities(doc, spans, policy="longest")
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    with open("countries.json", encoding="utf8") as f: COUNTRIES = json.loads(f.read())
+    with open("country_text.txt", encoding="utf8") as f: TEXT = f.read()
+    nlp = spacy.blank("en") # only tokens are needed to match and assign entities
+    nlp.max_length = len(TEXT) * max(SCALES) + 2 * max(SCALES)
+    matcher = PhraseMatcher(nlp.vocab)
+    matcher.add("COUNTRY", list(nlp.tokenizer.pipe(COUNTRIES)))
+    print(f"{'matches':>10}{'per-match s':>14}{'bulk s':>10}{'bulk us/match':>15}")
+    for scale in SCALES:
+        doc = nlp.make_doc("\n\n".join([TEXT] * scale))
+        spans = [Span(doc, start, end, label="GPE") for _, start, end in matcher(doc)]
+        # the per-match loop raises on overlaps, so feed both the same clean spans
+        spans = resolve_overlaps(spans)
+        slow = timed(per_match, doc, spans) if len(spans) <= PER_MATCH_LIMIT else float("nan")
+        fast = timed(bulk, doc, spans)
+        print(f"{len(spans):>10}{slow:>14.4f}{fast:>10.4f}{fast / max(len(spans), 1) * 1e6:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
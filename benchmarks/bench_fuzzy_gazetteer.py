@@ -0,0 +1,162 @@
+# Fuzzy gazetteer over 100k entries vs. exact PhraseMatcher and brute force
+    # Entries: countries.json and capitals.json plus made-up place names.
+    # Texts: tweets.json and the sentences of country_text.txt. Every country or
+    #   capital mention of 5+ characters gets one typo (substitution, deletion,
+    #   swap or an inserted space). In multi-word names the typo may hit the
+    #   space: "NewYork", "Por tLouis", "KualaeLumpur".
+    # "recall" is the share of typo'd mentions found.
+    # Brute force takes every token window of the texts and of BRUTE_FORCE_DOCS
+    #   made-up sentences (entries with a typo), tries every string one edit
+    #   away from it against a dict of all entries and keeps the closest (first
+    #   added on ties). Its matches must equal the index lookup's.
+    # Run from the repository root: python -m benchmarks.bench_fuzzy_gazetteer
+################################################################################
+import json
+import random
+import re
+import time
+
+import spacy
+from spacy.matcher import PhraseMatcher
+
+from pspacy.fuzzy import FuzzyGazetteer, edit_distance
+
+N_ENTRIES = 100_000
+BRUTE_FORCE_DOCS = 500
+SYLLABLES = ["ka", "lo", "mi", "ra", "ten", "bur", "vo", "sel", "an", "dor", "ix", "ue", "sta", "pol", "gra"]
+
+
+def make_entries(n, seed=0):
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < n:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        names.add(name if rng.random() < 0.8 else f"{name} {rng.choice(['Bay', 'Hills', 'Springs'])}")
+    return sorted(names)
+
+
+def typo(word, rng):
+    i = rng.randrange(1, len(word) - 1)
+    kind = rng.choice(("substitute", "delete", "swap", "space"))
+    if kind == "substitute": return word[:i] + ("e" if word[i] != "e" else "a") + word[i + 1:]
+    if kind == "delete": return word[:i] + word[i + 1:]
+    if kind == "space": return word[:i] + " " + word[i:]
+    return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+
+
+def with_typos(texts, names, rng):
+    pattern = re.compile(r"\b(" + "|".join(sorted(map(re.escape, names), key=len, reverse=True)) + r")\b")
+    truth, out = [], []
+    for text in texts:
+        words = []
+        text = pattern.sub(lambda m: words.append(m.group()) or typo(m.group(), rng), text)
+        out.append(text)
+        truth.append(words)
+    return out, truth
+
+
+def make_sentences(entries, n, rng):
+    texts = []
+    for _ in range(n):
+        a, b = rng.choice(entries), rng.choice(entries)
+        a, b = (typo(name, rng) if len(name) >= 5 and rng.random() < 0.8 else name for name in (a, b))
+        texts.append(f"We flew from {a} to {b}, then took the train home.")
+    return texts
+
+
+def one_edit(key, alphabet):
+    # every string one deletion, substitution, insertion or adjacent swap away
+    out = set()
+    for i in range(len(key) + 1):
+        out.update(key[:i] + c + key[i:] for c in alphabet)
+        if i < len(key):
+            out.add(key[:i] + key[i + 1:])
+            out.update(key[:i] + c + key[i + 1:] for c in alphabet)
+        if i + 1 < len(key):
+            out.add(key[:i] + key[i + 1] + key[i] + key[i + 2:])
+    out.discard(key)
+    return out
+
+
+def brute_force(gazetteer, docs):
+    assert gazetteer.max_edits == 1
+    ids = {}
+    for i, key in enumerate(gazetteer.keys): ids.setdefault(key, i)
+    alphabet = sorted(set("".join(gazetteer.keys)))
+    longest = max(map(len, gazetteer.keys)) + 1
+    return [brute_force_doc(gazetteer, doc, ids, alphabet, longest) for doc in docs]
+
+
+def brute_force_doc(gazetteer, doc, ids, alphabet, longest):
+    # every window of non-space tokens up to the longest entry + 1 character
+    found = []
+    for start in range(len(doc)):
+        for end in range(start + 1, len(doc) + 1):
+            if doc[end - 1].is_space: break
+            key = " ".join(token.lower_ for token in doc[start:end])
+            if len(key) > longest: break
+            if key in ids:
+                found.append((start, end, gazetteer.entries[ids[key]], 0))
+                continue
+            close = [ids[other] for other in one_edit(key, alphabet)
+                     if other in ids and gazetteer.edits(other) == 1]
+            if close:
+                found.append((start, end, gazetteer.entries[min(close)], 1))
+    return sorted(found)
+
+
+def main():
+    rng = random.Random(0)
+    with open("countries.json", encoding="utf8") as f: countries = json.loads(f.read())
+    with open("capitals.json", encoding="utf8") as f: capitals = [c for c in json.loads(f.read()).values() if c]
+    with open("tweets.json", encoding="utf8") as f: texts = json.loads(f.read())
+    with open("country_text.txt", encoding="utf8") as f: texts += re.split(r"(?<=[.!?])\s+", f.read())
+    names = [name for name in countries + capitals if len(name) >= 5]
+    texts, truth = with_typos([text for text in texts if text.strip()], names, rng)
+    entries = countries + capitals
+    entries += make_entries(N_ENTRIES - len(entries))
+    nlp = spacy.blank("en")
+    docs = list(nlp.tokenizer.pipe(texts))
+    n_typos = sum(map(len, truth))
+    print(f"{len(entries)} entries, {len(docs)} docs, {n_typos} mentions with a typo")
+
+    start = time.perf_counter()
+    matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+    matcher.add("GPE", list(nlp.tokenizer.pipe(entries)))
+    exact_build = time.perf_counter() - start
+    start = time.perf_counter()
+    exact_hits = [matcher(doc) for doc in docs]
+    exact_s = time.perf_counter() - start
+    exact_texts = [{doc[s:e].text for _, s, e in hits} for doc, hits in zip(docs, exact_hits)]
+
+    start = time.perf_counter()
+    gazetteer = FuzzyGazetteer(nlp, label="GPE").add_phrases(entries)
+    hashes, ids = gazetteer.index
+    fuzzy_build = time.perf_counter() - start
+    start = time.perf_counter()
+    fuzzy_hits = [gazetteer.matches(doc) for doc in docs]
+    fuzzy_s = time.perf_counter() - start
+    fuzzy_texts = [{doc[s:e].text for s, e, _, _ in hits} for doc, hits in zip(docs, fuzzy_hits)]
+
+    def recall(found):
+        hit = sum(1 for words, got in zip(truth, found) for word in words
+                  if any(edit_distance(text.lower(), word.lower(), 1) == 1 for text in got))
+        return hit / max(n_typos, 1)
+
+    sample = docs + list(nlp.tokenizer.pipe(make_sentences(entries, BRUTE_FORCE_DOCS, rng)))
+    start = time.perf_counter()
+    brute_hits = brute_force(gazetteer, sample)
+    brute_s = time.perf_counter() - start
+    index_hits = [gazetteer.matches(doc) for doc in sample]
+    differ = sum(brute != index for brute, index in zip(brute_hits, index_hits))
+    assert not differ, f"index lookup differs from brute force on {differ} of {len(sample)} docs"
+
+    print(f"{'':14}{'build s':>9}{'docs/s':>10}{'recall':>8}")
+    print(f"{'PhraseMatcher':14}{exact_build:>9.2f}{len(docs) / exact_s:>10.0f}{recall(exact_texts):>8.2f}")
+    print(f"{'fuzzy index':14}{fuzzy_build:>9.2f}{len(docs) / fuzzy_s:>10.0f}{recall(fuzzy_texts):>8.2f}")
+    print(f"{'brute force':14}{0:>9.2f}{len(sample) / brute_s:>10.2f}{'':>8}")
+    print(f"index: {len(hashes)} variants, {(hashes.nbytes + ids.nbytes) / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Benchmark: gazetteer build time and match throughput at 10k, 100k and 1M entries
+    # "full pipeline" builds patterns with list(nlp.pipe(entries)) through
+    #   en_core_web_sm, as the chapter scripts did; it is only timed at 10k.
+    # "tokenizer" is the Gazetteer component (nlp.tokenizer.pipe), then saved,
+    #   loaded back lazily and used to match tweets.json + country_text.txt.
+    # Run from the repository root: python -m benchmarks.bench_gazetteer
+################################################################################
+import json
+import os
+import random
+import tempfile
+import time
+
+import spacy
+
+from pspacy import get_nlp
+from pspacy.gazetteer import Gazetteer
+
+SIZES = (10_000, 100_000, 1_000_000)
+FULL_PIPELINE_LIMIT = 10_000
+WORDS = ["North", "South", "New", "Upper", "Lower", "Great", "Saint", "Port", "Lake", "Mount"]
+
+
+def make_entries(n, seed=0):
+    rng = random.Random(seed)
+    return [f"{rng.choice(WORDS)} Place{i}" if i % 2 else f"Place{i}" for i in range(n)]
+
+
+def main():
+    with open("countries.json", encoding="utf8") as f: COUNTRIES = json.loads(f.read())
+    with open("tweets.json", encoding="utf8") as f: TEXTS = json.loads(f.read())
+    with open("country_text.txt", encoding="utf8") as f: TEXTS.append(f.read())
+    print(f"{'entries':>9}{'full s':>9}{'tok s':>8}{'save s':>8}{'load s':>8}{'1st call s':>11}{'docs/s':>9}")
+    for size in SIZES:
+        entries = COUNTRIES + make_entries(size - len(COUNTRIES))
+        full = float("nan")
+        if size <= FULL_PIPELINE_LIMIT:
+            nlp_full = get_nlp("en_core_web_sm")
+            start = time.perf_counter()
+            list(nlp_full.pipe(entries))
+            full = time.perf_counter() - start
+        nlp = spacy.blank("en")
+        start = time.perf_counter()
+        built = Gazetteer(nlp, label="GPE", attr="LOWER").add_phrases(entries)
+        built.matcher
+        tok = time.perf_counter() - start
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "gazetteer")
+            start = time.perf_counter()
+            built.to_disk(path)
+            save = time.perf_counter() - start
+            nlp = spacy.blank("en")
+            start = time.perf_counter()
+            gazetteer = Gazetteer(nlp).from_disk(path)
+            load = time.perf_counter() - start
+            docs = list(nlp.tokenizer.pipe(TEXTS))
+            start = time.perf_counter()
+            gazetteer(docs[0])
+            first = time.perf_counter() - start
+            rounds = 20
+            start = time.perf_counter()
+            for _ in range(rounds):
+                for doc in docs: gazetteer(doc)
+            rate = rounds * len(docs) / (time.perf_counter() - start)
+        print(f"{size:>9}{full:>9.2f}{tok:>8.2f}{save:>8.2f}{load:>8.4f}{first:>11.2f}{rate:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# Span attribute lookups: dict from JSON vs. memory-mapped KnowledgeBase
+    # Table: capitals.json plus made-up places up to N_ENTRIES, with "capital" and
+    #   "wikipedia_url" fields, written as JSON and built into a KnowledgeBase.
+    # Load: seconds and RSS growth for json.loads vs. opening the KnowledgeBase.
+    # Lookups: N_QUERIES texts (half of them missing) one at a time and as one
+    #   batch, and the ents of country_text.txt / tweets.json Docs (countries
+    #   matched as GPE) through a per-span getter vs. the "kb_attributes"
+    #   component. Both sides must return the same values, also for Docs coming
+    #   back from nlp.pipe(n_process=2).
+    # Run from the repository root: python -m benchmarks.bench_kb
+################################################################################
+import gc
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+import time
+
+import psutil
+import spacy
+from spacy.tokens import Span
+
+from pspacy.kb import KnowledgeBase, build_kb_from_json, normalize
+
+N_ENTRIES = 1_000_000
+N_QUERIES = 200_000
+N_DOCS = 5_000
+SYLLABLES = ["ka", "lo", "mi", "ra", "ten", "bur", "vo", "sel", "an", "dor", "ix", "ue", "sta", "pol", "gra"]
+
+
+def make_table(n, seed=0):
+    rng = random.Random(seed)
+    with open("capitals.json", encoding="utf8") as f: capitals = json.loads(f.read())
+    table = {name: capital for name, capital in capitals.items()}
+    while len(table) < n:
+        name = " ".join("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+                        for _ in range(rng.randint(1, 2)))
+        table[name] = name.split(" ")[0] + "ville"
+    url = lambda name: "https://en.wikipedia.org/w/index.php?search=" + name.replace(" ", "_")
+    return {name: {"capital": capital, "wikipedia_url": url(name)} for name, capital in table.items()}
+
+
+def rss():
+    gc.collect()
+    return psutil.Process().memory_info().rss
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    json_path, kb_path = os.path.join(tmp, "places.json"), os.path.join(tmp, "places_kb")
+    table = make_table(N_ENTRIES)
+    with open(json_path, "w", encoding="utf8") as f: f.write(json.dumps(table))
+    del table
+    _, build_s = timed(build_kb_from_json, json_path, kb_path)
+    kb_bytes = sum(os.path.getsize(os.path.join(kb_path, name)) for name in os.listdir(kb_path))
+    print(f"{N_ENTRIES} entries: JSON {os.path.getsize(json_path) / 2**20:.0f} MB, "
+          f"KnowledgeBase {kb_bytes / 2**20:.0f} MB, built in {build_s:.1f}s")
+
+    before = rss()
+    def load_dict():
+        with open(json_path, encoding="utf8") as f:
+            return {normalize(name): record for name, record in json.loads(f.read()).items()}
+    table, dict_s = timed(load_dict)
+    dict_mb = (rss() - before) / 2**20
+    before = rss()
+    kb, kb_s = timed(KnowledgeBase, kb_path)
+    kb_mb = (rss() - before) / 2**20
+    print(f"{'':22}{'load s':>9}{'RSS MB':>9}")
+    print(f"{'dict (json.loads)':22}{dict_s:>9.2f}{dict_mb:>9.0f}")
+    print(f"{'KnowledgeBase':22}{kb_s:>9.4f}{kb_mb:>9.0f}")
+
+    rng = random.Random(1)
+    names = rng.sample(list(table), N_QUERIES // 2)
+    queries = names + [name + "x" for name in names]
+    rng.shuffle(queries)
+    get = lambda text: (table.get(normalize(text)) or {}).get("capital")
+    expected, dict_s = timed(lambda: [get(text) for text in queries])
+    single, single_s = timed(lambda: [kb.get(text, "capital") for text in queries[:N_QUERIES // 10]])
+    batch, batch_s = timed(kb.lookup, queries, "capital")
+    assert single == expected[:len(single)] and batch == expected, "lookups differ"
+    print(f"{'':22}{'lookups/s':>12}")
+    print(f"{'dict':22}{N_QUERIES / dict_s:>12.0f}")
+    print(f"{'KB one at a time':22}{len(single) / single_s:>12.0f}")
+    print(f"{'KB batch':22}{N_QUERIES / batch_s:>12.0f}")
+
+    with open("countries.json", encoding="utf8") as f: countries = json.loads(f.read())
+    with open("tweets.json", encoding="utf8") as f: texts = json.loads(f.read())
+    with open("country_text.txt", encoding="utf8") as f: texts += re.split(r"(?<=[.!?])\s+", f.read())
+    texts = (texts * (N_DOCS // len(texts) + 1))[:N_DOCS]
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns([{"label": "GPE", "pattern": country} for country in countries])
+    docs = list(nlp.pipe(texts))
+    n_ents = sum(len(doc.ents) for doc in docs)
+    Span.set_extension("dict_capital", getter=lambda span: get(span.text), force=True)
+    expected, dict_s = timed(lambda: [[ent._.dict_capital for ent in doc.ents] for doc in docs])
+    kb_component = nlp.add_pipe("kb_attributes", config={"path": kb_path})
+    def kb_ents():
+        return [[ent._.capital for ent in doc.ents] for doc in kb_component.pipe(docs)]
+    found, kb_s = timed(kb_ents)
+    assert found == expected, "span values differ"
+    # the rows stored on the Docs must survive Doc.to_bytes/from_bytes from worker processes
+    piped = [[ent._.capital for ent in doc.ents] for doc in nlp.pipe(texts[:500], n_process=2)]
+    assert piped == expected[:500], "span values differ after nlp.pipe(n_process=2)"
+    print(f"{len(docs)} docs, {n_ents} ents")
+    print(f"{'':22}{'docs/s':>12}")
+    print(f"{'dict getter':22}{len(docs) / dict_s:>12.0f}")
+    print(f"{'kb_attributes':22}{len(docs) / kb_s:>12.0f}")
+    shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# One long text: nlp(text) vs. process_long() over 1, 2 and 4 processes
+    # The text is country_text.txt repeated to about TARGET_CHARS.
+    # Checks against the single pass: same text, same tokens (text, offset and
+    #   whitespace), same PhraseMatcher matches, and every entity's char offsets
+    #   pointing at its text. Entity agreement near chunk boundaries is reported
+    #   as a share of the single-pass entities.
+    # Small cases: a whitespace run crossing max_chars must stay in one chunk.
+    # Run from the repository root: python -m benchmarks.bench_long_docs
+################################################################################
+import json
+import time
+
+import spacy
+from spacy.matcher import PhraseMatcher
+
+from pspacy import get_nlp
+from pspacy.long_docs import process_long, split_text
+
+TARGET_CHARS = 200_000
+MAX_CHARS = 20_000
+PROCESSES = (1, 2, 4)
+EDGE_CASES = [ # (text, max_chars)
+    ("Hello. world\n   \n\n  next word here and more", 12),
+    ("abc    def ghi", 3),
+    ("one two\n\n\nthree", 9),
+]
+
+
+def tokens(doc):
+    return [(token.text, token.idx, token.whitespace_) for token in doc]
+
+
+def entities(doc):
+    return {(ent.start_char, ent.end_char, ent.label_) for ent in doc.ents}
+
+
+def check(doc, reference, matcher):
+    text = doc.text
+    assert text == reference.text, "text differs"
+    assert tokens(doc) == tokens(reference), "tokens differ"
+    assert matcher(doc) == matcher(reference), "matches differ"
+    assert all(text[ent.start_char:ent.end_char] == ent.text for ent in doc.ents), "entity offsets differ"
+    expected = entities(reference)
+    return len(entities(doc) & expected) / max(len(expected), 1)
+
+
+def main():
+    with open("country_text.txt", encoding="utf8") as f: text = f.read()
+    with open("countries.json", encoding="utf8") as f: countries = json.loads(f.read())
+    text = "\n\n".join([text.strip()] * (TARGET_CHARS // len(text) + 1))
+    nlp = get_nlp("en_core_web_sm")
+    nlp.max_length = max(nlp.max_length, len(text) + 1)
+    matcher = PhraseMatcher(nlp.vocab)
+    matcher.add("COUNTRY", list(nlp.tokenizer.pipe(countries)))
+    print(f"{len(text)} chars, {len(split_text(text, MAX_CHARS))} chunks of <= {MAX_CHARS} chars")
+    blank = spacy.blank("en")
+    for edge_text, max_chars in EDGE_CASES:
+        edge = process_long(blank, edge_text, max_chars)
+        assert tokens(edge) == tokens(blank(edge_text)), f"tokens differ for {edge_text!r}"
+
+    start = time.perf_counter()
+    reference = nlp(text)
+    single_s = time.perf_counter() - start
+    print(f"{'single pass':>14}{single_s:>9.2f}s")
+    for n_process in PROCESSES:
+        start = time.perf_counter()
+        doc = process_long(nlp, text, MAX_CHARS, n_process=n_process)
+        seconds = time.perf_counter() - start
+        agreement = check(doc, reference, matcher)
+        print(f"{n_process:>4} processes{seconds:>9.2f}s  speedup {single_s / seconds:4.2f}x  "
+              f"entities agreeing {agreement:.3f}")
+
+
+if __name__ == "__main__":
+    main()
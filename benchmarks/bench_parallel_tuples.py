@@ -0,0 +1,85 @@
+# (text, context) pairs over 1, 4 and 16 processes
+    # spaCy: nlp.pipe(as_tuples=True, n_process=N), extensions set in the parent
+    #   (the course's loop in chapter 3, section 5).
+    # pipe_tuples: extensions set in the workers by on_doc and sent back as columns.
+    # Also compares the bytes sent back per Doc and checks that both give the same
+    #   texts, contexts (in order) and extension values.
+    # Run from the repository root: python -m benchmarks.bench_parallel_tuples
+################################################################################
+import json
+import time
+
+from spacy.tokens import Doc, Span, Token
+
+from pspacy import get_nlp
+from pspacy.parallel import encode_chunk, pipe_tuples
+
+N_DOCS = 10_000
+PROCESSES = (1, 4, 16)
+MODEL = "en_core_web_sm"
+
+Doc.set_extension("author", default=None)
+Doc.set_extension("book", default=None)
+Token.set_extension("is_capitalized", default=False)
+Span.set_extension("quoted_by", default=None)
+
+
+def attach_context(doc, context):
+    doc._.author = context["author"]
+    doc._.book = context["book"]
+    for token in doc:
+        token._.is_capitalized = token.is_title
+    for ent in doc.ents:
+        ent._.quoted_by = context["author"]
+
+
+def extension_values(doc):
+    return (doc.text, doc._.author, doc._.book, [token._.is_capitalized for token in doc],
+            [(ent.start_char, ent.end_char, ent._.quoted_by) for ent in doc.ents])
+
+
+def with_spacy(nlp, data, n_process):
+    results = []
+    for doc, context in nlp.pipe(data, as_tuples=True, n_process=n_process, batch_size=64):
+        attach_context(doc, context)
+        results.append((extension_values(doc), context))
+    return results
+
+
+def with_pipe_tuples(data, n_process):
+    return [(extension_values(doc), context)
+            for doc, context in pipe_tuples(data, MODEL, n_process=n_process, on_doc=attach_context)]
+
+
+def bytes_per_doc(nlp, data):
+    docs = []
+    for doc, context in nlp.pipe(data[:1000], as_tuples=True):
+        attach_context(doc, context)
+        docs.append(doc)
+    spacy_bytes = sum(len(doc.to_bytes()) for doc in docs)
+    doc_bytes, user_data = encode_chunk(docs)
+    return spacy_bytes / len(docs), (len(doc_bytes) + len(user_data)) / len(docs)
+
+
+def main():
+    with open("bookquotes.json", encoding="utf8") as f: quotes = json.loads(f.read())
+    data = [(text, dict(context, n=i)) for i, (text, context) in
+            zip(range(N_DOCS), (quotes[i % len(quotes)] for i in range(N_DOCS)))]
+    nlp = get_nlp(MODEL)
+    spacy_size, our_size = bytes_per_doc(nlp, data)
+    print(f"bytes sent back per doc: doc.to_bytes() {spacy_size:.0f}, pipe_tuples {our_size:.0f}")
+    print(f"{'procs':>6}{'spacy docs/s':>14}{'pipe_tuples docs/s':>20}")
+    for n_process in PROCESSES:
+        start = time.perf_counter()
+        expected = with_spacy(nlp, data, n_process)
+        spacy_s = time.perf_counter() - start
+        start = time.perf_counter()
+        got = with_pipe_tuples(data, n_process)
+        ours_s = time.perf_counter() - start
+        assert got == expected, "pipe_tuples results differ from nlp.pipe"
+        assert [context["n"] for _, context in got] == list(range(N_DOCS)), "order lost"
+        print(f"{n_process:>6}{N_DOCS / spacy_s:>14.0f}{N_DOCS / ours_s:>20.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# Pattern cost profile of a few thousand Matcher rules, and its overhead
+    # Rules: N_KEYS keys in the style of the 5.1 patterns (LOWER + IS_TITLE /
+    #   IS_ALPHA, some with "-"), most on words that rarely or never occur, plus
+    #   a few wildcard rules ({"OP": "*"}) that keep partial matches alive.
+    # Texts: tweets.json, bookquotes.json and the sentences of country_text.txt,
+    #   repeated to N_DOCS. Docs are tokenizer-only, so no POS patterns here.
+    # The real matcher alone vs. wrapped by profile_matcher() at several sample
+    #   rates (best of REPEATS runs); matches must be the same. Then the ranked
+    #   report (sample rate 1, all runs) and the same for a PhraseMatcher of the
+    #   countries.
+    # Run from the repository root: python -m benchmarks.bench_pattern_profile
+################################################################################
+import json
+import random
+import re
+import time
+
+import spacy
+from spacy.matcher import Matcher, PhraseMatcher
+
+from pspacy.pattern_profile import profile_matcher
+
+N_KEYS = 2_000
+N_DOCS = 3_000
+SAMPLE_RATES = (0.001, 0.01, 0.1, 1.0)
+REPEATS = 3
+
+
+def load_texts(n):
+    with open("tweets.json", encoding="utf8") as f: texts = json.loads(f.read())
+    with open("bookquotes.json", encoding="utf8") as f: texts += [text for text, _ in json.loads(f.read())]
+    with open("country_text.txt", encoding="utf8") as f: texts += re.split(r"(?<=[.!?])\s+", f.read())
+    texts = [text for text in texts if text.strip()]
+    return (texts * (n // len(texts) + 1))[:n]
+
+
+def make_rules(docs, n_keys, seed=0):
+    rng = random.Random(seed)
+    words = sorted({token.lower_ for doc in docs for token in doc if token.is_alpha})
+    rules = {}
+    for i in range(n_keys):
+        word = rng.choice(words) if i % 4 == 0 else f"gadget{i}"
+        kind = i % 3
+        if kind == 0: pattern = [{"LOWER": word}, {"IS_TITLE": True}]
+        elif kind == 1: pattern = [{"LOWER": word}, {"TEXT": "-"}, {"IS_ALPHA": True}]
+        else: pattern = [{"LOWER": word}, {"IS_ALPHA": True, "OP": "?"}, {"IS_TITLE": True}]
+        rules[f"RULE_{i}"] = [pattern]
+    for word in ("prime", "country", "world"):
+        rules[f"WILDCARD_{word.upper()}"] = [[{"IS_ALPHA": True}, {"OP": "*"}, {"LOWER": word}]]
+    return rules
+
+
+def run(matcher, docs):
+    # best of REPEATS: this machine's timings are noisy
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        matches = [matcher(doc) for doc in docs]
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return matches, best
+
+
+def main():
+    nlp = spacy.blank("en")
+    docs = list(nlp.pipe(load_texts(N_DOCS)))
+    rules = make_rules(docs, N_KEYS)
+    matcher = Matcher(nlp.vocab)
+    for key, patterns in rules.items(): matcher.add(key, patterns)
+    n_tokens = sum(map(len, docs))
+    print(f"{len(rules)} keys, {len(docs)} docs, {n_tokens} tokens")
+
+    expected, base_s = run(matcher, docs)
+    print(f"{'':18}{'docs/s':>9}{'overhead':>10}")
+    print(f"{'Matcher':18}{len(docs) / base_s:>9.0f}{'':>10}")
+    for sample_rate in SAMPLE_RATES:
+        profiled = profile_matcher(matcher, sample_rate=sample_rate, seed=0)
+        found, seconds = run(profiled, docs)
+        assert found == expected, "profiled matcher returns other matches"
+        print(f"{f'sample {sample_rate:g}':18}{len(docs) / seconds:>9.0f}{seconds / base_s - 1:>10.1%}")
+    print()
+    profiled.profiler.print_report(top=10)
+
+    with open("countries.json", encoding="utf8") as f: countries = json.loads(f.read())
+    phrases = {"COUNTRY": list(nlp.tokenizer.pipe(countries)), "NEVER": [nlp.make_doc("Atlantis Republic")]}
+    matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+    for key, patterns in phrases.items(): matcher.add(key, patterns)
+    expected, base_s = run(matcher, docs)
+    profiled = profile_matcher(matcher, rules=phrases, attr="LOWER", sample_rate=0.01, seed=0)
+    found, seconds = run(profiled, docs)
+    assert found == expected, "profiled phrase matcher returns other matches"
+    print(f"\nPhraseMatcher: {len(docs) / base_s:.0f} docs/s, profiled at 0.01: {len(docs) / seconds:.0f} docs/s "
+          f"({seconds / base_s - 1:.1%} overhead)")
+    profiled.profiler.print_report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Cold start: spacy.load() vs. nlp.to_disk() copy vs. registry snapshot
+    # Each load runs in a new process, so nothing is cached in memory: spaCy is
+    #   imported first and only the load itself is timed.
+    # package: spacy.load(name); to_disk: spacy.load() of an nlp.to_disk() copy;
+    #   snapshot: get_nlp(name) once its snapshot was written.
+    # All three must give the same Docs (Doc.to_json) on tweets.json.
+    # Run from the repository root: python -m benchmarks.bench_registry
+################################################################################
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+MODELS = ("en_core_web_sm", "en_core_web_md")
+RUNS = 5
+LOAD = """
+import json, sys, time, warnings
+warnings.simplefilter("ignore")
+import spacy
+from pspacy import get_nlp, registry_report
+how, name = sys.argv[1], sys.argv[2]
+start = time.perf_counter()
+nlp = spacy.load(name) if how in ("package", "to_disk") else get_nlp(name)
+load_s = time.perf_counter() - start
+assert how != "snapshot" or registry_report()[0]["source"] == "snapshot", "snapshot not used"
+with open("tweets.json", encoding="utf8") as f: texts = json.loads(f.read())
+print(json.dumps({"load_s": load_s, "docs": [doc.to_json() for doc in nlp.pipe(texts)]}))
+"""
+
+
+def cold_load(how, name, env):
+    out = subprocess.run([sys.executable, "-c", LOAD, how, name], env=env, check=True,
+                         capture_output=True, text=True).stdout
+    return json.loads(out)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PSPACY_SNAPSHOT_DIR=os.path.join(tmp, "snapshots"),
+                   PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])))
+        print(f"{'model':<16}{'package s':>11}{'to_disk s':>11}{'snapshot s':>12}")
+        for name in MODELS:
+            copy = os.path.join(tmp, name)
+            subprocess.run([sys.executable, "-c", f"import spacy; spacy.load({name!r}).to_disk({copy!r})"],
+                           check=True, capture_output=True)
+            cold_load("first", name, env) # loads the package and writes the snapshot
+            times, expected = {}, None
+            for how, target in (("package", name), ("to_disk", copy), ("snapshot", name)):
+                runs = [cold_load(how, target, env) for _ in range(RUNS)]
+                expected = expected or runs[0]["docs"]
+                assert all(run["docs"] == expected for run in runs), f"{how} gives different Docs"
+                times[how] = statistics.median(run["load_s"] for run in runs)
+            print(f"{name:<16}{times['package']:>11.3f}{times['to_disk']:>11.3f}{times['snapshot']:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
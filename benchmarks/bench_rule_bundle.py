@@ -0,0 +1,68 @@
+# Benchmark: re-adding Matcher patterns at startup vs. loading a compiled RuleBundle
+    # Synthetic rule sets in the style of the chapter 1 patterns (LOWER/TEXT/IN +
+    #   IS_DIGIT/IS_TITLE tokens), grouped under a few hundred labels.
+    # Run from the repository root: python -m benchmarks.bench_rule_bundle
+################################################################################
+import json
+import os
+import tempfile
+import time
+
+import spacy
+from spacy.matcher import Matcher
+
+from pspacy.rules import RuleBundle, load_matcher, pipe_matches
+
+N_RULES = (1_000, 10_000, 50_000)
+N_LABELS = 200
+
+
+def make_rules(n_rules):
+    rules = {}
+    for i in range(n_rules):
+        kind = i % 3
+        if kind == 0: pattern = [{"LOWER": f"gadget{i}"}, {"IS_DIGIT": True}]
+        elif kind == 1: pattern = [{"TEXT": f"Model{i}"}, {"LOWER": {"IN": ["x", "pro", "max"]}, "OP": "?"}]
+        else: pattern = [{"LOWER": f"brand{i}"}, {"IS_TITLE": True}]
+        rules.setdefault(f"RULE_{i % N_LABELS}", []).append(pattern)
+    return rules
+
+
+def startup_readd(json_path, vocab):
+    # What the chapter scripts do today: read the rules, Matcher(vocab) (no
+    # validation) and one add() per label with all its patterns
+    with open(json_path, encoding="utf8") as f: rules = json.loads(f.read())
+    matcher = Matcher(vocab)
+    for label, patterns in rules.items():
+        matcher.add(label, patterns)
+    return matcher
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    with open("iphone.json", encoding="utf8") as f: TEXTS = json.loads(f.read())
+    print(f"{'rules':>8}{'re-add s':>11}{'bundle s':>11}{'speedup':>9}{'bundle MB':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rules in N_RULES:
+            rules = make_rules(n_rules)
+            json_path, bundle_path = os.path.join(tmp, "rules.json"), os.path.join(tmp, "rules.msgpack")
+            with open(json_path, "w", encoding="utf8") as f: f.write(json.dumps(rules))
+            RuleBundle(rules).to_disk(bundle_path, spacy.blank("en").vocab)
+            slow, readded = timed(startup_readd, json_path, spacy.blank("en").vocab)
+            nlp = spacy.blank("en")
+            fast, loaded = timed(load_matcher, bundle_path, nlp.vocab)
+            size = os.path.getsize(bundle_path) / 2**20
+            print(f"{n_rules:>8}{slow:>11.3f}{fast:>11.3f}{slow / fast:>8.1f}x{size:>11.2f}")
+            # both matchers must agree on the same stream
+            docs = list(nlp.pipe(TEXTS))
+            assert [readded(doc) for doc in docs] == [loaded(doc) for doc in docs]
+            list(pipe_matches(nlp, TEXTS, loaded))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# Load test: micro-batched service vs. one nlp() call per request
+    # An in-process client runs `concurrency` coroutines against the service.
+    #   max_batch_size=1 is the per-request baseline (each text alone in nlp.pipe).
+    # Run from the repository root: python -m benchmarks.bench_service
+################################################################################
+import asyncio
+import json
+
+from pspacy import get_nlp
+from pspacy.service import MicroBatcher, load_test
+
+N_REQUESTS = 2000
+CONCURRENCY = (1, 16, 128)
+SETTINGS = ((1, 0.0), (32, 2.0), (128, 5.0)) # (max_batch_size, max_wait_ms)
+
+
+def entity_labels(doc):
+    return [(ent.text, ent.label_) for ent in doc.ents]
+
+
+async def run(nlp, texts):
+    print(f"{'batch':>6}{'wait ms':>8}{'clients':>8}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'fill':>6}{'max q':>7}")
+    for max_batch_size, max_wait_ms in SETTINGS:
+        for concurrency in CONCURRENCY:
+            async with MicroBatcher(nlp, max_batch_size, max_wait_ms, postprocess=entity_labels) as service:
+                r = await load_test(service, texts, N_REQUESTS, concurrency)
+            s = r["service"]
+            print(f"{max_batch_size:>6}{max_wait_ms:>8.1f}{concurrency:>8}{r['requests_per_sec']:>9.1f}"
+                  f"{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}{s['batch_fill']:>6.2f}{s['max_queue_depth']:>7}")
+
+
+def main():
+    with open("tweets.json", encoding="utf8") as f: texts = json.loads(f.read())
+    asyncio.run(run(get_nlp("en_core_web_sm"), texts))
+
+
+if __name__ == "__main__":
+    main()
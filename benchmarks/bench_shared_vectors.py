@@ -0,0 +1,87 @@
+# Per-process memory with the vector table loaded per process vs. memory-mapped
+    # N_WORKERS spawned processes each load the pipeline and read every vector.
+    #   RSS counts the shared file pages in every process; USS only what a
+    #   process holds alone, so the USS sum is what the pool really costs.
+    # If MODEL has fewer than MIN_ROWS vectors (e.g. a stand-in package), a
+    #   blank pipeline with SYNTHETIC_SHAPE random vectors is used instead.
+    # Also reports the similarity error of the float16 and int8 copies.
+    # Run from the repository root: python -m benchmarks.bench_shared_vectors
+################################################################################
+import multiprocessing
+import os
+import tempfile
+
+import numpy
+import psutil
+import spacy
+from spacy.vectors import Vectors
+
+from pspacy.shared_vectors import accuracy_report, export_vectors, load_shared
+
+MODEL = "en_core_web_md"
+MIN_ROWS = 10_000
+SYNTHETIC_SHAPE = (100_000, 300)
+N_WORKERS = 4
+
+
+def mb(n_bytes):
+    return n_bytes / 2**20
+
+
+def measure(model, table, queue, barrier):
+    process = psutil.Process()
+    before = process.memory_info().rss
+    nlp = spacy.load(model) if table is None else load_shared(model, table)
+    checksum = float(numpy.asarray(nlp.vocab.vectors.data, dtype="float32").sum(dtype="float64"))
+    barrier.wait() # measure once every worker has mapped the table
+    info = process.memory_full_info()
+    queue.put((os.getpid(), before, info.rss, info.uss, checksum))
+
+
+def run_workers(model, table):
+    context = multiprocessing.get_context("spawn")
+    queue, barrier = context.Queue(), context.Barrier(N_WORKERS)
+    workers = [context.Process(target=measure, args=(model, table, queue, barrier)) for _ in range(N_WORKERS)]
+    for worker in workers: worker.start()
+    results = [queue.get() for _ in workers]
+    for worker in workers: worker.join()
+    return results
+
+
+def synthetic_model(path):
+    nlp = spacy.blank("en")
+    rng = numpy.random.default_rng(0)
+    data = rng.standard_normal(SYNTHETIC_SHAPE, dtype="float32")
+    nlp.vocab.vectors = Vectors(strings=nlp.vocab.strings, data=data,
+                                keys=[f"word{i}" for i in range(SYNTHETIC_SHAPE[0])])
+    nlp.to_disk(path)
+    return path
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        model = MODEL
+        if spacy.load(MODEL).vocab.vectors.shape[0] < MIN_ROWS:
+            print(f"{MODEL} has fewer than {MIN_ROWS} vectors, using random {SYNTHETIC_SHAPE} vectors")
+            model = synthetic_model(os.path.join(tmp, "model"))
+        tables = {dtype: export_vectors(model, os.path.join(tmp, dtype), dtype=dtype)
+                  for dtype in ("float32", "float16", "int8")}
+        for dtype, path in tables.items():
+            size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+            print(f"{dtype:>8} table {mb(size):8.1f} MB")
+
+        print(f"\n{'mode':>10}{'pid':>8}{'RSS before':>12}{'RSS after':>11}{'USS after':>11}")
+        for mode, table in (("own copy", None), ("float32", tables["float32"]), ("float16", tables["float16"])):
+            results = run_workers(model, table)
+            for pid, before, rss, uss, _ in results:
+                print(f"{mode:>10}{pid:>8}{mb(before):>12.1f}{mb(rss):>11.1f}{mb(uss):>11.1f}")
+            print(f"{mode:>10}{'total':>8}{'':>12}{mb(sum(r[2] for r in results)):>11.1f}"
+                  f"{mb(sum(r[3] for r in results)):>11.1f}")
+
+        print()
+        for dtype in ("float16", "int8"):
+            print(dtype, accuracy_report(tables["float32"], tables[dtype]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Benchmark: per-pair Span.similarity() loop vs. VectorIndex batched cosine / top-k
+    # Spans are all 1-3 token windows over tweets.json and country_text.txt,
+    #   processed with en_core_web_md (vectors only, no other components needed).
+    # Run from the repository root: python -m benchmarks.bench_similarity
+################################################################################
+import json
+import os
+import tempfile
+import time
+import warnings
+
+import numpy
+
+from pspacy import get_nlp
+from pspacy.similarity import VectorIndex
+
+N_SPANS = (250, 500, 1000)
+TOPK_SPANS = 100_000
+
+
+def make_spans(nlp, n):
+    with open("tweets.json", encoding="utf8") as f: TEXTS = json.loads(f.read())
+    with open("country_text.txt", encoding="utf8") as f: TEXTS.append(f.read())
+    spans = []
+    while len(spans) < n:
+        for doc in nlp.pipe(TEXTS):
+            spans.extend(doc[i:i + width] for width in (1, 2, 3) for i in range(len(doc) - width + 1))
+    return spans[:n]
+
+
+def main():
+    warnings.filterwarnings("ignore", message=r"\[W008\]") # spans without vectors
+    nlp = get_nlp("en_core_web_md", exclude=("tagger", "parser", "ner", "lemmatizer", "attribute_ruler"))
+    print(f"{'spans':>7}{'pairs':>10}{'loop s':>10}{'index s':>10}{'speedup':>10}")
+    for n in N_SPANS:
+        spans = make_spans(nlp, n)
+        start = time.perf_counter()
+        loop = [[a.similarity(b) for b in spans] for a in spans]
+        slow = time.perf_counter() - start
+        start = time.perf_counter()
+        index = VectorIndex.from_objects(spans)
+        scores = index.similarity_matrix(numpy.arange(n))
+        fast = time.perf_counter() - start
+        # spaCy short-cuts identical spans to 1.0 and vectorless ones to 0.0, compare the rest
+        has_vector = numpy.abs(index.matrix).sum(axis=1) > 0
+        mask = numpy.outer(has_vector, has_vector) & ~numpy.eye(n, dtype=bool)
+        assert numpy.allclose(numpy.asarray(loop, dtype="float32")[mask], scores[mask], atol=1e-4)
+        print(f"{n:>7}{n * n:>10}{slow:>10.3f}{fast:>10.4f}{slow / fast:>9.0f}x")
+    # top-k over a large index, loaded back memory-mapped as worker processes would
+    spans = make_spans(nlp, TOPK_SPANS)
+    index = VectorIndex.from_objects(spans)
+    with tempfile.TemporaryDirectory() as tmp:
+        index.save(os.path.join(tmp, "spans"))
+        shared = VectorIndex.load(os.path.join(tmp, "spans"))
+        start = time.perf_counter()
+        shared.topk(numpy.arange(1000), k=10)
+        print(f"top-10 for 1000 queries over {len(shared)} spans: {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
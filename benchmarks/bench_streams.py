@@ -0,0 +1,74 @@
+# Streaming a JSON array vs. json.load
+    # read_texts() decodes a .json array item by item (READ_CHUNK characters at a
+    #   time); json.load() reads and decodes the whole file at once.
+    # Checks first that read_json_array() gives json.loads()'s items for every
+    #   READ_CHUNK from 1 to the length of a small array with numbers, strings
+    #   and nested values, so chunk boundaries fall everywhere ("-0." | "0005").
+    # Run from the repository root: python -m benchmarks.bench_streams
+################################################################################
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from pspacy import streams
+
+N_RECORDS = 200_000
+EDGE_ARRAY = ('[-0.0005, 1e-7, 12.5E+3, 0, -12, true, null, "a, \\"b\\"]", "caf\\u00e9", '
+              '{"text": "x", "n": [1.25, {"e": 2E5}]}, [], "", 3.14159]')
+
+
+def check_chunk_sizes(path):
+    expected = json.loads(EDGE_ARRAY)
+    read_chunk = streams.READ_CHUNK
+    try:
+        for size in range(1, len(EDGE_ARRAY) + 1):
+            streams.READ_CHUNK = size
+            got = list(streams.read_json_array(path))
+            assert got == expected, f"READ_CHUNK={size}: {got} != {expected}"
+    finally:
+        streams.READ_CHUNK = read_chunk
+
+
+def measure(fn):
+    # timed without tracemalloc, then run again for the peak
+    start = time.perf_counter()
+    n = fn()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return n, seconds, peak
+
+
+def main():
+    with open("tweets.json", encoding="utf8") as f: tweets = json.loads(f.read())
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "edge.json")
+        with open(path, "w", encoding="utf8") as f: f.write(EDGE_ARRAY)
+        check_chunk_sizes(path)
+        print(f"read_json_array == json.loads for READ_CHUNK 1..{len(EDGE_ARRAY)}")
+
+        path = os.path.join(tmp, "corpus.json")
+        records = [{"text": tweets[i % len(tweets)], "score": i / 7} for i in range(N_RECORDS)]
+        with open(path, "w", encoding="utf8") as f: json.dump(records, f)
+        del records
+
+        def with_json_load():
+            with open(path, encoding="utf8") as f: return len([r["text"] for r in json.load(f)])
+
+        def with_read_texts():
+            return sum(1 for _ in streams.read_texts(path))
+
+        print(f"{N_RECORDS} records, {os.path.getsize(path) / 2**20:.1f} MB")
+        print(f"{'':12}{'records/s':>12}{'peak MB':>9}")
+        for name, fn in (("json.load", with_json_load), ("read_texts", with_read_texts)):
+            n, seconds, peak = measure(fn)
+            assert n == N_RECORDS, f"{name} read {n} records"
+            print(f"{name:12}{n / seconds:>12.0f}{peak / 2**20:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
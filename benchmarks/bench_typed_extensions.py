@@ -0,0 +1,102 @@
+# Token flags in doc.user_data vs. a typed array (pspacy.typed_extensions)
+    # One long Doc (blank English); is_country is set on every title-cased token.
+    # Memory: tracemalloc of the first round of writes.
+    # DocBin: extra bytes with store_user_data=True.
+    # Span values must survive Doc.to_bytes/from_bytes and take new writes after,
+    #   and reading them after a retokenization must raise.
+    # Run from the repository root: python -m benchmarks.bench_typed_extensions
+################################################################################
+import json
+import time
+import tracemalloc
+
+import numpy
+import spacy
+from spacy.tokens import Doc, DocBin, Span, Token
+
+from pspacy.typed_extensions import add_doc, get_values, set_typed_extension, set_values
+
+N_TOKENS = 1_000_000
+
+Token.set_extension("is_country_dict", default=False)
+set_typed_extension(Token, "is_country_typed", "bool")
+set_typed_extension(Span, "score_typed", "float")
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def allocated(func):
+    tracemalloc.start()
+    func()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return memory
+
+
+def doc_bin_size(doc, store):
+    doc_bin = DocBin(attrs=["ORTH"], store_user_data=True)
+    store(doc_bin, doc)
+    return len(doc_bin.to_bytes())
+
+
+def main():
+    with open("tweets.json", encoding="utf8") as f: tweets = json.loads(f.read())
+    nlp = spacy.blank("en")
+    nlp.max_length = 100_000_000
+    text = " ".join(tweets)
+    doc = nlp(text * (N_TOKENS // len(nlp(text)) + 1))
+    flags = numpy.array([token.is_title for token in doc])
+    positions = numpy.flatnonzero(flags).tolist()
+    print(f"{len(doc)} tokens, {len(positions)} flagged")
+
+    def set_dict():
+        for i in positions: doc[i]._.is_country_dict = True
+
+    def set_typed():
+        for i in positions: doc[i]._.is_country_typed = True
+
+    dict_mem, typed_mem = allocated(set_dict), allocated(set_typed)
+    _, dict_set_s = timed(set_dict)
+    _, typed_set_s = timed(set_typed)
+    _, bulk_set_s = timed(lambda: set_values(doc, "is_country_typed", flags))
+    dict_values, dict_get_s = timed(lambda: [token._.is_country_dict for token in doc])
+    typed_values, typed_get_s = timed(lambda: [token._.is_country_typed for token in doc])
+    bulk_values, bulk_get_s = timed(lambda: get_values(doc, "is_country_typed", raw=True))
+    assert dict_values == typed_values == bulk_values.tolist()
+
+    typed_doc = doc.copy()
+    for key in [key for key in typed_doc.user_data if key[0] == "._."]: del typed_doc.user_data[key]
+    dict_doc = doc.copy()
+    dict_doc.user_data = {key: value for key, value in doc.user_data.items() if key[0] == "._."}
+    base_doc = doc.copy()
+    base_doc.user_data = {}
+    base_size = doc_bin_size(base_doc, DocBin.add)
+
+    print(f"{'':22}{'dict':>12}{'typed':>12}{'typed bulk':>12}")
+    print(f"{'set flags (s)':22}{dict_set_s:>12.3f}{typed_set_s:>12.3f}{bulk_set_s:>12.4f}")
+    print(f"{'read all tokens (s)':22}{dict_get_s:>12.3f}{typed_get_s:>12.3f}{bulk_get_s:>12.4f}")
+    print(f"{'memory of writes (MB)':22}{dict_mem / 2**20:>12.2f}{typed_mem / 2**20:>12.2f}")
+    print(f"{'DocBin user_data (KB)':22}{(doc_bin_size(dict_doc, DocBin.add) - base_size) / 1024:>12.1f}"
+          f"{(doc_bin_size(typed_doc, add_doc) - base_size) / 1024:>12.1f}")
+
+    small = nlp("Czech Republic may help Slovakia protect its airspace")
+    small[0:2]._.score_typed = 0.5
+    small = Doc(nlp.vocab).from_bytes(small.to_bytes())
+    small[4:5]._.score_typed = 0.25
+    assert [small[0:2]._.score_typed, small[4:5]._.score_typed] == [0.5, 0.25]
+    with small.retokenize() as retokenizer: retokenizer.merge(small[0:2])
+    try:
+        small[3:4]._.score_typed
+        raise AssertionError("span values read after retokenizing")
+    except ValueError:
+        pass
+    set_values(small, "score_typed", [0.75], [small[0:1]], replace=True)
+    assert [small[0:1]._.score_typed, small[3:4]._.score_typed] == [0.75, 0.0]
+
+
+if __name__ == "__main__":
+    main()
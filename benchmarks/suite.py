@@ -0,0 +1,218 @@
+# Benchmark suite for the hot paths of the four chapters
+    # One scenario per operation, on corpora scaled up from the bundled JSON/text
+    #   files. Each scenario runs in its own subprocess, so peak RSS is per scenario.
+    # Recorded per scenario: throughput, p50/p99 latency of one step (a text, a
+    #   batch or a training update) and peak RSS, written to --out as JSON.
+    # With a baseline (--baseline, created with --save-baseline on the reference
+    #   machine) throughput drops and p99 increases beyond --tolerance are flagged
+    #   and the exit code is 1.
+    # Run from the repository root:
+    #   python -m benchmarks.suite --scale 2000 --save-baseline
+    #   python -m benchmarks.suite --scale 2000
+################################################################################
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+DEFAULT_BASELINE = os.path.join("benchmarks", "baseline.json")
+DEFAULT_OUT = os.path.join("benchmarks", "results.json")
+BATCH_SIZE = 64
+
+
+def load_json(path):
+    with open(path, encoding="utf8") as f: return json.loads(f.read())
+
+
+def corpus(n):
+    # n texts cycled from tweets, iPhone headlines, book quotes and country_text paragraphs
+    texts = load_json("tweets.json") + load_json("iphone.json") + [text for text, _ in load_json("bookquotes.json")]
+    with open("country_text.txt", encoding="utf8") as f:
+        texts += [p.strip() for p in f.read().split("\n") if p.strip()]
+    return [texts[i % len(texts)] for i in range(n)]
+
+
+def batches(items, size=BATCH_SIZE):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def peak_rss_mb():
+    try:
+        import resource # not available on Windows
+    except ImportError:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def measure(step, steps, units):
+    # Time step(x) for every x in steps; units = work items (docs, pairs, examples) in total
+    latencies = []
+    start = time.perf_counter()
+    for x in steps:
+        t = time.perf_counter()
+        step(x)
+        latencies.append(time.perf_counter() - t)
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    return {"units": units, "seconds": seconds, "throughput": units / max(seconds, 1e-9),
+            "p50_ms": pick(0.50), "p99_ms": pick(0.99), "steps": len(latencies)}
+
+
+# Scenarios: (scale) -> measure(...) result plus "unit" / "step"
+################################################################################
+def scenario_tokenizer(scale):
+    import spacy
+    nlp, texts = spacy.blank("en"), corpus(scale)
+    return {**measure(nlp.make_doc, texts, len(texts)), "unit": "docs", "step": "text"}
+
+
+def scenario_nlp_call(scale):
+    from pspacy import get_nlp
+    nlp, texts = get_nlp("en_core_web_sm"), corpus(scale)
+    return {**measure(nlp, texts, len(texts)), "unit": "docs", "step": "text"}
+
+
+def scenario_nlp_pipe(scale):
+    from pspacy import get_nlp
+    nlp, texts = get_nlp("en_core_web_sm"), corpus(scale)
+    step = lambda batch: list(nlp.pipe(batch, batch_size=BATCH_SIZE))
+    return {**measure(step, batches(texts), len(texts)), "unit": "docs", "step": "batch"}
+
+
+def scenario_matcher(scale):
+    import spacy
+    from spacy.matcher import Matcher
+    nlp = spacy.blank("en")
+    matcher = Matcher(nlp.vocab)
+    matcher.add("GADGET", [[{"LOWER": "iphone"}, {"LOWER": "x"}], [{"LOWER": "iphone"}, {"IS_DIGIT": True}]])
+    matcher.add("IOS_VERSION_PATTERN", [[{"TEXT": "iOS"}, {"IS_DIGIT": True}]])
+    docs = list(nlp.tokenizer.pipe(corpus(scale)))
+    return {**measure(matcher, docs, len(docs)), "unit": "docs", "step": "doc"}
+
+
+def scenario_phrase_matcher(scale):
+    import spacy
+    from spacy.matcher import PhraseMatcher
+    nlp = spacy.blank("en")
+    matcher = PhraseMatcher(nlp.vocab)
+    matcher.add("COUNTRY", list(nlp.tokenizer.pipe(load_json("countries.json"))))
+    docs = list(nlp.tokenizer.pipe(corpus(scale)))
+    return {**measure(matcher, docs, len(docs)), "unit": "docs", "step": "doc"}
+
+
+def scenario_similarity(scale):
+    from pspacy import get_nlp
+    nlp = get_nlp("en_core_web_md", exclude=("tagger", "parser", "ner", "lemmatizer", "attribute_ruler"))
+    tokens = [token for doc in nlp.pipe(corpus(max(scale // 10, 1))) for token in doc]
+    pairs = [(tokens[i], tokens[(i * 7 + 3) % len(tokens)]) for i in range(scale)]
+    return {**measure(lambda pair: pair[0].similarity(pair[1]), pairs, len(pairs)), "unit": "pairs", "step": "pair"}
+
+
+def scenario_components(scale):
+    # chapter 3.6: countries component + Span extension getter read for every entity
+    from spacy.lang.en import English
+    from spacy.tokens import Span
+    from pspacy.gazetteer import Gazetteer # noqa: F401 (registers the factory)
+    capitals = load_json("capitals.json")
+    Span.set_extension("capital", getter=lambda span: capitals.get(span.text), force=True)
+    nlp = English()
+    nlp.add_pipe("gazetteer", config={"label": "GPE", "policy": "longest"}).add_phrases(load_json("countries.json"))
+    step = lambda text: [ent._.capital for ent in nlp(text).ents]
+    texts = corpus(scale)
+    return {**measure(step, texts, len(texts)), "unit": "docs", "step": "text"}
+
+
+def scenario_train_update(scale):
+    import spacy
+    from pspacy.training import ExampleStore
+    data = [
+        ("Reddit partners with Patreon to help creators build communities", {"entities": [(0, 6, "WEBSITE"), (21, 28, "WEBSITE")]}),
+        ("PewDiePie smashes YouTube record", {"entities": [(0, 9, "PERSON"), (18, 25, "WEBSITE")]}),
+        ("Reddit founder Alexis Ohanian gave away two Metallica tickets to fans", {"entities": [(0, 6, "WEBSITE"), (15, 29, "PERSON")]}),
+        ("How to preorder the iPhone X", {"entities": [(20, 28, "GADGET")]}),
+    ]
+    nlp = spacy.blank("en")
+    nlp.add_pipe("ner")
+    store = ExampleStore.from_data(nlp, [data[i % len(data)] for i in range(max(scale // 10, 8))])
+    nlp.initialize(lambda: store.examples)
+    steps = batches(store.examples, 8)
+    return {**measure(lambda examples: nlp.update(examples, drop=0.2), steps, len(store)), "unit": "examples", "step": "update"}
+
+
+SCENARIOS = {
+    "tokenizer": scenario_tokenizer,
+    "nlp_call": scenario_nlp_call,
+    "nlp_pipe": scenario_nlp_pipe,
+    "matcher": scenario_matcher,
+    "phrase_matcher": scenario_phrase_matcher,
+    "similarity": scenario_similarity,
+    "components": scenario_components,
+    "train_update": scenario_train_update,
+}
+################################################################################
+
+
+def run_one(name, scale):
+    result = SCENARIOS[name](scale)
+    result.update(scenario=name, scale=scale, peak_rss_mb=peak_rss_mb())
+    return result
+
+
+def run_isolated(name, scale):
+    # Fresh interpreter per scenario so peak RSS and warm caches don't leak between them
+    cmd = [sys.executable, "-m", "benchmarks.suite", "--run-one", name, "--scale", str(scale)]
+    output = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare(results, baseline, tolerance):
+    # Returns human-readable regressions against the baseline
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None or base.get("scale") != result["scale"]: continue
+        if result["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {result['throughput']:.1f} < baseline {base['throughput']:.1f} {result['unit']}/s")
+        if result["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {result['p99_ms']:.2f}ms > baseline {base['p99_ms']:.2f}ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the chapter hot paths")
+    parser.add_argument("--scenarios", nargs="*", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--scale", type=int, default=2000, help="number of texts (or pairs) per scenario")
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.run_one:
+        print(json.dumps(run_one(args.run_one, args.scale)))
+        return 0
+    results = {}
+    print(f"{'scenario':<16}{'throughput':>14}{'p50 ms':>10}{'p99 ms':>10}{'peak MB':>10}")
+    for name in args.scenarios:
+        result = results[name] = run_isolated(name, args.scale)
+        print(f"{name:<16}{result['throughput']:>10.1f} {result['unit'][:3]}/s"
+              f"{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}{result['peak_rss_mb']:>10.1f}")
+    with open(args.out, "w", encoding="utf8") as f: f.write(json.dumps(results, indent=2))
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf8") as f: f.write(json.dumps(results, indent=2))
+        print("baseline saved to", args.baseline)
+        return 0
+    if not os.path.exists(args.baseline):
+        print("no baseline at", args.baseline, "- run with --save-baseline first")
+        return 0
+    regressions = compare(results, load_json(args.baseline), args.tolerance)
+    for line in regressions: print("REGRESSION", line)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
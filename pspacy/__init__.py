@@ -0,0 +1,25 @@
+# Helpers for running the course pipelines at production scale
+from .registry import get_nlp, print_registry, registry_report
+from .ents import overlay_matches, resolve_overlaps, set_entities
+from .rules import RuleBundle, load_matcher, pipe_matches
+from .streams import read_shards, read_texts, run_corpus
+from .similarity import VectorIndex
+from .extensions import cache_stats, invalidate, set_cached_extension
+from .gazetteer import Gazetteer
+from .planner import measure_speedup, plan_pipeline, pruned_pipeline
+from .training import ExampleStore, train
+from .weak_labels import weak_label
+from .cache import DocCache
+from .instrument import instrument
+from .columns import find_sequence, to_columns
+from .strings import BoundedPipeline, StringTable, write_string_table
+from .service import MicroBatcher, load_test
+from .parallel import pipe_tuples
+from .typed_extensions import get_values, set_typed_extension, set_values
+from .long_docs import process_long
+from .fuzzy import FuzzyGazetteer
+from .evaluation import make_jobs, print_summary, run_jobs, summarize
+from .shared_vectors import QuantizedVectors, export_vectors, load_shared
+from .kb import KnowledgeBase, build_kb, build_kb_from_json
+from .pattern_profile import PatternProfiler, profile_matcher
+from .alignment import print_issues, validate_offsets
@@ -0,0 +1,196 @@
+# Checking and fixing entity offsets before training
+    # Example.from_dict turns an entity whose character offsets don't fall on
+    #   token boundaries, e.g. (0, 5, "WEBSITE") for "Reddit", into missing
+    #   annotation with at most a warning, and nobody notices until the model is
+    #   trained. validate_offsets() tokenizes a whole training set once (tokenizer
+    #   only, in a process pool for n_process > 1) and checks every span in one
+    #   pass per chunk: the token start/end offsets of a chunk and the entity
+    #   offsets go into NumPy arrays, one searchsorted per side.
+    # Every span is reported as:
+    #   "out_of_range" : start < 0, end > len(text) or start >= end (dropped)
+    #   "misaligned"   : not on token boundaries; with snap= it is moved to
+    #                    "expand" (tokens it touches), "contract" (tokens fully
+    #                    inside) or "nearest" (closest boundary on each side),
+    #                    otherwise dropped and its tokens marked as missing
+    #   "empty"        : nothing left after snapping (dropped)
+    #   "overlapping"  : loses to another span under policy (pspacy.ents)
+    # The cleaned reference Docs go to a DocBin that ExampleStore.from_disk reads.
+    # With n_process > 1 on Windows/macOS (spawn), call it under
+    #   if __name__ == "__main__":
+################################################################################
+import collections
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy
+from spacy.tokens import DocBin, Span
+
+from .ents import resolve_overlaps
+from .weak_labels import DOC_ATTRS, chunks, load_model
+
+SNAP_MODES = (None, "expand", "contract", "nearest")
+ISSUES = ("out_of_range", "misaligned", "empty", "overlapping")
+WORKER = {}
+
+
+def init_worker(model):
+    WORKER["nlp"] = load_model(model)
+
+
+def token_bounds(docs, lengths):
+    # Token start/end char offsets of all docs on one axis (each doc shifted by
+    # the length of the ones before it, plus one) and each doc's first token
+    # no docs (a chunk of negative examples): empty arrays, nothing to check
+    bases = numpy.cumsum(lengths + 1) - (lengths + 1)
+    arrays = [doc.to_array(["IDX", "LENGTH"]).reshape(-1, 2).astype("int64") for doc in docs]
+    n_tokens = numpy.asarray([len(array) for array in arrays], dtype="int64")
+    first = numpy.concatenate([[0], numpy.cumsum(n_tokens)])
+    idx = numpy.concatenate([array[:, 0] for array in arrays] + [numpy.zeros(0, dtype="int64")])
+    idx += numpy.repeat(bases, n_tokens)
+    ends = idx + numpy.concatenate([array[:, 1] for array in arrays] + [numpy.zeros(0, dtype="int64")])
+    return bases, first, idx, ends
+
+
+def nearest(bounds, positions, lo, hi):
+    # Index in bounds[lo:hi] (per position) closest to each position
+    right = numpy.clip(numpy.searchsorted(bounds, positions), lo, hi - 1)
+    left = numpy.clip(right - 1, lo, hi - 1)
+    return numpy.where(numpy.abs(bounds[left] - positions) <= numpy.abs(bounds[right] - positions), left, right)
+
+
+def snap_tokens(mode, starts, ends, idx, tok_ends, lo, hi):
+    # Token range [start, end) per span under mode; empty ranges have start >= end
+    if mode == "expand":
+        start = numpy.searchsorted(tok_ends, starts, side="right")
+        end = numpy.searchsorted(idx, ends, side="left")
+    elif mode == "contract":
+        start = numpy.searchsorted(idx, starts, side="left")
+        end = numpy.searchsorted(tok_ends, ends, side="right")
+    else:
+        start = nearest(idx, starts, lo, hi)
+        end = nearest(tok_ends, ends, lo, hi) + 1
+    return numpy.maximum(start, lo), numpy.minimum(end, hi)
+
+
+def check_chunk(items, snap=None, policy="longest", write=True):
+    # items: [(index, text, annots)]; returns (DocBin bytes or None, issues, counts)
+    docs = list(WORKER["nlp"].tokenizer.pipe([text for _, text, _ in items]))
+    spans = [(d, start, end, label) for d, (_, _, annots) in enumerate(items)
+             for start, end, label in annots.get("entities", [])]
+    # only docs with spans go on the axis; b is a doc's position there
+    labeled = sorted({span[0] for span in spans})
+    lengths = numpy.asarray([len(items[d][1]) for d in labeled], dtype="int64")
+    bases, first, idx, tok_ends = token_bounds([docs[d] for d in labeled], lengths)
+    position = dict(zip(labeled, range(len(labeled))))
+    b = numpy.asarray([position[span[0]] for span in spans], dtype="int64")
+    starts = numpy.asarray([span[1] for span in spans], dtype="int64")
+    ends = numpy.asarray([span[2] for span in spans], dtype="int64")
+    out_of_range = (starts < 0) | (ends > lengths[b]) | (starts >= ends)
+    starts, ends = starts + bases[b], ends + bases[b]
+    lo, hi = first[b], first[b + 1]
+    # aligned: the start is a token start and the end a token end, in the same doc
+    start_tok = numpy.minimum(numpy.searchsorted(idx, starts), max(len(idx) - 1, 0))
+    end_tok = numpy.minimum(numpy.searchsorted(tok_ends, ends), max(len(idx) - 1, 0))
+    aligned = ~out_of_range & (hi > lo)
+    if len(idx):
+        aligned &= (idx[start_tok] == starts) & (tok_ends[end_tok] == ends)
+    end_tok = end_tok + 1
+    misaligned = ~out_of_range & ~aligned
+    missing = numpy.zeros(len(spans), dtype=bool)
+    if misaligned.any() and len(idx):
+        # unsnapped spans: the tokens they touch become missing, as in Example.from_dict
+        snapped = snap_tokens(snap or "expand", starts, ends, idx, tok_ends, lo, hi)
+        start_tok = numpy.where(misaligned, snapped[0], start_tok)
+        end_tok = numpy.where(misaligned, snapped[1], end_tok)
+        if snap is None:
+            missing = misaligned & (start_tok < end_tok)
+    empty = misaligned & ~missing & (start_tok >= end_tok)
+    kept = ~out_of_range & ~missing & ~empty
+
+    issues, counts = [], collections.Counter(spans=len(spans), examples=len(items))
+    flagged = set() # docs with an issue
+    def report(i, issue, fixed=None):
+        d, start, end, label = spans[i]
+        issues.append({"index": items[d][0], "start": start, "end": end, "label": label, "issue": issue,
+                       "fixed": fixed})
+        counts[issue] += 1
+        flagged.add(d)
+
+    for i in numpy.flatnonzero(out_of_range).tolist(): report(i, "out_of_range")
+    for i in numpy.flatnonzero(empty).tolist(): report(i, "empty")
+    per_doc = collections.defaultdict(list)
+    missing_per_doc = collections.defaultdict(list)
+    for i in numpy.flatnonzero(kept | missing).tolist():
+        d, offset = spans[i][0], first[b[i]]
+        span = Span(docs[d], int(start_tok[i] - offset), int(end_tok[i] - offset), label=spans[i][3])
+        if missing[i]:
+            report(i, "misaligned")
+            missing_per_doc[d].append(span)
+            continue
+        if misaligned[i]:
+            report(i, "misaligned", (span.start_char, span.end_char))
+            counts["snapped"] += 1
+        per_doc[d].append((i, span))
+
+    doc_bin = DocBin(attrs=DOC_ATTRS) if write else None
+    # without a DocBin only the docs with spans need a look
+    for d in range(len(docs)) if write else labeled:
+        doc_spans = [span for _, span in per_doc.get(d, ())]
+        ents = resolve_overlaps(doc_spans, policy=policy) if len(doc_spans) > 1 else doc_spans
+        if len(ents) < len(doc_spans):
+            won = {id(span) for span in ents}
+            for i, span in per_doc.get(d, ()):
+                if id(span) not in won: report(i, "overlapping")
+        counts["kept"] += len(ents)
+        if doc_bin is not None:
+            # missing spans may not overlap entities or each other
+            missing_spans = resolve_overlaps(missing_per_doc.get(d, []), existing=ents, policy="keep-existing")
+            docs[d].set_ents(ents, missing=[span for span in missing_spans if span not in ents], default="outside")
+            doc_bin.add(docs[d])
+    counts["ok_examples"] = len(docs) - len(flagged)
+    return doc_bin.to_bytes() if doc_bin is not None else None, issues, counts
+
+
+def validate_offsets(data, out_path=None, model="blank:en", snap=None, policy="longest", n_process=1,
+                     chunk_size=1000):
+    # data: [(text, {"entities": [(start, end, label), ...]}), ...]. Returns counts per
+    # issue and the issues (index into data, offsets, label, issue, snapped offsets).
+    # With out_path, the cleaned Docs are written there as one DocBin, in data order.
+    if snap not in SNAP_MODES:
+        raise ValueError(f"snap must be one of {SNAP_MODES}, got {snap!r}")
+    work = chunks(((i, text, annots) for i, (text, annots) in enumerate(data)), chunk_size)
+    write = out_path is not None
+    doc_bin, issues, counts = DocBin(attrs=DOC_ATTRS), [], collections.Counter()
+
+    def collect(result):
+        bytes_data, chunk_issues, chunk_counts = result
+        if write: doc_bin.merge(DocBin(attrs=DOC_ATTRS).from_bytes(bytes_data))
+        issues.extend(chunk_issues)
+        counts.update(chunk_counts)
+
+    if n_process == 1:
+        init_worker(model)
+        for chunk in work: collect(check_chunk(chunk, snap, policy, write))
+    else:
+        with ProcessPoolExecutor(n_process, initializer=init_worker, initargs=(model,)) as pool:
+            pending = collections.deque()
+            for chunk in work:
+                pending.append(pool.submit(check_chunk, chunk, snap, policy, write))
+                if len(pending) >= 2 * n_process:
+                    collect(pending.popleft().result())
+            while pending:
+                collect(pending.popleft().result())
+    if write:
+        doc_bin.to_disk(out_path)
+    report = {key: counts[key] for key in ("examples", "ok_examples", "spans", "kept", "snapped") + ISSUES}
+    return {**report, "issues": issues, "path": out_path}
+
+
+def print_issues(report, data=None, limit=20):
+    print(f"{report['examples']} examples ({report['ok_examples']} clean), {report['spans']} spans, "
+          f"{report['kept']} kept, {report['snapped']} snapped")
+    print(", ".join(f"{issue}: {report[issue]}" for issue in ISSUES))
+    for issue in report["issues"][:limit]:
+        text = f" {data[issue['index']][0][issue['start']:issue['end']]!r}" if data is not None else ""
+        fixed = f" -> {tuple(issue['fixed'])}" if issue["fixed"] else ""
+        print(f"  #{issue['index']} ({issue['start']}, {issue['end']}, {issue['label']!r}){text}: "
+              f"{issue['issue']}{fixed}")
@@ -0,0 +1,128 @@
+# Content-addressed Doc cache
+    # Sits in front of nlp()/nlp.pipe: a text that was already processed by the same
+    #   pipeline (model name, version, active components) is returned from the
+    #   cache instead of going through the model again.
+    # Two tiers, both holding one-Doc DocBin bytes (zlib-compressed arrays):
+    #   memory : LRU evicting by total bytes (max_bytes)
+    #   disk   : optional sqlite file, survives restarts and is shared by processes
+################################################################################
+import collections
+import hashlib
+import itertools
+import os
+import sqlite3
+
+from spacy.tokens import DocBin
+
+
+def pipeline_id(nlp):
+    # Changes whenever the model or the set of active components changes
+    meta = nlp.meta
+    parts = [nlp.lang, meta.get("name", ""), meta.get("version", ""), *nlp.pipe_names]
+    return hashlib.blake2b("\0".join(parts).encode("utf8"), digest_size=8).hexdigest()
+
+
+class DocCache:
+    def __init__(self, nlp, max_bytes=256 * 2**20, disk_path=None, store_user_data=True):
+        self.nlp, self.max_bytes, self.store_user_data = nlp, max_bytes, store_user_data
+        self.memory = collections.OrderedDict() # key -> bytes, oldest first
+        self.memory_bytes = 0
+        self.db = None
+        if disk_path is not None:
+            os.makedirs(os.path.dirname(disk_path) or ".", exist_ok=True)
+            self.db = sqlite3.connect(disk_path)
+            self.db.execute("CREATE TABLE IF NOT EXISTS docs (key BLOB PRIMARY KEY, data BLOB)")
+        self.stats = collections.Counter()
+
+    def key(self, text, pipe_id=None):
+        pipe_id = pipe_id or pipeline_id(self.nlp)
+        return hashlib.blake2b(f"{pipe_id}\0{text}".encode("utf8"), digest_size=16).digest()
+
+    def __call__(self, text):
+        return next(self.pipe([text]))
+
+    def pipe(self, texts, batch_size=256, **pipe_kwargs):
+        # Like nlp.pipe(texts): cached texts skip the model, output order is kept
+        texts = iter(texts)
+        while True:
+            batch = list(itertools.islice(texts, batch_size))
+            if not batch: return
+            yield from self.process_batch(batch, batch_size=batch_size, **pipe_kwargs)
+
+    def process_batch(self, batch, **pipe_kwargs):
+        pipe_id = pipeline_id(self.nlp)
+        keys = [self.key(text, pipe_id) for text in batch]
+        found, missing = {}, {}
+        for key, text in zip(keys, batch):
+            if key in found or key in missing:
+                # repeated within the batch: processed at most once
+                self.stats["bytes_saved"] += len(text.encode("utf8"))
+                continue
+            data = self.lookup(key)
+            if data is None:
+                missing[key] = text
+            else:
+                found[key] = data
+                self.stats["bytes_saved"] += len(text.encode("utf8"))
+        computed = {}
+        for key, doc in zip(missing, self.nlp.pipe(missing.values(), **pipe_kwargs)):
+            found[key] = self.store(key, doc)
+            computed[key] = doc
+        if self.db is not None and missing:
+            self.db.commit() # one transaction per batch
+        self.stats["misses"] += len(missing)
+        self.stats["hits"] += len(batch) - len(missing)
+        for key in keys:
+            # a miss gets the Doc from the model itself (tensor included), repeats a copy
+            doc = computed.pop(key, None)
+            yield doc if doc is not None else self.to_doc(found[key])
+
+    def lookup(self, key):
+        data = self.memory.get(key)
+        if data is not None:
+            self.memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return data
+        if self.db is not None:
+            row = self.db.execute("SELECT data FROM docs WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.stats["disk_hits"] += 1
+                self.remember(key, row[0])
+                return row[0]
+        return None
+
+    def store(self, key, doc):
+        doc_bin = DocBin(store_user_data=self.store_user_data)
+        doc_bin.add(doc)
+        data = doc_bin.to_bytes()
+        self.remember(key, data)
+        if self.db is not None:
+            self.db.execute("INSERT OR REPLACE INTO docs VALUES (?, ?)", (key, data))
+        return data
+
+    def remember(self, key, data):
+        if len(data) > self.max_bytes: return
+        self.memory[key] = data
+        self.memory_bytes += len(data)
+        while self.memory_bytes > self.max_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+            self.stats["evictions"] += 1
+
+    def to_doc(self, data):
+        return next(DocBin().from_bytes(data).get_docs(self.nlp.vocab))
+
+    def metrics(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "hits": self.stats["hits"], "misses": self.stats["misses"],
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "memory_hits": self.stats["memory_hits"], "disk_hits": self.stats["disk_hits"],
+            "bytes_saved": self.stats["bytes_saved"], "evictions": self.stats["evictions"],
+            "memory_entries": len(self.memory), "memory_bytes": self.memory_bytes,
+        }
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
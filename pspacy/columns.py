@@ -0,0 +1,104 @@
+# Columnar token attributes
+    # Turns a stream of Docs into NumPy columns with Doc.to_array, one row per token
+    #   across the whole corpus, so queries run over arrays instead of Token objects.
+    # Columns: one per attribute (string attributes hold their hash / symbol id),
+    #   HEAD as the head's index within its Doc, plus
+    #   "doc_offsets" (n_docs + 1 row offsets) and "token_index" (index within the Doc).
+    # to_arrow() builds a pyarrow Table when pyarrow is installed.
+################################################################################
+import itertools
+
+import numpy
+
+DEFAULT_ATTRS = ("ORTH", "POS", "DEP", "HEAD", "ENT_TYPE")
+
+
+def doc_columns(doc, attrs=DEFAULT_ATTRS):
+    array = doc.to_array(list(attrs)).reshape(len(doc), len(attrs))
+    columns = {}
+    for j, attr in enumerate(attrs):
+        column = array[:, j]
+        if attr == "HEAD": # stored relative to the token, possibly negative
+            column = column.view("int64") + numpy.arange(len(doc), dtype="int64")
+        columns[attr] = column
+    return columns
+
+
+def to_columns(docs, attrs=DEFAULT_ATTRS):
+    # All Docs -> one dict of concatenated columns
+    parts = {attr: [] for attr in attrs}
+    lengths = []
+    for doc in docs:
+        for attr, column in doc_columns(doc, attrs).items():
+            parts[attr].append(column)
+        lengths.append(len(doc))
+    columns = {}
+    for attr in attrs:
+        dtype = "int64" if attr == "HEAD" else "uint64"
+        columns[attr] = numpy.concatenate(parts[attr]) if parts[attr] else numpy.zeros(0, dtype=dtype)
+    columns["doc_offsets"] = numpy.concatenate([[0], numpy.cumsum(lengths, dtype="int64")]).astype("int64")
+    columns["token_index"] = numpy.arange(columns["doc_offsets"][-1], dtype="int64") - numpy.repeat(
+        columns["doc_offsets"][:-1], lengths)
+    return columns
+
+
+def iter_columns(docs, attrs=DEFAULT_ATTRS, batch_docs=10_000):
+    # Same as to_columns, one dict per batch_docs Docs, for streams too big for memory
+    docs = iter(docs)
+    while True:
+        batch = list(itertools.islice(docs, batch_docs))
+        if not batch: return
+        yield to_columns(batch, attrs)
+
+
+def doc_ids(columns):
+    # Doc number of every token row
+    offsets = columns["doc_offsets"]
+    return numpy.repeat(numpy.arange(len(offsets) - 1), numpy.diff(offsets))
+
+
+def string_ids(vocab, values):
+    # Strings -> the ids to_array() produces (symbol ids for POS/DEP labels, hashes otherwise)
+    return numpy.asarray([vocab.strings[value] if isinstance(value, str) else value for value in values], dtype="uint64")
+
+
+def find_sequence(columns, attr, values, vocab=None):
+    # Rows where attr matches values[0], values[1], ... on consecutive tokens of one Doc.
+    # Returns (doc numbers, token index within the Doc) of the first token.
+    column = columns[attr]
+    wanted = string_ids(vocab, values) if vocab is not None else numpy.asarray(values, dtype="uint64")
+    n = len(column) - len(wanted) + 1
+    if n <= 0:
+        empty = numpy.zeros(0, dtype="int64")
+        return empty, empty
+    mask = numpy.ones(n, dtype=bool)
+    for k, value in enumerate(wanted):
+        mask &= column[k:k + n] == value
+    ids = doc_ids(columns)
+    mask &= ids[:n] == ids[len(wanted) - 1:len(wanted) - 1 + n] # don't run across Doc ends
+    rows = numpy.nonzero(mask)[0]
+    return ids[rows], columns["token_index"][rows]
+
+
+def decode(column, vocab):
+    # Hash / symbol id column -> array of strings (each distinct value looked up once)
+    unique, inverse = numpy.unique(column, return_inverse=True)
+    strings = numpy.asarray([vocab.strings[int(value)] if value else "" for value in unique], dtype=object)
+    return strings[inverse]
+
+
+def to_arrow(columns, vocab=None):
+    # pyarrow Table of the token columns; with vocab, string attributes are decoded
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("to_arrow() needs pyarrow: pip install pyarrow") from None
+    data = {}
+    for name, column in columns.items():
+        if name == "doc_offsets": continue
+        if vocab is not None and column.dtype == numpy.uint64:
+            data[name] = pyarrow.array(decode(column, vocab).tolist(), type=pyarrow.string())
+        else:
+            data[name] = pyarrow.array(column)
+    data["doc"] = pyarrow.array(doc_ids(columns))
+    return pyarrow.table(data)
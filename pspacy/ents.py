@@ -0,0 +1,70 @@
+# Bulk entity overlay
+    # Rebuilding doc.ents once per match (doc.ents = list(doc.ents) + [span]) is
+    #   quadratic in the number of matches and raises on the first overlap.
+    # Instead: collect every span, resolve overlaps with one policy, assign once.
+    # Policies:
+    #   "longest"       : longest span wins, earlier start breaks ties
+    #   "first"         : earliest start wins, longer span breaks ties
+    #   "keep-existing" : entities already on the doc always win, new spans fill the gaps
+    # With costs= (e.g. the edit distance of fuzzy matches) cheaper spans win
+    #   first, and the policy decides between spans of the same cost.
+################################################################################
+from spacy.tokens import Span
+
+from .extensions import invalidate
+
+POLICIES = ("longest", "first", "keep-existing")
+
+
+def resolve_overlaps(spans, policy="longest", existing=(), costs=None):
+    # Return non-overlapping spans (sorted by start) from existing + spans.
+    # costs: one number per span (e.g. edit distance, existing entities count 0);
+    #   lower costs win first and the policy breaks ties.
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown overlap policy {policy!r}, expected one of {POLICIES}")
+    if policy == "longest":
+        key = lambda item: (item[1], -(item[2].end - item[2].start), item[2].start, item[0])
+    elif policy == "first":
+        key = lambda item: (item[1], item[2].start, -(item[2].end - item[2].start), item[0])
+    else: # keep-existing: existing entities first, then the new spans longest-first
+        key = lambda item: (item[0], item[1], -(item[2].end - item[2].start), item[2].start)
+    costs = [0] * len(spans) if costs is None else costs
+    candidates = [(0, 0, span) for span in existing] + [(1, cost, span) for cost, span in zip(costs, spans)]
+    candidates.sort(key=key)
+    taken = bytearray(len(candidates[0][2].doc)) if candidates else bytearray()
+    kept = []
+    for _, _, span in candidates:
+        # each token is looked at once per candidate covering it, so this stays linear
+        if any(taken[span.start:span.end]):
+            continue
+        taken[span.start:span.end] = b"\x01" * (span.end - span.start)
+        kept.append(span)
+    kept.sort(key=lambda span: span.start)
+    return kept
+
+
+def set_entities(doc, spans, policy="longest", keep_existing=True, costs=None):
+    # Merge spans into doc.ents with a single assignment
+    assign_entities(doc, spans, policy, keep_existing, costs)
+    return doc
+
+
+def assign_entities(doc, spans, policy="longest", keep_existing=True, costs=None):
+    # set_entities(), returning the spans that became entities
+    existing = doc.ents if keep_existing else ()
+    ents = resolve_overlaps(spans, policy=policy, existing=existing, costs=costs)
+    doc.ents = ents
+    invalidate(doc, "ents") # cached extensions with depends_on=("ents",)
+    new = {id(span) for span in spans}
+    return [span for span in ents if id(span) in new]
+
+
+def overlay_matches(doc, matcher, label=None, policy="longest", keep_existing=True):
+    # Run a Matcher/PhraseMatcher and add all matches as entities in one go.
+    # label=None uses the match key (e.g. "COUNTRY") as the entity label.
+    # Returns the matches that became entities (not those lost to overlaps).
+    spans = [
+        Span(doc, start, end, label=label if label is not None else match_id)
+        for match_id, start, end in matcher(doc)
+    ]
+    return assign_entities(doc, spans, policy=policy, keep_existing=keep_existing)
@@ -0,0 +1,127 @@
+# Cross-validation and dataset comparison for NER training
+    # Chapter 4 retrains one labeling scheme after another and never measures
+    #   anything on held-out data. make_jobs() turns named dataset variants (e.g.
+    #   misaligned vs. corrected offsets) into k train/dev folds each (or a fixed
+    #   dev set), and run_jobs() trains them in a process pool. To compare labeling
+    #   schemes, pass reference= (the same texts, trusted labels): every variant
+    #   is then scored against those labels on its dev folds.
+    # Every job gets its own spacy.blank(lang) + "ner" pipeline. After each epoch
+    #   the dev set is scored with nlp.evaluate (batched, P/R/F per label) and
+    #   training stops after `patience` epochs without a better ents_f. The best
+    #   weights are kept in memory and only that checkpoint is written, once.
+    # summarize() averages the folds of each variant, per label.
+    # With n_process > 1 on Windows/macOS (spawn), call run_jobs() under
+    #   if __name__ == "__main__":
+################################################################################
+import os
+import random
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import spacy
+
+from .training import ExampleStore, batch_sizes, train
+
+
+def kfold(data, k=5, seed=0, reference=None):
+    # [(train, dev)] with every example in exactly one dev split; dev examples
+    # come from reference (same order as data) when given
+    order = list(range(len(data)))
+    random.Random(seed).shuffle(order)
+    folds = [order[i::k] for i in range(k)]
+    dev_data = data if reference is None else reference
+    return [([data[i] for fold in folds[:j] + folds[j + 1:] for i in fold], [dev_data[i] for i in folds[j]])
+            for j in range(k)]
+
+
+def make_jobs(variants, k=5, dev=None, reference=None, out_dir=None, seed=0, **settings):
+    # variants: {name: [(text, {"entities": [...]}), ...]}; dev: fixed dev data
+    # instead of folds; settings go to train_job (n_iter, patience, lang, ...)
+    check_n_iter(settings.get("n_iter", 20))
+    jobs = []
+    for name, data in variants.items():
+        if reference is not None and [text for text, _ in data] != [text for text, _ in reference]:
+            raise ValueError(f"variant {name!r} and reference must have the same texts in the same order")
+        splits = [(data, dev)] if dev is not None else kfold(data, k, seed, reference)
+        for fold, (train_data, dev_data) in enumerate(splits):
+            job_name = name if dev is not None else f"{name}/fold{fold}"
+            checkpoint = os.path.join(out_dir, re.sub(r"[^\w.-]+", "_", job_name)) if out_dir else None
+            jobs.append(dict(settings, name=job_name, variant=name, fold=fold, train_data=train_data,
+                             dev_data=dev_data, checkpoint=checkpoint, seed=seed))
+    return jobs
+
+
+def check_n_iter(n_iter):
+    if n_iter < 1:
+        raise ValueError(f"n_iter must be at least 1, got {n_iter}")
+
+
+def train_job(job):
+    return run_job(**job)
+
+
+def run_job(name, variant, fold, train_data, dev_data, checkpoint=None, seed=0, lang="en", n_iter=20,
+            patience=3, batch_size=256, start=4.0, stop=32.0, compound=1.001, drop=0.2):
+    check_n_iter(n_iter)
+    started, cpu_started = time.perf_counter(), time.process_time()
+    nlp = spacy.blank(lang)
+    ner = nlp.add_pipe("ner")
+    for _, annots in train_data:
+        for *_, label in annots.get("entities", []): ner.add_label(label)
+    store = ExampleStore.from_data(nlp, train_data)
+    dev_store = ExampleStore.from_data(nlp, dev_data)
+    spacy.util.fix_random_seed(seed)
+    nlp.initialize(lambda: store.examples)
+    history, best, best_bytes = [], None, None
+    sizes = batch_sizes(start, stop, compound) # one schedule for the whole job, not one per epoch
+    for epoch in range(n_iter):
+        losses = train(nlp, store, n_iter=1, drop=drop, seed=seed + epoch, log=None, sizes=sizes)[0]["losses"]
+        scores = nlp.evaluate(dev_store.examples, batch_size=batch_size)
+        p, r, f = (scores[key] or 0.0 for key in ("ents_p", "ents_r", "ents_f")) # None without gold entities
+        history.append({"epoch": epoch, "loss": losses.get("ner", 0.0), "ents_f": f})
+        if best is None or f > best["ents_f"]:
+            best = {"epoch": epoch, "ents_p": p, "ents_r": r, "ents_f": f, "per_type": scores["ents_per_type"] or {}}
+            best_bytes = nlp.to_bytes() if checkpoint else None
+        elif epoch - best["epoch"] >= patience:
+            break
+    if checkpoint:
+        os.makedirs(os.path.dirname(checkpoint) or ".", exist_ok=True)
+        nlp.from_bytes(best_bytes).to_disk(checkpoint)
+    return {"name": name, "variant": variant, "fold": fold, "best": best, "history": history,
+            "epochs": len(history), "seconds": time.perf_counter() - started,
+            "cpu_seconds": time.process_time() - cpu_started, "checkpoint": checkpoint}
+
+
+def run_jobs(jobs, n_process=1):
+    # Results in job order
+    if n_process == 1:
+        return [train_job(job) for job in jobs]
+    with ProcessPoolExecutor(n_process) as pool:
+        return list(pool.map(train_job, jobs))
+
+
+def summarize(results):
+    # {variant: {"ents_p"/"ents_r"/"ents_f": mean, "per_type": {label: {"p", "r", "f"}}}}
+    # averaged over folds; labels missing from a fold's dev set count as absent
+    summary = {}
+    for variant in dict.fromkeys(result["variant"] for result in results):
+        bests = [result["best"] for result in results if result["variant"] == variant]
+        row = {key: sum(best[key] for best in bests) / len(bests) for key in ("ents_p", "ents_r", "ents_f")}
+        labels = sorted({label for best in bests for label in best["per_type"]})
+        row["per_type"] = {
+            label: {key: sum(best["per_type"][label][key] for best in bests if label in best["per_type"])
+                    / sum(label in best["per_type"] for best in bests) for key in ("p", "r", "f")}
+            for label in labels
+        }
+        row["folds"] = len(bests)
+        summary[variant] = row
+    return summary
+
+
+def print_summary(summary):
+    for variant, row in summary.items():
+        print(f"{variant}: P={row['ents_p']:.3f} R={row['ents_r']:.3f} F={row['ents_f']:.3f}"
+              f" ({row['folds']} folds)")
+        for label, scores in row["per_type"].items():
+            print(f"    {label:<12} P={scores['p']:.3f} R={scores['r']:.3f} F={scores['f']:.3f}")
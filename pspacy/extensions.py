@@ -0,0 +1,96 @@
+# Memoized extension getters
+    # Getter extensions (Doc.set_extension(name, getter=...)) recompute on every
+    #   read. set_cached_extension() registers the same getter behind a cache that
+    #   keeps one value per Doc, Span (start, end, label) or Token (index).
+    # A cached value is dropped when the Doc changes in a way the getter depends on:
+    #   "tokens" (always, e.g. retokenization) and optionally "ents", declared
+    #   with depends_on=("ents",). A change of len(doc) is always seen. Getters
+    #   that depend on "ents" also hash the entity columns (IOB, type, KB id) on
+    #   every read, so a plain doc.ents = ... is seen too: one to_array per read,
+    #   about 16us on a 1000-token Doc.
+    # invalidate(doc) / invalidate(doc, "ents") bumps a per-Doc version for the
+    #   changes no check sees, e.g. a retokenization that keeps len(doc).
+    #   pspacy.ents.set_entities calls it itself.
+    # Caches live next to the Doc in a weak dictionary, so they never end up in
+    #   doc.user_data / DocBin and go away with the Doc.
+################################################################################
+import weakref
+
+from spacy.attrs import ENT_IOB, ENT_KB_ID, ENT_TYPE
+from spacy.tokens import Doc, Span, Token
+
+DEPENDENCIES = ("tokens", "ents")
+ENT_ATTRS = [ENT_IOB, ENT_TYPE, ENT_KB_ID]
+CACHES = weakref.WeakKeyDictionary() # Doc -> {(cls, name, *position): (fingerprint, value)}
+VERSIONS = weakref.WeakKeyDictionary() # Doc -> {dependency: times invalidated}
+UNCHANGED = dict.fromkeys(DEPENDENCIES, 0)
+STATS = {} # "Doc.has_number" -> {"hits": int, "misses": int}
+
+
+def fingerprint(doc, depends_on):
+    versions = VERSIONS.get(doc, UNCHANGED)
+    key = (len(doc), versions["tokens"])
+    if "ents" in depends_on:
+        key += (versions["ents"], hash(doc.to_array(ENT_ATTRS).tobytes()))
+    return key
+
+
+def cache_key(obj, name):
+    if isinstance(obj, Doc): return obj, ("Doc", name)
+    if isinstance(obj, Span): return obj.doc, ("Span", name, obj.start, obj.end, obj.label)
+    if isinstance(obj, Token): return obj.doc, ("Token", name, obj.i)
+    raise TypeError(f"Can't cache extensions on {type(obj).__name__}")
+
+
+def cached_getter(cls, name, getter, depends_on=()):
+    unknown = set(depends_on) - set(DEPENDENCIES)
+    if unknown:
+        raise ValueError(f"Unknown cache dependencies {sorted(unknown)}, expected some of {DEPENDENCIES}")
+    counters = STATS.setdefault(f"{cls.__name__}.{name}", {"hits": 0, "misses": 0})
+
+    def get(obj):
+        doc, key = cache_key(obj, name)
+        cache = CACHES.get(doc)
+        if cache is None:
+            cache = CACHES[doc] = {}
+        current = fingerprint(doc, depends_on)
+        entry = cache.get(key)
+        if entry is not None and entry[0] == current:
+            counters["hits"] += 1
+            return entry[1]
+        counters["misses"] += 1
+        value = getter(obj)
+        cache[key] = (current, value)
+        return value
+
+    get.uncached = getter
+    return get
+
+
+def set_cached_extension(cls, name, getter, depends_on=(), **kwargs):
+    # Opt-in replacement for cls.set_extension(name, getter=getter, ...)
+    cls.set_extension(name, getter=cached_getter(cls, name, getter, depends_on), **kwargs)
+
+
+def invalidate(doc, changed=DEPENDENCIES):
+    # Call after changing a Doc in place in a way len(doc) and the entity columns
+    #   don't show. changed="ents" keeps the values that don't depend on the
+    #   entities; by default all go.
+    changed = (changed,) if isinstance(changed, str) else tuple(changed)
+    unknown = set(changed) - set(DEPENDENCIES)
+    if unknown:
+        raise ValueError(f"Unknown cache dependencies {sorted(unknown)}, expected some of {DEPENDENCIES}")
+    versions = VERSIONS.setdefault(doc, dict(UNCHANGED))
+    for dependency in changed:
+        versions[dependency] += 1
+    if "tokens" in changed:
+        CACHES.pop(doc, None)
+
+
+def cache_stats():
+    return {name: dict(counts) for name, counts in STATS.items()}
+
+
+def reset_cache_stats():
+    for counts in STATS.values():
+        counts["hits"] = counts["misses"] = 0
@@ -0,0 +1,225 @@
+# Fuzzy gazetteer: entries within a few typos ("amsterdem" -> Amsterdam)
+    # The PhraseMatcher only finds exact token sequences. FuzzyGazetteer indexes
+    #   every entry by its symmetric-deletion variants: all strings left after
+    #   deleting up to max_edits characters from the lowercased entry.
+    # A text span within max_edits of an entry shares at least one variant with
+    #   it, so a lookup deletes characters from the span, looks up those hashes in
+    #   one sorted array (one searchsorted per Doc) and checks the few candidates
+    #   with a bounded edit distance (adjacent transpositions count as one edit).
+    # With max_edits=1 a window is only looked up if its head or tail equals the
+    #   head or tail of an entry of a possible length. The two pieces are split
+    #   by one character, so a single edit leaves one of them intact, and most
+    #   windows (common words) skip the deletion variants altogether.
+    # Typos may add, remove or move a space, so an entry of n tokens is looked
+    #   up in windows of n - max_edits to n + max_edits tokens. Each edit touches
+    #   at most two words of a window and shifts the others by at most one
+    #   position, so a window stops growing once more than 2 * max_edits of its
+    #   words appear at no entry's position +- max_edits.
+    # Only entries of min_chars or more are matched fuzzily. Shorter ones must
+    #   match exactly, otherwise short words hit short entries all the time.
+    # Matches become doc.ents with kb_id_ set to the entry as written. Overlapping
+    #   matches go to the closest one first (edit distance), then to policy.
+    # Usage:
+    #   fuzzy = nlp.add_pipe("fuzzy_gazetteer", config={"label": "GPE"})
+    #   fuzzy.add_phrases(CAPITALS)
+################################################################################
+import os
+
+import numpy
+import srsly
+from spacy.language import Language
+from spacy.strings import hash_string
+from spacy.tokens import Span
+
+from .ents import POLICIES, set_entities
+
+
+@Language.factory(
+    "fuzzy_gazetteer",
+    default_config={"label": "ENTITY", "max_edits": 1, "min_chars": 5, "policy": "keep-existing"},
+)
+def make_fuzzy_gazetteer(nlp, name, label, max_edits, min_chars, policy):
+    return FuzzyGazetteer(nlp, name, label=label, max_edits=max_edits, min_chars=min_chars, policy=policy)
+
+
+def deletions(text, max_edits):
+    variants = frontier = {text}
+    for _ in range(max_edits):
+        frontier = {word[:i] + word[i + 1:] for word in frontier for i in range(len(word))}
+        variants = variants | frontier
+    return variants
+
+
+def split_key(key):
+    # head and tail of a key, one character apart
+    h = (len(key) - 1) // 2
+    return key[:h], key[h + 1:]
+
+
+def edit_distance(a, b, limit):
+    # Optimal string alignment distance, or limit + 1 once it is over limit
+    if abs(len(a) - len(b)) > limit: return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit: return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+class FuzzyGazetteer:
+    def __init__(self, nlp, name="fuzzy_gazetteer", label="ENTITY", max_edits=1, min_chars=5, policy="keep-existing"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overlap policy {policy!r}, expected one of {POLICIES}")
+        self.name, self.label, self.policy = name, label, policy
+        self.max_edits, self.min_chars = max_edits, min_chars
+        self.tokenizer = nlp.tokenizer
+        self.entries = [] # as written
+        self.keys = [] # lowercased tokens joined by " "
+        self.exact = {} # key -> entry id
+        self.lengths = {} # n tokens -> key lengths a window of n tokens may have
+        self.slots = set() # (position +- edits, word) of multi-token entries
+        self.pieces = set() # (key length, "head" / "tail", piece) of fuzzy entries, max_edits=1 only
+        self._index = None # (sorted variant hashes, entry ids)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add_phrases(self, phrases, batch_size=1000):
+        phrases = list(phrases)
+        for phrase, doc in zip(phrases, self.tokenizer.pipe(phrases, batch_size=batch_size)):
+            self.add_key(phrase, " ".join(token.lower_ for token in doc if not token.is_space))
+        self._index = None
+        return self
+
+    def add_key(self, phrase, key):
+        if not key or key in self.exact: return
+        self.exact[key] = len(self.entries)
+        self.entries.append(phrase)
+        self.keys.append(key)
+        edits, words = self.edits(key), key.split(" ")
+        for n in range(max(len(words) - edits, 1), len(words) + edits + 1):
+            self.lengths.setdefault(n, set()).update(range(len(key) - edits, len(key) + edits + 1))
+        if len(words) > 1:
+            self.slots.update((i + shift, word) for i, word in enumerate(words) for shift in range(-edits, edits + 1))
+        if edits == 1:
+            head, tail = split_key(key)
+            self.pieces.update(((len(key), "head", head), (len(key), "tail", tail)))
+
+    def edits(self, key):
+        # edits allowed for an entry
+        return self.max_edits if len(key) >= self.min_chars else 0
+
+    def query_edits(self, key):
+        # deletions needed on the text side to reach every entry it may match
+        return self.max_edits if len(key) >= self.min_chars - self.max_edits else 0
+
+    def maybe_close(self, key):
+        # Prefilter: can key be one edit away from an entry?
+        if self.max_edits != 1: return True
+        pieces = self.pieces
+        for length in (len(key) - 1, len(key), len(key) + 1):
+            h = (length - 1) // 2
+            if (length, "head", key[:h]) in pieces or (length, "tail", key[h + 1 - length:]) in pieces:
+                return True
+        return False
+
+    @property
+    def index(self):
+        if self._index is None:
+            hashes, ids = [], []
+            for i, key in enumerate(self.keys):
+                for variant in deletions(key, self.query_edits(key)):
+                    hashes.append(hash_string(variant))
+                    ids.append(i)
+            hashes, ids = numpy.asarray(hashes, dtype="uint64"), numpy.asarray(ids, dtype="int32")
+            order = numpy.argsort(hashes, kind="stable")
+            self._index = (hashes[order], ids[order])
+        return self._index
+
+    def windows(self, doc):
+        # (start, end, key) for token windows with a plausible token count and length
+        words = [token.lower_ for token in doc]
+        spaces = [token.is_space for token in doc]
+        max_n = max(self.lengths, default=0)
+        for start in range(len(doc)):
+            if spaces[start]: continue
+            key, misses = "", 0
+            for end in range(start + 1, min(start + max_n, len(doc)) + 1):
+                if spaces[end - 1]: break
+                n = end - start
+                key = words[end - 1] if n == 1 else key + " " + words[end - 1]
+                misses += (n - 1, words[end - 1]) not in self.slots
+                if n > 1 and misses > 2 * self.max_edits: break
+                if len(key) in self.lengths.get(n, ()):
+                    yield start, end, key
+
+    def matches(self, doc):
+        # [(start, end, entry, distance)], the closest entry per window (first added on ties)
+        if not self.entries: return []
+        found, queries, owners = {}, [], []
+        windows = list(self.windows(doc))
+        for w, (start, end, key) in enumerate(windows):
+            if key in self.exact:
+                found[w] = (0, self.exact[key])
+                continue
+            if not self.maybe_close(key): continue
+            for variant in deletions(key, self.query_edits(key)):
+                queries.append(hash_string(variant))
+                owners.append(w)
+        if queries:
+            hashes, ids = self.index
+            # sorted, unique queries keep searchsorted cache-friendly
+            queries, inverse = numpy.unique(numpy.asarray(queries, dtype="uint64"), return_inverse=True)
+            left = numpy.searchsorted(hashes, queries, side="left")
+            right = numpy.searchsorted(hashes, queries, side="right")
+            hits = right > left
+            for q in numpy.flatnonzero(hits[inverse]).tolist():
+                w, u = owners[q], inverse[q]
+                key = windows[w][2]
+                for i in set(ids[left[u]:right[u]].tolist()):
+                    limit = self.edits(self.keys[i])
+                    distance = edit_distance(key, self.keys[i], limit)
+                    if distance <= limit and (w not in found or (distance, i) < found[w]):
+                        found[w] = (distance, i)
+        return [(windows[w][0], windows[w][1], self.entries[i], distance)
+                for w, (distance, i) in sorted(found.items())]
+
+    def __call__(self, doc):
+        matches = self.matches(doc)
+        if matches:
+            spans = [Span(doc, start, end, label=self.label, kb_id=entry) for start, end, entry, _ in matches]
+            set_entities(doc, spans, policy=self.policy, costs=[distance for _, _, _, distance in matches])
+        return doc
+
+    def pipe(self, docs, batch_size=128):
+        for doc in docs:
+            yield self(doc)
+
+    def to_disk(self, path, exclude=tuple()):
+        os.makedirs(path, exist_ok=True)
+        cfg = {"label": self.label, "max_edits": self.max_edits, "min_chars": self.min_chars, "policy": self.policy}
+        srsly.write_json(os.path.join(path, "cfg.json"), cfg)
+        srsly.write_msgpack(os.path.join(path, "entries.msgpack"), {"entries": self.entries, "keys": self.keys})
+        hashes, ids = self.index
+        numpy.save(os.path.join(path, "hashes.npy"), hashes)
+        numpy.save(os.path.join(path, "ids.npy"), ids)
+
+    def from_disk(self, path, exclude=tuple()):
+        # The index is memory-mapped, not rebuilt
+        cfg = srsly.read_json(os.path.join(path, "cfg.json"))
+        self.label, self.policy = cfg["label"], cfg["policy"]
+        self.max_edits, self.min_chars = cfg["max_edits"], cfg["min_chars"]
+        self.entries, self.keys, self.exact, self.lengths = [], [], {}, {}
+        self.slots, self.pieces = set(), set()
+        data = srsly.read_msgpack(os.path.join(path, "entries.msgpack"))
+        for phrase, key in zip(data["entries"], data["keys"]):
+            self.add_key(phrase, key)
+        self._index = (numpy.load(os.path.join(path, "hashes.npy"), mmap_mode="r"),
+                       numpy.load(os.path.join(path, "ids.npy"), mmap_mode="r"))
+        return self
@@ -0,0 +1,107 @@
+# Gazetteer entity component
+    # Builds PhraseMatcher patterns on the tokenizer-only path (nlp.tokenizer.pipe)
+    #   instead of running every entry through the full pipeline, supports
+    #   case-insensitive matching (attr="LOWER") and adds the matches to doc.ents
+    #   with the overlap policies from pspacy.ents.
+    # to_disk() stores the tokenized entries as a DocBin, so loading skips the
+    #   tokenizer; the PhraseMatcher itself is only built on the first call.
+    # Usage:
+    #   gazetteer = nlp.add_pipe("gazetteer", config={"label": "GPE", "attr": "LOWER"})
+    #   gazetteer.add_phrases(COUNTRIES)
+################################################################################
+import itertools
+import os
+
+import srsly
+from spacy.language import Language
+from spacy.matcher import PhraseMatcher
+from spacy.tokens import DocBin, Span
+
+from .ents import POLICIES, set_entities
+
+PHRASE_BATCH = 10_000
+
+
+@Language.factory(
+    "gazetteer",
+    default_config={"label": "ENTITY", "attr": "ORTH", "policy": "keep-existing"},
+)
+def make_gazetteer(nlp, name, label, attr, policy):
+    return Gazetteer(nlp, name, label=label, attr=attr, policy=policy)
+
+
+class Gazetteer:
+    def __init__(self, nlp, name="gazetteer", label="ENTITY", attr="ORTH", policy="keep-existing"):
+        if attr not in ("ORTH", "LOWER", "NORM"):
+            raise ValueError(f"Gazetteer attr must be ORTH, LOWER or NORM, not {attr!r}")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overlap policy {policy!r}, expected one of {POLICIES}")
+        self.name, self.label, self.attr, self.policy = name, label, attr, policy
+        self.vocab, self.tokenizer = nlp.vocab, nlp.tokenizer
+        self.phrases = DocBin(attrs=["ORTH"]) # tokenized entries, what gets saved
+        self.pending_path = None # patterns on disk that haven't been read yet
+        self._matcher = None
+
+    def __len__(self):
+        self.load_pending()
+        return len(self.phrases)
+
+    @property
+    def matcher(self):
+        if self._matcher is None:
+            self.load_pending()
+            self._matcher = PhraseMatcher(self.vocab, attr=self.attr)
+            self.add_to_matcher(self.phrases.get_docs(self.vocab))
+        return self._matcher
+
+    def add_to_matcher(self, docs):
+        # The PhraseMatcher only keeps token hashes, so feed it batch by batch
+        docs = iter(docs)
+        while True:
+            batch = list(itertools.islice(docs, PHRASE_BATCH))
+            if not batch: break
+            self._matcher.add(self.label, batch)
+
+    def add_phrases(self, phrases, batch_size=1000):
+        # Tokenize entries with the tokenizer only; no tagger/parser/ner involved
+        self.load_pending()
+        docs = self.store(self.tokenizer.pipe(phrases, batch_size=batch_size))
+        if self._matcher is not None:
+            self.add_to_matcher(docs)
+        else:
+            for _ in docs: pass
+        return self
+
+    def store(self, docs):
+        for doc in docs:
+            self.phrases.add(doc)
+            yield doc
+
+    def __call__(self, doc):
+        spans = [Span(doc, start, end, label=self.label) for _, start, end in self.matcher(doc)]
+        if spans:
+            set_entities(doc, spans, policy=self.policy)
+        return doc
+
+    def pipe(self, docs, batch_size=128):
+        for doc in docs:
+            yield self(doc)
+
+    def load_pending(self):
+        if self.pending_path is not None:
+            path, self.pending_path = self.pending_path, None
+            self.phrases = DocBin(attrs=["ORTH"]).from_disk(path)
+
+    def to_disk(self, path, exclude=tuple()):
+        self.load_pending()
+        os.makedirs(path, exist_ok=True)
+        srsly.write_json(os.path.join(path, "cfg.json"), {"label": self.label, "attr": self.attr, "policy": self.policy})
+        self.phrases.to_disk(os.path.join(path, "phrases.spacy"))
+
+    def from_disk(self, path, exclude=tuple()):
+        # Only the settings are read here; entries are read on first use
+        cfg = srsly.read_json(os.path.join(path, "cfg.json"))
+        self.label, self.attr, self.policy = cfg["label"], cfg["attr"], cfg["policy"]
+        self.pending_path = os.path.join(path, "phrases.spacy")
+        self._matcher = None
+        return self
@@ -0,0 +1,213 @@
+# Per-component timing
+    # instrument(nlp) wraps every component in nlp.pipeline in a timer, without
+    #   touching the components themselves, and records wall time per Doc and,
+    #   for components with .pipe(), per batch. Time spent upstream (pulling Docs
+    #   out of earlier components) is subtracted, so each stage only counts itself.
+    # spaCy has no public way to put a wrapper into the component list, so nlp
+    #   gets a subclass of its own class whose nlp.pipeline hands out the
+    #   wrappers (remove() restores the class). get_pipe(), to_disk() and the
+    #   config still see the real components.
+    # sample_rate < 1 times only that fraction of nlp() calls and of the batches
+    #   of nlp.pipe(), so a long-lived stream is sampled too; the rest go straight
+    #   to the component, so it can stay on in production.
+    # Times are kept in log-scale histograms (export: report(), to_prometheus()).
+    # Timings are recorded in this process only, not inside nlp.pipe(n_process>1) workers.
+################################################################################
+import math
+import random
+import time
+
+BUCKETS = [1e-6 * 2**i for i in range(25)] # 1us .. ~16s
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.n, self.total, self.max = 0, 0.0, 0.0
+
+    def add(self, seconds, weight=1):
+        i = 0 if seconds <= BUCKETS[0] else min(len(BUCKETS), math.ceil(math.log2(seconds / BUCKETS[0])))
+        self.counts[i] += weight
+        self.n += weight
+        self.total += seconds * weight
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-quantile
+        if not self.n: return 0.0
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= q * self.n:
+                return BUCKETS[i] if i < len(BUCKETS) else self.max
+        return self.max
+
+    def summary(self):
+        return {"count": self.n, "total_s": self.total, "mean_ms": self.total / max(self.n, 1) * 1000,
+                "p50_ms": self.quantile(0.5) * 1000, "p99_ms": self.quantile(0.99) * 1000,
+                "max_ms": self.max * 1000}
+
+
+class UpstreamTimer:
+    # Iterator over the upstream Docs that counts how long pulling them took
+    #   (only while active, i.e. for sampled batches)
+    def __init__(self, docs):
+        self.docs, self.seconds, self.pulled, self.active = iter(docs), 0.0, 0, False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.active:
+            doc = next(self.docs)
+            self.pulled += 1
+            return doc
+        start = time.perf_counter()
+        try:
+            doc = next(self.docs)
+        finally:
+            self.seconds += time.perf_counter() - start
+        self.pulled += 1
+        return doc
+
+
+class TimedComponent:
+    def __init__(self, name, proc, timer):
+        self.name, self.proc, self.timer = name, proc, timer
+
+    def __getattr__(self, attr):
+        # everything else (model, cfg, to_disk, listening_components, ...) is the component's
+        return getattr(self.proc, attr)
+
+    def __call__(self, doc, **kwargs):
+        if not self.timer.sampled():
+            return self.proc(doc, **kwargs)
+        start = time.perf_counter()
+        doc = self.proc(doc, **kwargs)
+        self.timer.record(self.name, "doc", time.perf_counter() - start)
+        return doc
+
+    def pipe(self, docs, **kwargs):
+        if not hasattr(self.proc, "pipe"):
+            kwargs.pop("batch_size", None)
+            for doc in docs:
+                yield self(doc, **kwargs)
+            return
+        upstream = UpstreamTimer(docs)
+        inner = self.proc.pipe(upstream, **kwargs)
+        while True:
+            # a next() that pulls Docs processes a whole batch: sampled per call
+            upstream.active = sampled = self.timer.sampled()
+            start, upstream_before, pulled_before = time.perf_counter(), upstream.seconds, upstream.pulled
+            try:
+                doc = next(inner)
+            except StopIteration:
+                return
+            own = time.perf_counter() - start - (upstream.seconds - upstream_before)
+            pulled = upstream.pulled - pulled_before
+            if pulled and sampled:
+                # this next() processed a whole batch of `pulled` Docs
+                self.timer.record(self.name, "batch", own)
+                self.timer.record(self.name, "doc", own / pulled, weight=pulled)
+            yield doc
+
+
+TIMED_CLASSES = {} # Language subclass -> its timed subclass
+
+
+def timed_class(cls):
+    if cls not in TIMED_CLASSES:
+        class Timed(cls):
+            @property
+            def pipeline(self):
+                return [(name, self.pspacy_timer.wrap(name, proc)) for name, proc in super().pipeline]
+
+        Timed.__name__ = Timed.__qualname__ = f"Timed{cls.__name__}"
+        TIMED_CLASSES[cls] = Timed
+    return TIMED_CLASSES[cls]
+
+
+class PipelineTimer:
+    def __init__(self, nlp, sample_rate=1.0, seed=None):
+        self.nlp, self.sample_rate = nlp, sample_rate
+        self.random = random.Random(seed)
+        self.histograms = {} # (component, "doc" / "batch") -> Histogram
+        self.wrappers = {} # component name -> TimedComponent
+        self.base_class = None
+
+    def sampled(self):
+        return self.sample_rate >= 1.0 or self.random.random() < self.sample_rate
+
+    def record(self, name, kind, seconds, weight=1):
+        hist = self.histograms.get((name, kind))
+        if hist is None:
+            hist = self.histograms[(name, kind)] = Histogram()
+        hist.add(seconds, weight)
+
+    def wrap(self, name, proc):
+        # One wrapper per component, made again if the component is replaced
+        wrapper = self.wrappers.get(name)
+        if wrapper is None or wrapper.proc is not proc:
+            wrapper = self.wrappers[name] = TimedComponent(name, proc, self)
+        return wrapper
+
+    def install(self):
+        # Names, order, configs and nlp.get_pipe() stay the same
+        installed = getattr(self.nlp, "pspacy_timer", None)
+        if installed is self: return self
+        if installed is not None:
+            raise ValueError("this pipeline is already instrumented, remove() the other timer first")
+        self.base_class = type(self.nlp)
+        self.nlp.pspacy_timer = self
+        self.nlp.__class__ = timed_class(self.base_class)
+        return self
+
+    def remove(self):
+        if self.base_class is not None:
+            self.nlp.__class__ = self.base_class
+            self.nlp.pspacy_timer = self.base_class = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.remove()
+
+    def reset(self):
+        self.histograms.clear()
+
+    def report(self):
+        # {component: {"doc": summary, "batch": summary}} in pipeline order
+        rows = {}
+        for name in self.nlp.component_names:
+            for kind in ("doc", "batch"):
+                hist = self.histograms.get((name, kind))
+                if hist is not None:
+                    rows.setdefault(name, {})[kind] = hist.summary()
+        return rows
+
+    def print_report(self):
+        print(f"{'component':<22}{'docs':>8}{'total s':>10}{'doc p50 ms':>12}{'doc p99 ms':>12}{'batch p99 ms':>14}")
+        for name, kinds in self.report().items():
+            doc, batch = kinds.get("doc", {}), kinds.get("batch", {})
+            print(f"{name:<22}{doc.get('count', 0):>8}{doc.get('total_s', 0):>10.4f}"
+                  f"{doc.get('p50_ms', 0):>12.3f}{doc.get('p99_ms', 0):>12.3f}{batch.get('p99_ms', 0):>14.3f}")
+
+    def to_prometheus(self, metric="spacy_component_seconds"):
+        # Histograms in the Prometheus text exposition format
+        lines = [f"# TYPE {metric} histogram"]
+        for (name, kind), hist in sorted(self.histograms.items()):
+            labels = f'component="{name}",unit="{kind}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS, hist.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{labels},le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {hist.n}')
+            lines.append(f"{metric}_sum{{{labels}}} {hist.total:.9f}")
+            lines.append(f"{metric}_count{{{labels}}} {hist.n}")
+        return "\n".join(lines) + "\n"
+
+
+def instrument(nlp, sample_rate=1.0, seed=None):
+    # timer = instrument(nlp); ...; timer.print_report(); timer.remove()
+    return PipelineTimer(nlp, sample_rate=sample_rate, seed=seed).install()
@@ -0,0 +1,213 @@
+# Knowledge base of span attributes in memory-mapped files
+    # Chapter 3 looks span texts up in CAPITALS, a dict read from capitals.json:
+    #   every worker holds the whole table in its heap, which doesn't work for
+    #   tables with tens of millions of entries.
+    # build_kb() / build_kb_from_json() write a directory with the 64-bit hashes
+    #   of the normalized texts (casefolded, whitespace collapsed), sorted, and one
+    #   UTF-8 column per field (offsets + bytes), all .npy files. KnowledgeBase
+    #   memory-maps them, so processes share the pages and opening is instant.
+    # Lookups hash the texts and run one searchsorted over the keys for a whole
+    #   batch. Texts aren't stored: a text that isn't in the table matches another
+    #   entry only on a 64-bit hash collision (collisions between entries are
+    #   rejected when building).
+    # The "kb_attributes" component looks up the doc.ents of a batch of Docs at
+    #   once and registers one Span extension per field; spans that weren't looked
+    #   up in the batch (not in doc.ents, added later) are looked up one by one.
+    # Usage:
+    #   build_kb_from_json("capitals.json", "capitals_kb", field="capital")
+    #   nlp.add_pipe("kb_attributes", config={"path": "capitals_kb"})
+    #   [ent._.capital for ent in doc.ents]
+################################################################################
+import json
+import os
+import shutil
+
+import numpy
+from spacy.language import Language
+from spacy.strings import hash_string
+from spacy.tokens import Span
+from spacy.util import minibatch
+
+KEY = "pspacy.kb" # doc.user_data[(KEY, component name)] = {"start:end": row}
+NOT_FOUND = -1
+
+
+def normalize(text, lowercase=True):
+    text = " ".join(text.split())
+    return text.casefold() if lowercase else text
+
+
+def build_kb(records, path, fields=None, lowercase=True):
+    # records: {text: value} or (text, value) pairs. value is a string or None
+    #   (one field, "value") or a dict of them. Texts normalizing to the same key:
+    #   the last one wins. fields: the columns to write, default all seen.
+    items = records.items() if hasattr(records, "items") else records
+    table = {} # hash -> (normalized text, record)
+    seen = {}
+    for text, record in items:
+        if not isinstance(record, dict): record = {"value": record}
+        norm = normalize(text, lowercase)
+        key = hash_string(norm)
+        if key in table and table[key][0] != norm:
+            raise ValueError(f"hash collision between {table[key][0]!r} and {norm!r}")
+        table[key] = (norm, record)
+        seen.update(dict.fromkeys(record))
+    fields = list(seen) if fields is None else list(fields)
+    keys = numpy.fromiter(table.keys(), dtype="uint64", count=len(table))
+    order = numpy.argsort(keys)
+    records = list(table.values())
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    numpy.save(os.path.join(tmp_path, "keys.npy"), keys[order])
+    for i, field in enumerate(fields):
+        values = [records[j][1].get(field) for j in order.tolist()]
+        if any(value is not None and not isinstance(value, str) for value in values):
+            raise ValueError(f"field {field!r} must hold strings or None")
+        encoded = [value.encode("utf8") if value is not None else b"" for value in values]
+        offsets = numpy.zeros(len(encoded) + 1, dtype="uint64")
+        offsets[1:] = numpy.cumsum([len(data) for data in encoded])
+        numpy.save(os.path.join(tmp_path, f"{i}.offsets.npy"), offsets)
+        numpy.save(os.path.join(tmp_path, f"{i}.data.npy"), numpy.frombuffer(b"".join(encoded), dtype="uint8"))
+        numpy.save(os.path.join(tmp_path, f"{i}.nulls.npy"), numpy.asarray([value is None for value in values]))
+    with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf8") as f:
+        f.write(json.dumps({"fields": fields, "lowercase": lowercase, "entries": len(keys)}))
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_records(path, text_key="text"):
+    # .json: {text: value or {field: value}}; .jsonl: one {text_key: ..., field: ...} per line
+    with open(path, encoding="utf8") as f:
+        if not path.endswith(".jsonl"):
+            yield from json.loads(f.read()).items()
+            return
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record.pop(text_key), record
+
+
+def build_kb_from_json(json_path, path, field=None, text_key="text", **kwargs):
+    # field names the column of a {text: string} file (default "value")
+    records = read_records(json_path, text_key)
+    if field is not None:
+        records = ((text, value if isinstance(value, dict) else {field: value}) for text, value in records)
+    return build_kb(records, path, **kwargs)
+
+
+class KnowledgeBase:
+    # Read-only, memory-mapped view of a directory written by build_kb()
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json"), encoding="utf8") as f: meta = json.loads(f.read())
+        self.path, self.fields, self.lowercase = path, meta["fields"], meta["lowercase"]
+        # plain ndarray views of the maps: indexing a numpy.memmap is slow
+        load = lambda name: numpy.load(os.path.join(path, name), mmap_mode="r").view(numpy.ndarray)
+        self.keys = load("keys.npy")
+        self.columns = {field: (load(f"{i}.offsets.npy"), load(f"{i}.data.npy"), load(f"{i}.nulls.npy"))
+                        for i, field in enumerate(self.fields)}
+
+    def __reduce__(self):
+        # workers re-open the files instead of receiving a copy of the arrays
+        return KnowledgeBase, (self.path,)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, text):
+        return self.rows([text])[0] != NOT_FOUND
+
+    def field(self, field=None):
+        if field is None:
+            if len(self.fields) != 1:
+                raise ValueError(f"the knowledge base has fields {self.fields}, pass field=")
+            return self.fields[0]
+        if field not in self.columns:
+            raise KeyError(f"no field {field!r}, expected one of {self.fields}")
+        return field
+
+    def rows(self, texts):
+        # Row of each text, NOT_FOUND for missing ones
+        hashes = numpy.asarray([hash_string(normalize(text, self.lowercase)) for text in texts], dtype="uint64")
+        if not len(self.keys): return numpy.full(len(hashes), NOT_FOUND, dtype="int64")
+        rows = numpy.minimum(numpy.searchsorted(self.keys, hashes), len(self.keys) - 1).astype("int64")
+        rows[self.keys[rows] != hashes] = NOT_FOUND
+        return rows
+
+    def values(self, rows, field=None, default=None):
+        offsets, data, nulls = self.columns[self.field(field)]
+        rows = numpy.asarray(rows, dtype="int64")
+        found = rows != NOT_FOUND
+        found[found] = ~nulls[rows[found]]
+        hits = rows[found]
+        starts, ends = offsets[hits].tolist(), offsets[hits + 1].tolist()
+        data = memoryview(data)
+        decoded = iter([bytes(data[start:end]).decode("utf8") for start, end in zip(starts, ends)])
+        return [next(decoded) if hit else default for hit in found.tolist()]
+
+    def value(self, row, field=None, default=None):
+        # One row, without the array round trip of values()
+        offsets, data, nulls = self.columns[self.field(field)]
+        if row == NOT_FOUND or nulls[row]: return default
+        return bytes(data[offsets[row]:offsets[row + 1]]).decode("utf8")
+
+    def lookup(self, texts, field=None, default=None):
+        return self.values(self.rows(texts), field, default)
+
+    def get(self, text, field=None, default=None):
+        return self.lookup([text], field, default)[0]
+
+    def record(self, text):
+        # {field: value} or None
+        row = self.rows([text])[0]
+        if row == NOT_FOUND: return None
+        return {field: self.values([row], field)[0] for field in self.fields}
+
+    @property
+    def nbytes(self):
+        arrays = [self.keys] + [array for column in self.columns.values() for array in column]
+        return sum(array.nbytes for array in arrays)
+
+
+def lookup_spans(kb, spans, field=None, default=None):
+    return kb.lookup([span.text for span in spans], field, default)
+
+
+@Language.factory(
+    "kb_attributes",
+    default_config={"path": "", "fields": None, "labels": [], "prefix": "", "default": None},
+)
+def make_kb_attributes(nlp, name, path, fields, labels, prefix, default):
+    return KBAttributes(KnowledgeBase(path), name, fields=fields, labels=labels, prefix=prefix, default=default)
+
+
+class KBAttributes:
+    # Span._.{prefix}{field} for every field, backed by one batch lookup per batch of Docs
+    def __init__(self, kb, name="kb_attributes", fields=None, labels=(), prefix="", default=None):
+        self.kb, self.name, self.labels, self.default = kb, name, set(labels), default
+        self.fields = list(kb.fields if fields is None else fields)
+        for field in self.fields:
+            kb.field(field)
+            Span.set_extension(prefix + field, getter=self.getter(field), force=True)
+
+    def getter(self, field):
+        def get(span):
+            rows = span.doc.user_data.get((KEY, self.name))
+            row = rows.get(f"{span.start}:{span.end}") if rows else None
+            if row is None: row = int(self.kb.rows([span.text])[0])
+            return self.kb.value(row, field, self.default)
+        return get
+
+    def __call__(self, doc):
+        return next(self.pipe([doc]))
+
+    def pipe(self, docs, batch_size=128):
+        # One searchsorted for the ents of a whole batch of Docs
+        for batch in minibatch(docs, batch_size):
+            spans = [[ent for ent in doc.ents if not self.labels or ent.label_ in self.labels] for doc in batch]
+            rows = iter(self.kb.rows([span.text for doc_spans in spans for span in doc_spans]).tolist())
+            for doc, doc_spans in zip(batch, spans):
+                # str keys: Doc.to_bytes (nlp.pipe with n_process > 1, DocBin) can't restore tuple keys
+                doc.user_data[(KEY, self.name)] = {f"{span.start}:{span.end}": next(rows) for span in doc_spans}
+                yield doc
@@ -0,0 +1,58 @@
+# Long documents in parallel chunks
+    # nlp(text) on a book or a log file runs on one core and holds every
+    #   intermediate array of the whole text at once.
+    # split_text() cuts the text into chunks of at most max_chars, preferring the
+    #   end of a paragraph, then of a sentence, then any whitespace. A cut is always
+    #   placed after a complete whitespace run, so the chunks tokenize exactly like
+    #   the full text: if the only run in reach crosses max_chars, the chunk
+    #   grows to its end. Only text without any whitespace is cut hard.
+    # process_long() runs the chunks through nlp.pipe (n_process=N), then joins them
+    #   with Doc.from_docs(ensure_whitespace=False). The result has the same text,
+    #   tokens and character offsets, and rule-based matches come out the same.
+    #   Entities can't cross a chunk boundary. A model may also tag a few tokens
+    #   next to a boundary differently, because it sees less context there.
+    # With n_process > 1 on Windows/macOS (spawn), call it under
+    #   if __name__ == "__main__":
+################################################################################
+import re
+
+from spacy.tokens import Doc
+
+PARAGRAPH = re.compile(r"\n[^\S\n]*\n\s*")
+SENTENCE = re.compile(r"[.!?]+[\"')\]]*\s+")
+WHITESPACE = re.compile(r"\s+")
+
+
+def cut_point(text, start, limit):
+    # Offset to cut text[start:] at, no later than limit
+    window = text[start:limit]
+    whole_run = limit >= len(text) or not text[limit].isspace()
+    for pattern, min_share in ((PARAGRAPH, 0.5), (SENTENCE, 0.5), (WHITESPACE, 0.0)):
+        ends = [m.end() for m in pattern.finditer(window) if m.end() < len(window) or whole_run]
+        if ends and ends[-1] > min_share * len(window):
+            return start + ends[-1]
+    if limit < len(text) and text[limit].isspace():
+        # the only whitespace runs past limit: cut after all of it
+        return WHITESPACE.match(text, limit).end()
+    return limit # no whitespace at all: a hard cut, tokens may differ here
+
+
+def split_text(text, max_chars=100_000):
+    # (start, end) character offsets of the chunks, covering the whole text
+    bounds, start = [], 0
+    while len(text) - start > max_chars:
+        end = cut_point(text, start, start + max_chars)
+        bounds.append((start, end))
+        start = end
+    if start < len(text) or not bounds:
+        bounds.append((start, len(text)))
+    return bounds
+
+
+def process_long(nlp, text, max_chars=100_000, n_process=1, batch_size=1, **kwargs):
+    # One Doc for the whole text; kwargs go to nlp.pipe (e.g. disable=)
+    chunks = [text[start:end] for start, end in split_text(text, max_chars)]
+    if len(chunks) == 1:
+        return nlp(text)
+    docs = list(nlp.pipe(chunks, n_process=n_process, batch_size=batch_size, **kwargs))
+    return Doc.from_docs(docs, ensure_whitespace=False)
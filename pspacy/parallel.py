@@ -0,0 +1,144 @@
+# Parallel (text, context) processing that keeps contexts and extension values
+    # nlp.pipe(as_tuples=True, n_process=N) sends every Doc back with doc.to_bytes():
+    #   all token attributes and one msgpack'd (key, value) pair per extension value
+    #   in doc.user_data.
+    # pipe_tuples() sends a chunk back as one DocBin (only `attrs`, no user_data)
+    #   and the extension values as columns: for each extension name, the doc
+    #   index, char offsets and values (NumPy arrays when all values are bool, int
+    #   or float). Contexts stay in the parent and are paired with their Docs in
+    #   input order.
+    # on_doc(doc, context) runs in the worker, e.g. to set doc._.author from the
+    #   context. Components, extensions and on_doc must exist in the workers: define
+    #   them at module level and, on Windows/macOS (spawn), call pipe_tuples() under
+    #   if __name__ == "__main__":
+################################################################################
+import collections
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy
+import srsly
+from spacy.tokens import DocBin
+
+WORKER = {} # per-process nlp and on_doc
+NO_OFFSET = -1 # Doc extensions have no start/end, Token extensions no end
+
+
+def init_worker(nlp, on_doc, disable):
+    if isinstance(nlp, str):
+        from .registry import get_nlp
+        nlp = get_nlp(nlp, disable=disable)
+    WORKER.update(nlp=nlp, on_doc=on_doc)
+
+
+def value_column(values):
+    # bool/int/float values as one NumPy array, anything else as a list
+    kinds = {type(value) for value in values}
+    for kind, dtype in ((bool, "bool"), (int, "int64"), (float, "float64")):
+        if kinds == {kind}:
+            try:
+                return numpy.asarray(values, dtype=dtype)
+            except OverflowError:
+                break
+    return list(values)
+
+
+def pack_user_data(docs):
+    # "._." entries of doc.user_data -> {name: columns}; other keys as rows
+    columns = collections.defaultdict(lambda: ([], [], [], []))
+    other = []
+    for i, doc in enumerate(docs):
+        for key, value in doc.user_data.items():
+            if isinstance(key, tuple) and len(key) == 4 and key[0] == "._.":
+                doc_ids, starts, ends, values = columns[key[1]]
+                doc_ids.append(i)
+                starts.append(NO_OFFSET if key[2] is None else key[2])
+                ends.append(NO_OFFSET if key[3] is None else key[3])
+                values.append(value)
+            else:
+                other.append((i, key, value))
+    packed = {
+        name: {"doc": numpy.asarray(doc_ids, dtype="int32"), "start": numpy.asarray(starts, dtype="int32"),
+               "end": numpy.asarray(ends, dtype="int32"), "values": value_column(values)}
+        for name, (doc_ids, starts, ends, values) in columns.items()
+    }
+    return srsly.msgpack_dumps({"extensions": packed, "other": other})
+
+
+def unpack_user_data(docs, data):
+    data = srsly.msgpack_loads(data, use_list=False)
+    for name, column in data["extensions"].items():
+        values = column["values"]
+        values = values.tolist() if isinstance(values, numpy.ndarray) else values
+        for i, start, end, value in zip(column["doc"].tolist(), column["start"].tolist(), column["end"].tolist(), values):
+            start = None if start == NO_OFFSET else start
+            end = None if end == NO_OFFSET else end
+            docs[i].user_data[("._.", name, start, end)] = value
+    for i, key, value in data["other"]:
+        docs[i].user_data[key] = value
+    return docs
+
+
+def encode_chunk(docs, attrs=None):
+    # (DocBin bytes, packed user_data) for a list of Docs
+    doc_bin = DocBin(attrs=attrs) if attrs else DocBin()
+    for doc in docs: doc_bin.add(doc)
+    return doc_bin.to_bytes(), pack_user_data(docs)
+
+
+def decode_chunk(vocab, data, attrs=None):
+    doc_bytes, user_data = data
+    doc_bin = DocBin(attrs=attrs) if attrs else DocBin()
+    docs = list(doc_bin.from_bytes(doc_bytes).get_docs(vocab))
+    return unpack_user_data(docs, user_data)
+
+
+def process_chunk(texts, contexts, batch_size, attrs):
+    nlp, on_doc = WORKER["nlp"], WORKER["on_doc"]
+    docs = []
+    for doc, context in nlp.pipe(zip(texts, contexts), as_tuples=True, batch_size=batch_size):
+        if on_doc is not None: on_doc(doc, context)
+        docs.append(doc)
+    return encode_chunk(docs, attrs)
+
+
+def chunks(data, size):
+    data = iter(data)
+    while True:
+        chunk = list(itertools.islice(data, size))
+        if not chunk: return
+        yield [text for text, _ in chunk], [context for _, context in chunk]
+
+
+def pipe_tuples(data, nlp="en_core_web_sm", n_process=1, chunk_size=256, batch_size=64,
+                attrs=None, on_doc=None, disable=()):
+    # data: iterable of (text, context); yields (doc, context) in input order.
+    # nlp: model name (loaded in each worker via get_nlp) or a Language object.
+    # attrs: token attributes sent back (DocBin default: everything the pipeline sets)
+    if n_process == 1:
+        init_worker(nlp, on_doc, disable)
+        nlp = WORKER["nlp"]
+        for doc, context in nlp.pipe(data, as_tuples=True, batch_size=batch_size):
+            if on_doc is not None: on_doc(doc, context)
+            yield doc, context
+        return
+    if isinstance(nlp, str):
+        from .registry import get_nlp
+        vocab = get_nlp(nlp, disable=disable).vocab
+    else:
+        vocab = nlp.vocab
+    # contexts only go to the workers when on_doc needs them
+    with ProcessPoolExecutor(n_process, initializer=init_worker, initargs=(nlp, on_doc, disable)) as pool:
+        pending = collections.deque()
+
+        def collect():
+            future, contexts = pending.popleft()
+            return zip(decode_chunk(vocab, future.result(), attrs), contexts)
+
+        for texts, contexts in chunks(data, chunk_size):
+            sent = contexts if on_doc is not None else [None] * len(texts)
+            pending.append((pool.submit(process_chunk, texts, sent, batch_size, attrs), contexts))
+            if len(pending) >= 2 * n_process:
+                yield from collect()
+        while pending:
+            yield from collect()
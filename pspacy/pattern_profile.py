@@ -0,0 +1,223 @@
+# Cost profile of Matcher / PhraseMatcher patterns, per match key
+    # A Matcher with thousands of rules is one black box: it doesn't say which
+    #   keys cost the time, which never match and which keep many partial
+    #   matches alive. PatternProfiler records, per key:
+    #   - matches: counted on every Doc, from the real matcher's output
+    #   - states: partial matches, i.e. matches of each pattern's proper prefixes
+    #     (first 1..n-1 token specs; for phrases, first 1..n-1 tokens), from one
+    #     run of a matcher holding all prefixes on each sampled Doc
+    #   - evaluations: first token spec tested at every token, plus one test per
+    #     partial state (the Matcher's own counters aren't exposed)
+    #   - ms per 1k tokens: a matcher holding only that key's patterns, timed
+    #     minus a matcher holding one pattern that never matches (the per-call
+    #     and per-token costs every key pays), so keys add up to the real one. Sampled Docs are joined into
+    #     one Doc of about batch_tokens (single calls take microseconds, too
+    #     short to time), and each joined Doc times the next keys_per_batch keys
+    #     in turn, so the sampled cost doesn't grow with the number of keys.
+    # Wrap a live matcher with profile_matcher(): every call goes to the real
+    #   matcher and only sample_rate of them are profiled, so the overhead is
+    #   about sample_rate x (2-3 matcher runs).
+    # PhraseMatcher keeps no copy of its patterns: pass them as rules=.
+    # Usage:
+    #   matcher = profile_matcher(matcher, sample_rate=0.01)
+    #   ...; matcher.profiler.print_report()
+################################################################################
+import itertools
+import random
+import time
+
+from spacy.matcher import Matcher, PhraseMatcher
+from spacy.tokens import Doc, Span
+
+FIELDS = ("evaluations", "states", "seconds", "timed_tokens")
+BASELINE = "pspacy.pattern_profile.baseline" # a token no text has
+
+
+def is_optional(spec):
+    return spec.get("OP") in ("?", "*")
+
+
+class PatternProfiler:
+    def __init__(self, vocab, rules, phrases=False, attr="ORTH", greedy=None, sample_rate=1.0, batch_tokens=1000,
+                 keys_per_batch=200, seed=None):
+        # rules: {key: [token pattern, ...]} or, with phrases=True, {key: [Doc, ...]};
+        #   keys_per_batch=None times every key on every joined Doc
+        self.vocab, self.phrases, self.attr = vocab, phrases, attr
+        self.sample_rate, self.random = sample_rate, random.Random(seed)
+        greedy = greedy or {}
+        self.names = {} # key hash -> key as given
+        self.n_patterns = {}
+        self.matchers = {} # key hash -> matcher with only that key's patterns
+        self.owners = {} # prefix matcher key -> key hash
+        self.prefixes = self.new_matcher()
+        self.baseline = self.new_matcher()
+        if phrases:
+            self.baseline.add(BASELINE, [Doc(vocab, words=[BASELINE])])
+        else:
+            self.baseline.add(BASELINE, [[{"ORTH": BASELINE}]])
+        self.all = self.new_matcher() # for profile(), which has no real matcher
+        for key, patterns in rules.items():
+            key_hash = key if isinstance(key, int) else vocab.strings.add(key)
+            self.names[key_hash] = key
+            self.n_patterns[key_hash] = len(patterns)
+            self.matchers[key_hash] = self.new_matcher()
+            if phrases:
+                self.matchers[key_hash].add(key, patterns)
+                self.all.add(key, patterns)
+                prefixes = [doc[:n].as_doc() for doc in patterns for n in range(1, len(doc))]
+                if prefixes:
+                    # one trie: patterns of a key share their partial states
+                    self.prefixes.add(key, prefixes)
+                    self.owners[key_hash] = key_hash
+                continue
+            self.matchers[key_hash].add(key, patterns, greedy=greedy.get(key))
+            self.all.add(key, patterns, greedy=greedy.get(key))
+            for pattern in patterns:
+                for n in range(1, len(pattern)):
+                    if all(is_optional(spec) for spec in pattern[:n]): continue
+                    # one id per pattern and prefix: the Matcher tracks each pattern's states separately
+                    prefix_id = len(self.owners) + 1
+                    self.prefixes.add(prefix_id, [pattern[:n]])
+                    self.owners[prefix_id] = key_hash
+        self.batch_tokens = batch_tokens
+        self.keys_per_batch = len(self.matchers) if keys_per_batch is None else min(keys_per_batch, len(self.matchers))
+        self.turns = itertools.cycle(list(self.matchers.items()))
+        self.reset()
+
+    @classmethod
+    def from_matcher(cls, matcher, **kwargs):
+        # Token Matcher only: its patterns are read back from the matcher
+        if isinstance(matcher, PhraseMatcher):
+            raise ValueError("a PhraseMatcher's patterns can't be read back, pass rules= to PatternProfiler")
+        rules = {key: matcher.get(key)[1] for key in matcher._patterns}
+        greedy = {key: matcher._filter.get(key) for key in rules}
+        return cls(matcher.vocab, rules, greedy=greedy, **kwargs)
+
+    def new_matcher(self):
+        return PhraseMatcher(self.vocab, attr=self.attr) if self.phrases else Matcher(self.vocab, validate=False)
+
+    def reset(self):
+        self.docs = self.tokens = self.sampled_docs = self.sampled_tokens = 0
+        self.pending, self.pending_tokens = [], 0 # sampled Docs waiting to be timed
+        self.matches = dict.fromkeys(self.names, 0)
+        self.stats = {key: dict.fromkeys(FIELDS, 0) for key in self.names}
+
+    def sampled(self):
+        return self.sample_rate >= 1.0 or self.random.random() < self.sample_rate
+
+    def observe(self, doclike, matches):
+        # Output of the real matcher for one Doc or Span; samples the profile
+        self.docs += 1
+        self.tokens += len(doclike)
+        for match in matches:
+            key = match.label if isinstance(match, Span) else match[0]
+            if key in self.matches: self.matches[key] += 1
+        if self.sampled():
+            self.profile_doc(doclike)
+
+    def profile_doc(self, doclike):
+        n_tokens = len(doclike)
+        states = dict.fromkeys(self.names, 0)
+        for prefix_id, _, _ in self.prefixes(doclike):
+            states[self.owners[prefix_id]] += 1
+        for key, stats in self.stats.items():
+            first = n_tokens if self.phrases else self.n_patterns[key] * n_tokens
+            stats["states"] += states[key]
+            stats["evaluations"] += first + states[key]
+        self.sampled_docs += 1
+        self.sampled_tokens += n_tokens
+        self.pending.append(doclike if isinstance(doclike, Doc) else doclike.as_doc())
+        self.pending_tokens += n_tokens
+        if self.pending_tokens >= self.batch_tokens:
+            self.time_keys()
+
+    def time_keys(self):
+        # Time the next keys_per_batch keys on the pending Docs, joined
+        if not self.pending: return
+        doc = Doc.from_docs(self.pending) if len(self.pending) > 1 else self.pending[0]
+        self.pending, self.pending_tokens = [], 0
+        start = time.perf_counter()
+        self.baseline(doc)
+        overhead = time.perf_counter() - start
+        for key, matcher in itertools.islice(self.turns, self.keys_per_batch):
+            start = time.perf_counter()
+            matcher(doc)
+            self.stats[key]["seconds"] += max(time.perf_counter() - start - overhead, 0.0)
+            self.stats[key]["timed_tokens"] += len(doc)
+
+    def profile(self, docs):
+        # Offline: profile every Doc of a sample corpus, without a real matcher
+        for doc in docs:
+            self.docs += 1
+            self.tokens += len(doc)
+            for key, _, _ in self.all(doc):
+                self.matches[key] += 1
+            self.profile_doc(doc)
+        self.time_keys()
+        return self
+
+    def report(self, sort="ms_per_1k_tokens"):
+        # One row per key, ranked by sort ("ms_per_1k_tokens", "states", "evaluations"
+        # or "matches"); time_share is the key's share of the summed ms_per_1k_tokens.
+        # Pending sampled Docs are timed first; keys not timed yet show 0 ms.
+        self.time_keys()
+        per_1k = 1000 / max(self.sampled_tokens, 1)
+        rows = []
+        for key, stats in self.stats.items():
+            name = self.names[key]
+            rows.append({
+                "key": name if isinstance(name, str) else self.vocab.strings[name],
+                "patterns": self.n_patterns[key], "matches": self.matches[key],
+                "evaluations": stats["evaluations"], "states": stats["states"],
+                "states_per_1k_tokens": stats["states"] * per_1k,
+                "ms_per_1k_tokens": stats["seconds"] * 1e6 / max(stats["timed_tokens"], 1),
+            })
+        total = sum(row["ms_per_1k_tokens"] for row in rows) or 1.0
+        for row in rows:
+            row["time_share"] = row["ms_per_1k_tokens"] / total
+        return sorted(rows, key=lambda row: row[sort], reverse=True)
+
+    def never_matched(self):
+        return [row["key"] for row in self.report("matches") if not row["matches"]]
+
+    def print_report(self, top=20, sort="ms_per_1k_tokens"):
+        rows = self.report(sort)
+        print(f"{self.docs} docs, {self.tokens} tokens, {self.sampled_docs} profiled ({self.sampled_tokens} tokens)")
+        print(f"{'key':<24}{'patterns':>9}{'matches':>9}{'states/1k':>11}{'evals':>11}{'ms/1k':>9}{'time':>7}")
+        for row in rows[:top]:
+            print(f"{row['key'][:23]:<24}{row['patterns']:>9}{row['matches']:>9}{row['states_per_1k_tokens']:>11.1f}"
+                  f"{row['evaluations']:>11}{row['ms_per_1k_tokens']:>9.3f}{row['time_share']:>7.1%}")
+        never = self.never_matched()
+        shown = ", ".join(never[:10]) + (", ..." if len(never) > 10 else "")
+        print(f"never matched: {len(never)} of {len(rows)} keys" + (f" ({shown})" if never else ""))
+
+
+class ProfiledMatcher:
+    # Calls go to the real matcher; the profiler sees the Docs and the matches
+    def __init__(self, matcher, profiler):
+        self.matcher, self.profiler = matcher, profiler
+
+    def __call__(self, doclike, **kwargs):
+        matches = self.matcher(doclike, **kwargs)
+        self.profiler.observe(doclike, matches)
+        return matches
+
+    def __getattr__(self, name):
+        return getattr(self.matcher, name)
+
+    def __len__(self):
+        return len(self.matcher)
+
+    def __contains__(self, key):
+        return key in self.matcher
+
+
+def profile_matcher(matcher, rules=None, attr="ORTH", sample_rate=0.01, **kwargs):
+    # rules/attr: the PhraseMatcher's patterns and attr (or a Matcher's rules, if
+    #   they should differ from what it holds); kwargs go to PatternProfiler
+    if rules is None:
+        profiler = PatternProfiler.from_matcher(matcher, sample_rate=sample_rate, **kwargs)
+    else:
+        phrases = isinstance(matcher, PhraseMatcher)
+        profiler = PatternProfiler(matcher.vocab, rules, phrases=phrases, attr=attr, sample_rate=sample_rate, **kwargs)
+    return ProfiledMatcher(matcher, profiler)
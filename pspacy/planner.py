@@ -0,0 +1,109 @@
+# Attribute-driven pipeline pruning
+    # Declare which attributes a job reads ("ents", "pos_", "lemma_", "dep_",
+    #   "vector", ...) and plan_pipeline() works out which components assign them,
+    #   following each component's declared requirements and tok2vec listeners.
+    #   Everything else can be disabled.
+    # Component metadata (Language.factory(assigns=..., requires=...)) is used where
+    #   it exists. Built-ins that don't declare it are filled in from FACTORY_META.
+    #   Custom components without metadata are kept unless keep_unknown=False.
+################################################################################
+import contextlib
+import time
+
+# attribute read by the job -> annotation keys ("token.pos") that must be set
+ATTR_NEEDS = {
+    "ents": ["doc.ents"], "ent_type_": ["token.ent_type"], "ent_iob_": ["token.ent_iob"],
+    "pos_": ["token.pos"], "tag_": ["token.tag"], "morph": ["token.morph"],
+    "lemma_": ["token.lemma"], "dep_": ["token.dep"], "head": ["token.head"],
+    "sents": ["token.is_sent_start"], "noun_chunks": ["token.dep", "token.pos"],
+    "tensor": ["doc.tensor"],
+    # static vectors come from the vocab, no component has to run
+    "vector": [], "vectors": [], "similarity": [], "text": [], "lower_": [], "like_num": [],
+}
+# built-in factories that don't declare (all of) their assigns/requires
+FACTORY_META = {
+    "attribute_ruler": {"assigns": ["token.pos", "token.morph", "token.lemma"], "requires": ["token.tag"]},
+    "lemmatizer": {"assigns": ["token.lemma"], "requires": ["token.pos"]},
+}
+
+
+def component_meta(nlp, name):
+    meta = nlp.get_pipe_meta(name)
+    extra = FACTORY_META.get(meta.factory, {})
+    assigns = set(meta.assigns) | set(extra.get("assigns", ()))
+    requires = set(meta.requires) | set(extra.get("requires", ()))
+    return assigns, requires
+
+
+def plan_pipeline(nlp, attrs, keep_unknown=True):
+    # Returns {"keep": [...], "disable": [...], "unknown": [...]} in pipeline order
+    unknown_attrs = [attr for attr in attrs if attr not in ATTR_NEEDS]
+    if unknown_attrs:
+        raise ValueError(f"Don't know which components set {unknown_attrs}, known: {sorted(ATTR_NEEDS)}")
+    needed = {key for attr in attrs for key in ATTR_NEEDS[attr]}
+    metas = {name: component_meta(nlp, name) for name in nlp.pipe_names}
+    unknown = [name for name, (assigns, _) in metas.items() if not assigns]
+    keep = set(unknown) if keep_unknown else set()
+    changed = True
+    while changed:
+        changed = False
+        for name, (assigns, requires) in metas.items():
+            if name not in keep and (assigns & needed):
+                keep.add(name)
+                changed = True
+            if name in keep and not requires <= needed:
+                needed |= requires
+                changed = True
+        for name in nlp.pipe_names:
+            # a shared tok2vec has to run for any kept component listening to it
+            listeners = set(getattr(nlp.get_pipe(name), "listening_components", ()))
+            if name not in keep and listeners & keep:
+                keep.add(name)
+                changed = True
+    return {
+        "keep": [name for name in nlp.pipe_names if name in keep],
+        "disable": [name for name in nlp.pipe_names if name not in keep],
+        "unknown": unknown,
+    }
+
+
+@contextlib.contextmanager
+def pruned_pipeline(nlp, attrs, keep_unknown=True):
+    # with pruned_pipeline(nlp, ["ents"]): ... runs only what doc.ents needs
+    plan = plan_pipeline(nlp, attrs, keep_unknown=keep_unknown)
+    with nlp.select_pipes(disable=plan["disable"]):
+        yield plan
+
+
+def component_times(nlp, texts, batch_size=64):
+    # Seconds spent in the tokenizer and in each component over texts
+    start = time.perf_counter()
+    docs = list(nlp.tokenizer.pipe(texts, batch_size=batch_size))
+    times = {"tokenizer": time.perf_counter() - start}
+    for name, proc in nlp.pipeline:
+        start = time.perf_counter()
+        if hasattr(proc, "pipe"): docs = list(proc.pipe(docs, batch_size=batch_size))
+        else: docs = [proc(doc) for doc in docs]
+        times[name] = time.perf_counter() - start
+    return times
+
+
+def measure_speedup(nlp, attrs, texts, batch_size=64, keep_unknown=True):
+    # Expected speedup from per-component timings vs. measured end-to-end speedup
+    texts = list(texts)
+    plan = plan_pipeline(nlp, attrs, keep_unknown=keep_unknown)
+    times = component_times(nlp, texts, batch_size=batch_size)
+    kept_time = times["tokenizer"] + sum(times[name] for name in plan["keep"])
+    start = time.perf_counter()
+    for _ in nlp.pipe(texts, batch_size=batch_size): pass
+    full = time.perf_counter() - start
+    start = time.perf_counter()
+    with nlp.select_pipes(disable=plan["disable"]):
+        for _ in nlp.pipe(texts, batch_size=batch_size): pass
+    pruned = time.perf_counter() - start
+    return {
+        **plan,
+        "component_s": {name: round(seconds, 4) for name, seconds in times.items()},
+        "expected_speedup": sum(times.values()) / max(kept_time, 1e-9),
+        "measured_speedup": full / max(pruned, 1e-9),
+    }
@@ -0,0 +1,122 @@
+# Process-wide pipeline registry
+    # spacy.load() costs seconds and hundreds of MB, so every caller asking for the
+    #   same model + disabled/excluded components gets the same Language object.
+    # The first load also writes a snapshot: the loaded pipeline, disabled and
+    #   excluded components included, pickled into one file. Unpickling skips
+    #   the config resolution and component construction of spacy.load(), so
+    #   later cold starts take about half as long (en_core_web_sm: 0.24s vs
+    #   0.51s, see benchmarks/bench_registry.py). nlp.to_disk() would not help:
+    #   spacy.load() of that directory does the same work as of the package.
+    # Snapshots are named after the model's and spaCy's versions, so upgrading
+    #   either makes the next start load the package again. Snapshots are
+    #   pickles: keep SNAPSHOT_DIR where only these processes can write.
+################################################################################
+import os
+import pickle
+import sys
+import time
+
+import spacy
+import srsly
+
+SNAPSHOT_DIR = os.environ.get("PSPACY_SNAPSHOT_DIR", "snapshots")
+REGISTRY = {} # key -> {"nlp", "source", "load_s", "rss_mb"}
+
+
+def rss_mb():
+    # Current resident memory of this process in MB (peak RSS where /proc is missing)
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource # not available on Windows
+    except ImportError:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def registry_key(name, disable=(), exclude=()):
+    return (name, tuple(sorted(disable)), tuple(sorted(exclude)))
+
+
+def model_version(name):
+    # Version of the installed model package, or of a model directory's meta.json
+    version = spacy.util.get_package_version(str(name))
+    meta_path = os.path.join(str(name), "meta.json")
+    if version is None and os.path.isfile(meta_path):
+        version = srsly.read_json(meta_path).get("version")
+    return version
+
+
+def snapshot_path(key):
+    name, disable, exclude = key
+    parts = [os.path.basename(str(name))]
+    version = model_version(name)
+    if version: parts.append("v" + version)
+    parts.append("spacy" + spacy.__version__)
+    if disable: parts.append("disable-" + "+".join(disable))
+    if exclude: parts.append("exclude-" + "+".join(exclude))
+    return os.path.join(SNAPSHOT_DIR, "__".join(parts) + ".pkl")
+
+
+def get_nlp(name="en_core_web_sm", disable=(), exclude=(), snapshot=True, fresh=False):
+    # Return the already loaded pipeline for this key, loading it (once) otherwise.
+    # fresh=True returns a private copy for callers that add or remove components.
+    key = registry_key(name, disable, exclude)
+    if fresh:
+        return load_pipeline(key, snapshot)["nlp"]
+    if key not in REGISTRY:
+        REGISTRY[key] = load_pipeline(key, snapshot)
+    return REGISTRY[key]["nlp"]
+
+
+def load_pipeline(key, snapshot=True):
+    name, disable, exclude = key
+    path = snapshot_path(key)
+    rss_before, start = rss_mb(), time.perf_counter()
+    if snapshot and os.path.isfile(path):
+        with open(path, "rb") as f: nlp, source = pickle.load(f), "snapshot"
+    else:
+        nlp, source = spacy.load(name, disable=list(disable), exclude=list(exclude)), "package"
+    entry = {"nlp": nlp, "source": source, "load_s": time.perf_counter() - start, "rss_mb": rss_mb() - rss_before}
+    if snapshot and source == "package":
+        write_snapshot(nlp, path)
+    return entry
+
+
+def write_snapshot(nlp, path):
+    # Write to a temp file first so a crashed worker never leaves a half-written snapshot
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(nlp, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path) # atomic, the last writer wins with an identical file
+
+
+def clear_registry():
+    REGISTRY.clear()
+
+
+def registry_report():
+    # One row per loaded pipeline: load time and resident memory added by the load
+    rows = []
+    for (name, disable, exclude), entry in REGISTRY.items():
+        rows.append({
+            "name": name,
+            "disable": list(disable),
+            "exclude": list(exclude),
+            "pipe_names": entry["nlp"].pipe_names,
+            "source": entry["source"],
+            "load_s": round(entry["load_s"], 3),
+            "rss_mb": round(entry["rss_mb"], 1),
+        })
+    return rows
+
+
+def print_registry():
+    for row in registry_report():
+        off = ", ".join(row["disable"] + row["exclude"]) or "-"
+        print(f"{row['name']:<20}{off:<24}{row['source']:<10}{row['load_s']:>8.3f}s{row['rss_mb']:>9.1f} MB")
@@ -0,0 +1,122 @@
+# Compiled rule bundles for the token Matcher
+    # Adding thousands of patterns at every process start is slow, mostly because
+    #   every string value is interned into the StringStore again (and, with
+    #   validate=True, each pattern is schema-validated).
+    # RuleBundle validates the rules once, replaces string values by their hashes
+    #   and saves them with msgpack. Loading is one file read plus one
+    #   Matcher.add() per label with validation switched off.
+################################################################################
+import srsly
+from spacy.matcher import Matcher
+
+BUNDLE_VERSION = 1
+# Token attributes the Matcher compares by string hash. ENT_IOB and MORPH are
+    # not plain hashes, so their values are left as they are.
+HASHED_ATTRS = {
+    "ORTH", "TEXT", "LOWER", "NORM", "LEMMA", "SHAPE", "PREFIX", "SUFFIX",
+    "TAG", "POS", "DEP", "ENT_TYPE", "ENT_ID", "ENT_KB_ID",
+}
+SET_PREDICATES = {"IN", "NOT_IN"}
+
+
+class RuleBundle:
+    def __init__(self, rules=None, greedy=None):
+        self.rules = {} # label -> list of token patterns
+        self.greedy = dict(greedy or {}) # label -> "FIRST" / "LONGEST"
+        for label, patterns in (rules or {}).items():
+            self.add(label, patterns)
+        self.compiled = False
+
+    def __len__(self):
+        return sum(len(patterns) for patterns in self.rules.values())
+
+    def add(self, label, patterns, greedy=None):
+        self.rules.setdefault(label, []).extend(patterns)
+        if greedy is not None:
+            self.greedy[label] = greedy
+        self.compiled = False
+
+    def compile(self, vocab):
+        # Validate all rules once, then hash their string values into vocab.strings
+        checker = Matcher(vocab, validate=True)
+        for label, patterns in self.rules.items():
+            checker.add(label, patterns, greedy=self.greedy.get(label))
+        self.rules = {
+            label: [[hash_token_spec(spec, vocab.strings) for spec in pattern] for pattern in patterns]
+            for label, patterns in self.rules.items()
+        }
+        self.compiled = True
+        return self
+
+    def matcher(self, vocab):
+        # Build a Matcher from the (compiled) rules with one add() call per label
+        if not self.compiled:
+            self.compile(vocab)
+        matcher = Matcher(vocab, validate=False)
+        for label, patterns in self.rules.items():
+            vocab.strings.add(label)
+            matcher.add(label, patterns, greedy=self.greedy.get(label))
+        return matcher
+
+    def to_bytes(self, vocab):
+        if not self.compiled:
+            self.compile(vocab)
+        msg = {"version": BUNDLE_VERSION, "rules": self.rules, "greedy": self.greedy}
+        return srsly.msgpack_dumps(msg)
+
+    def from_bytes(self, bytes_data):
+        msg = srsly.msgpack_loads(bytes_data)
+        if msg.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"Unsupported rule bundle version: {msg.get('version')}")
+        self.rules, self.greedy, self.compiled = msg["rules"], msg["greedy"], True
+        return self
+
+    def to_disk(self, path, vocab):
+        with open(path, "wb") as f: f.write(self.to_bytes(vocab))
+
+    @classmethod
+    def from_disk(cls, path):
+        with open(path, "rb") as f: return cls().from_bytes(f.read())
+
+    @classmethod
+    def from_json(cls, path):
+        # Source rules as {"LABEL": [pattern, ...]}
+        with open(path, encoding="utf8") as f: return cls(srsly.json_loads(f.read()))
+
+
+def hash_token_spec(spec, strings):
+    hashed = {}
+    for attr, value in spec.items():
+        attr = attr.upper() if isinstance(attr, str) else attr
+        if attr not in HASHED_ATTRS:
+            hashed[attr] = value
+        elif isinstance(value, str):
+            hashed[attr] = strings.add(value)
+        elif isinstance(value, dict):
+            hashed[attr] = {
+                pred: [strings.add(v) if isinstance(v, str) else v for v in arg]
+                if pred in SET_PREDICATES else arg
+                for pred, arg in value.items()
+            }
+        else:
+            hashed[attr] = value
+    return hashed
+
+
+def load_matcher(path, vocab):
+    # One-step load: bundle file -> ready Matcher
+    return RuleBundle.from_disk(path).matcher(vocab)
+
+
+def group_matches(doc, matcher):
+    # {label: [Span, ...]} for one Doc
+    groups = {}
+    for match_id, start, end in matcher(doc):
+        groups.setdefault(doc.vocab.strings[match_id], []).append(doc[start:end])
+    return groups
+
+
+def pipe_matches(nlp, texts, matcher, **pipe_kwargs):
+    # Stream texts through nlp.pipe and yield (doc, {label: [Span, ...]})
+    for doc in nlp.pipe(texts, **pipe_kwargs):
+        yield doc, group_matches(doc, matcher)
@@ -0,0 +1,180 @@
+# Asyncio micro-batching over nlp.pipe
+    # A service gets one text per request, but nlp.pipe is much faster than nlp()
+    #   per text. MicroBatcher queues concurrent requests and sends them to
+    #   nlp.pipe together: a batch goes out when it reaches max_batch_size or when
+    #   its first request has waited max_wait_ms.
+    # Model work runs off the event loop: in a thread (pass a Language object) or
+    #   in a process pool (pass a model name and n_workers; postprocess must then
+    #   be a module-level function returning something picklable).
+    # metrics(): queue depth, batch sizes / fill ratio and request latency (the
+    #   last 100k batches / requests).
+    # stop() lets the batches in the pool finish; requests still queued get a
+    #   RuntimeError.
+    # load_test() is an in-process client: `concurrency` coroutines sending requests.
+################################################################################
+import asyncio
+import collections
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+WORKER = {} # nlp and postprocess inside pool processes
+
+
+def init_worker(model, postprocess):
+    from .registry import get_nlp
+    WORKER.update(nlp=get_nlp(model), postprocess=postprocess)
+
+
+def run_batch(texts, nlp=None, postprocess=None, batch_size=None):
+    if nlp is None: # in a pool process
+        nlp, postprocess = WORKER["nlp"], WORKER["postprocess"]
+    docs = nlp.pipe(texts, batch_size=batch_size or len(texts))
+    return [postprocess(doc) if postprocess else doc for doc in docs]
+
+
+def percentile(values, q):
+    if not values: return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class MicroBatcher:
+    def __init__(self, nlp, max_batch_size=64, max_wait_ms=5.0, postprocess=None, n_workers=1):
+        self.nlp, self.postprocess = nlp, postprocess
+        self.max_batch_size, self.max_wait = max_batch_size, max_wait_ms / 1000
+        self.n_workers = n_workers
+        self.queue = None
+        self.executor = None
+        self.collector = None
+        self.slots = None
+        self.in_flight = set()
+        self.batch_sizes = collections.Counter()
+        self.queue_depths = collections.deque(maxlen=100_000)
+        self.batch = [] # requests taken from the queue, not yet sent to the pool
+        self.latencies = collections.deque(maxlen=100_000)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.slots = asyncio.Semaphore(self.n_workers)
+        if isinstance(self.nlp, str):
+            self.executor = ProcessPoolExecutor(self.n_workers, initializer=init_worker,
+                                                initargs=(self.nlp, self.postprocess))
+        else:
+            # one Language object is not safe to share between threads, so one at a time
+            self.n_workers = 1
+            self.slots = asyncio.Semaphore(1)
+            self.executor = ThreadPoolExecutor(1)
+        self.collector = asyncio.create_task(self.collect())
+
+    async def stop(self):
+        if self.collector is not None:
+            self.collector.cancel()
+            try:
+                await self.collector
+            except asyncio.CancelledError:
+                pass
+            self.collector = None
+        if self.queue is not None:
+            # requests not sent to the pool would never be answered: fail them
+            pending, self.batch = self.batch, []
+            while not self.queue.empty():
+                pending.append(self.queue.get_nowait())
+            error = RuntimeError("MicroBatcher stopped before processing the request")
+            for _, future, _ in pending:
+                if not future.done(): future.set_exception(error)
+            self.queue = None
+        if self.in_flight:
+            await asyncio.gather(*self.in_flight, return_exceptions=True)
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    async def process(self, text):
+        # One request: returns postprocess(doc), or the Doc itself
+        if self.queue is None:
+            raise RuntimeError("MicroBatcher is not running, use `async with` or await start()")
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, future, time.perf_counter()))
+        return await future
+
+    async def collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self.batch = batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0: break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            self.queue_depths.append(self.queue.qsize())
+            await self.slots.acquire() # at most n_workers batches in the pool
+            self.batch = []
+            task = asyncio.create_task(self.dispatch(batch))
+            self.in_flight.add(task)
+            task.add_done_callback(self.in_flight.discard)
+
+    async def dispatch(self, batch):
+        loop = asyncio.get_running_loop()
+        texts = [text for text, _, _ in batch]
+        try:
+            if isinstance(self.nlp, str):
+                results = await loop.run_in_executor(self.executor, run_batch, texts)
+            else:
+                results = await loop.run_in_executor(self.executor, run_batch, texts, self.nlp, self.postprocess)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done(): future.set_exception(e)
+            return
+        finally:
+            self.slots.release()
+        self.batch_sizes[len(batch)] += 1
+        now = time.perf_counter()
+        for (_, future, queued), result in zip(batch, results):
+            self.latencies.append(now - queued)
+            if not future.done(): future.set_result(result)
+
+    def metrics(self):
+        n_batches = sum(self.batch_sizes.values())
+        n_requests = sum(size * count for size, count in self.batch_sizes.items())
+        mean_batch = n_requests / n_batches if n_batches else 0.0
+        latencies = list(self.latencies)
+        return {
+            "requests": n_requests, "batches": n_batches, "mean_batch_size": mean_batch,
+            "batch_fill": mean_batch / self.max_batch_size,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "max_queue_depth": max(self.queue_depths, default=0),
+            "latency_p50_ms": percentile(latencies, 0.5) * 1000,
+            "latency_p99_ms": percentile(latencies, 0.99) * 1000,
+        }
+
+
+async def load_test(service, texts, n_requests=1000, concurrency=64):
+    # `concurrency` clients each sending requests one after another until n_requests are done
+    counter = iter(range(n_requests))
+    latencies = []
+
+    async def client():
+        for i in counter:
+            start = time.perf_counter()
+            await service.process(texts[i % len(texts)])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    seconds = time.perf_counter() - start
+    return {
+        "requests": n_requests, "concurrency": concurrency, "seconds": seconds,
+        "requests_per_sec": n_requests / seconds,
+        "p50_ms": percentile(latencies, 0.5) * 1000, "p99_ms": percentile(latencies, 0.99) * 1000,
+        "service": service.metrics(),
+    }
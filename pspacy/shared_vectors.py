@@ -0,0 +1,134 @@
+# Word vectors shared between processes through a memory-mapped file
+    # spacy.load() reads the whole vector table into each process, so a pool of N
+    #   workers on en_core_web_md holds N copies. export_vectors() writes the
+    #   table once as .npy files. load_shared() loads the pipeline without its
+    #   vectors and attaches a read-only memory map of that file, so every
+    #   process (forked or spawned) reads the same pages from the OS page cache.
+    # token.vector / .similarity work as before on float32 or float16 tables.
+    #   float16 halves the file; int8 (one float32 scale per row) quarters it but
+    #   cannot back spaCy's Vectors, so QuantizedVectors computes the vectors and
+    #   similarity itself. accuracy_report() measures what either one costs.
+################################################################################
+import json
+import os
+import shutil
+
+import numpy
+import spacy
+from spacy.vectors import Vectors
+
+DTYPES = ("float32", "float16", "int8")
+
+
+def quantize(matrix):
+    # int8 rows with one scale per row: row ~= q * scale
+    scales = numpy.abs(matrix).max(axis=1) / 127
+    scales[scales == 0] = 1
+    return numpy.round(matrix / scales[:, None]).astype("int8"), scales.astype("float32")
+
+
+def export_vectors(vectors, path, dtype="float32"):
+    # vectors: Vectors, a Language or a model name; writes the table in path/
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype must be one of {DTYPES}, got {dtype!r}")
+    if isinstance(vectors, str): vectors = spacy.load(vectors).vocab.vectors
+    elif not isinstance(vectors, Vectors): vectors = vectors.vocab.vectors
+    if vectors.mode != "default":
+        raise ValueError(f"only default-mode vectors can be shared, not {vectors.mode!r}")
+    data = numpy.asarray(vectors.data, dtype="float32")
+    keys = numpy.fromiter(vectors.key2row.keys(), dtype="uint64", count=len(vectors.key2row))
+    rows = numpy.fromiter(vectors.key2row.values(), dtype="int64", count=len(vectors.key2row))
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    if dtype == "int8":
+        data, scales = quantize(data)
+        numpy.save(os.path.join(tmp_path, "scales.npy"), scales)
+    numpy.save(os.path.join(tmp_path, "data.npy"), data.astype(dtype))
+    numpy.save(os.path.join(tmp_path, "keys.npy"), keys)
+    numpy.save(os.path.join(tmp_path, "rows.npy"), rows)
+    with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf8") as f:
+        f.write(json.dumps({"dtype": dtype, "shape": list(data.shape)}))
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_meta(path):
+    with open(os.path.join(path, "meta.json"), encoding="utf8") as f: return json.loads(f.read())
+
+
+def load_table(path):
+    # (data, keys, rows), all memory-mapped
+    names = ("data", "keys", "rows")
+    return tuple(numpy.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in names)
+
+
+def attach_vectors(nlp, path):
+    # Replace nlp.vocab.vectors with the memory-mapped table in path/
+    if read_meta(path)["dtype"] == "int8":
+        raise ValueError("int8 tables can't back spaCy's Vectors; use QuantizedVectors")
+    data, keys, rows = load_table(path)
+    vectors = Vectors(strings=nlp.vocab.strings, data=data)
+    for key, row in zip(keys.tolist(), rows.tolist()):
+        vectors.add(key, row=row)
+    nlp.vocab.vectors = vectors
+    return nlp
+
+
+def load_shared(name, path, **kwargs):
+    # spacy.load without reading the model's own vectors, then attach path/
+    exclude = list(kwargs.pop("exclude", [])) + ["vectors"]
+    return attach_vectors(spacy.load(name, exclude=exclude, **kwargs), path)
+
+
+class QuantizedVectors:
+    # Vectors and cosine similarity from an int8 table written by export_vectors
+    def __init__(self, path):
+        data, keys, rows = load_table(path)
+        self.data = data
+        self.scales = numpy.load(os.path.join(path, "scales.npy"), mmap_mode="r")
+        self.key2row = dict(zip(keys.tolist(), rows.tolist()))
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key):
+        row = self.key2row.get(key)
+        if row is None: return numpy.zeros(self.data.shape[1], dtype="float32")
+        return self.data[row].astype("float32") * self.scales[row]
+
+    def vector(self, obj):
+        # Token: its row; Span/Doc: mean over tokens, as spaCy does
+        if hasattr(obj, "orth"): return self.get(obj.orth)
+        return numpy.mean([self.get(token.orth) for token in obj], axis=0) if len(obj) else self.get(0)
+
+    def similarity(self, a, b):
+        a, b = self.vector(a), self.vector(b)
+        norm = numpy.linalg.norm(a) * numpy.linalg.norm(b)
+        return float(a @ b / norm) if norm else 0.0
+
+    def matrix(self, rows=None):
+        rows = numpy.arange(len(self)) if rows is None else numpy.asarray(rows)
+        return self.data[rows].astype("float32") * self.scales[rows][:, None]
+
+
+def accuracy_report(path, reduced_path, n_pairs=100_000, k=10, n_queries=200, seed=0):
+    # Cosine similarity of random row pairs and top-k neighbours: float32 vs reduced
+    from .similarity import VectorIndex
+    data = numpy.asarray(load_table(path)[0], dtype="float32")
+    if read_meta(reduced_path)["dtype"] == "int8":
+        reduced = QuantizedVectors(reduced_path).matrix()
+    else:
+        reduced = numpy.asarray(load_table(reduced_path)[0], dtype="float32")
+    rng = numpy.random.default_rng(seed)
+    a, b = rng.integers(0, len(data), n_pairs), rng.integers(0, len(data), n_pairs)
+    exact, approx = VectorIndex(data), VectorIndex(reduced)
+    errors = numpy.abs(exact.similarity(a, b) - approx.similarity(a, b))
+    queries = rng.choice(len(data), min(n_queries, len(data)), replace=False)
+    k = min(k, len(data) - 1)
+    exact_top = exact.topk(queries, k=k, exclude_self=True)[0]
+    approx_top = approx.topk(queries, k=k, exclude_self=True)[0]
+    overlap = numpy.mean([len(set(x) & set(y)) / k for x, y in zip(exact_top.tolist(), approx_top.tolist())])
+    return {"mean_abs_error": float(errors.mean()), "max_abs_error": float(errors.max()),
+            f"top{k}_overlap": float(overlap)}
@@ -0,0 +1,103 @@
+# Batched vector similarity
+    # token1.similarity(token2) computes two norms and one dot product per call.
+    # VectorIndex stacks the .vector of many Docs/Spans/Tokens into one
+    #   L2-normalized float32 matrix once, then cosine similarity for any number
+    #   of pairs is a matrix multiply. Top-k queries run block by block so the
+    #   full query x index score matrix never has to fit in memory.
+    # save()/load() keep the matrix in a .npy file that load() memory-maps, so
+    #   worker processes share one copy through the OS page cache.
+################################################################################
+import json
+
+import numpy
+
+BLOCK_SIZE = 4096
+
+
+def normalize(matrix):
+    matrix = numpy.asarray(matrix, dtype="float32")
+    norms = numpy.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1 # objects without a vector keep a zero row (similarity 0)
+    return matrix / norms
+
+
+class VectorIndex:
+    def __init__(self, matrix, keys=None, normalized=False):
+        self.matrix = matrix if normalized else normalize(matrix)
+        self.keys = list(keys) if keys is not None else list(range(len(self.matrix)))
+
+    def __len__(self):
+        return len(self.matrix)
+
+    @classmethod
+    def from_objects(cls, objs, keys=None):
+        # objs: Docs, Spans or Tokens; keys default to their text
+        objs = list(objs)
+        if keys is None: keys = [obj.text for obj in objs]
+        width = objs[0].vocab.vectors_length if objs else 0
+        matrix = numpy.zeros((len(objs), width), dtype="float32")
+        for i, obj in enumerate(objs):
+            matrix[i] = obj.vector
+        return cls(matrix, keys=keys)
+
+    def rows(self, queries):
+        # Row indices, raw vectors or spaCy objects -> normalized query matrix
+        queries = list(queries) if not isinstance(queries, numpy.ndarray) else queries
+        if isinstance(queries, numpy.ndarray):
+            return self.matrix[queries] if queries.dtype.kind in "iu" else normalize(numpy.atleast_2d(queries))
+        if queries and hasattr(queries[0], "vector"):
+            return normalize(numpy.vstack([q.vector for q in queries]))
+        return self.matrix[numpy.asarray(queries, dtype="int64")]
+
+    def similarity(self, a, b):
+        # Cosine similarity of paired rows: a[i] vs b[i]
+        left, right = self.rows(a), self.rows(b)
+        return numpy.einsum("ij,ij->i", left, right)
+
+    def similarity_matrix(self, a, b=None):
+        # All-pairs cosine similarity between two (small) sets
+        left = self.rows(a)
+        right = left if b is None else self.rows(b)
+        return left @ right.T
+
+    def topk(self, queries, k=10, block_size=BLOCK_SIZE, exclude_self=False):
+        # Nearest neighbours for every query: (indices, scores), both (n_queries, k).
+        # exclude_self=True expects queries to be row indices into this index.
+        query_rows = numpy.asarray(queries) if exclude_self else None
+        queries = self.rows(queries)
+        k = min(k, len(self) - (1 if exclude_self else 0))
+        best_idx = numpy.zeros((len(queries), k), dtype="int64")
+        best_scores = numpy.zeros((len(queries), k), dtype="float32")
+        for q_start in range(0, len(queries), block_size):
+            q_block = queries[q_start:q_start + block_size]
+            cand_idx, cand_scores = [], []
+            for i_start in range(0, len(self), block_size):
+                scores = q_block @ self.matrix[i_start:i_start + block_size].T
+                if exclude_self:
+                    own = query_rows[q_start:q_start + block_size] - i_start
+                    inside = (own >= 0) & (own < scores.shape[1])
+                    scores[numpy.nonzero(inside)[0], own[inside]] = -numpy.inf
+                kk = min(k, scores.shape[1])
+                part = numpy.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+                cand_idx.append(part + i_start)
+                cand_scores.append(numpy.take_along_axis(scores, part, axis=1))
+            cand_idx, cand_scores = numpy.hstack(cand_idx), numpy.hstack(cand_scores)
+            order = numpy.argsort(-cand_scores, axis=1)[:, :k]
+            best_idx[q_start:q_start + len(q_block)] = numpy.take_along_axis(cand_idx, order, axis=1)
+            best_scores[q_start:q_start + len(q_block)] = numpy.take_along_axis(cand_scores, order, axis=1)
+        return best_idx, best_scores
+
+    def all_pairs_topk(self, k=10, block_size=BLOCK_SIZE):
+        # k nearest neighbours of every row, the row itself left out
+        return self.topk(numpy.arange(len(self)), k=k, block_size=block_size, exclude_self=True)
+
+    def save(self, path):
+        # path.npy holds the matrix, path.keys.json the keys
+        numpy.save(f"{path}.npy", self.matrix)
+        with open(f"{path}.keys.json", "w", encoding="utf8") as f: f.write(json.dumps(self.keys))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        matrix = numpy.load(f"{path}.npy", mmap_mode="r" if mmap else None)
+        with open(f"{path}.keys.json", encoding="utf8") as f: keys = json.loads(f.read())
+        return cls(matrix, keys=keys, normalized=True)
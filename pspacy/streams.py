@@ -0,0 +1,185 @@
+# Streaming corpus runner
+    # Reads JSON arrays, JSONL or plain text lazily, feeds nlp.pipe and writes the
+    #   Docs to rotating DocBin shards, so only one shard is ever held in memory.
+    # Backpressure comes from pulling: nothing is read from the file until
+    #   nlp.pipe asks for the next batch, and nlp.pipe(n_process=N) only keeps a
+    #   few batches per worker in flight.
+    # With as_tuples=True the context of each text is stored in its Doc
+    #   (doc.user_data[CONTEXT_KEY], so the shards keep user data) and
+    #   read_shards(..., as_tuples=True) yields (doc, context) pairs again.
+################################################################################
+import itertools
+import json
+import os
+import time
+
+from spacy.tokens import DocBin
+
+READ_CHUNK = 1 << 16
+TARGET_BATCH_CHARS = 50_000 # roughly 10k words per nlp.pipe batch
+MIN_BATCH_SIZE, MAX_BATCH_SIZE = 16, 4096
+CONTEXT_KEY = "pspacy.context"
+
+
+def read_texts(path, text_key="text", context_key=None):
+    # Yield texts (or (text, context) tuples with context_key) one at a time.
+    # .jsonl: one string or object per line, .json: one array, anything else: one text per line
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".jsonl": records = read_jsonl(path)
+    elif ext == ".json": records = read_json_array(path)
+    else: records = read_lines(path)
+    for record in records:
+        if isinstance(record, dict):
+            text = record[text_key]
+            yield (text, record.get(context_key)) if context_key else text
+        else:
+            yield record
+
+
+def read_lines(path):
+    with open(path, encoding="utf8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.strip(): yield line
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf8") as f:
+        for line in f:
+            if line.strip(): yield json.loads(line)
+
+
+def read_json_array(path):
+    # Incrementally decode the items of a top-level JSON array without loading the file
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf8") as f:
+        buffer = f.read(READ_CHUNK).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"{path} does not contain a JSON array")
+        pos = 1
+
+        def more():
+            # drop what was consumed and append the next chunk; False at end of file
+            nonlocal buffer, pos
+            chunk = f.read(READ_CHUNK)
+            buffer, pos = buffer[pos:] + chunk, 0
+            return bool(chunk)
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buffer):
+                if not more(): return
+                continue
+            if buffer[pos] == "]": return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if not more(): raise # truncated file
+                continue
+            # A number cut off at the buffer edge ("-0." | "0005") decodes short:
+            # only take an item once a delimiter follows it
+            if (end == len(buffer) or buffer[end] not in " \t\r\n,]") and more(): continue
+            yield item
+            pos = end
+
+
+def auto_batch_size(texts, sample_size=256):
+    # Pick a batch size from the mean length of the first texts; returns (batch_size, texts)
+    texts = iter(texts)
+    sample = list(itertools.islice(texts, sample_size))
+    lengths = [len(t[0] if isinstance(t, tuple) else t) for t in sample]
+    mean_chars = sum(lengths) / len(lengths) if lengths else 1
+    batch_size = int(min(MAX_BATCH_SIZE, max(MIN_BATCH_SIZE, TARGET_BATCH_CHARS // max(mean_chars, 1))))
+    return batch_size, itertools.chain(sample, texts)
+
+
+class ShardWriter:
+    # Collects Docs in a DocBin and writes it out every shard_size docs
+    def __init__(self, out_dir, shard_size=10_000, attrs=None, store_user_data=False, prefix="shard"):
+        self.out_dir, self.shard_size, self.prefix = out_dir, shard_size, prefix
+        self.attrs, self.store_user_data = attrs, store_user_data
+        self.paths = []
+        os.makedirs(out_dir, exist_ok=True)
+        self.new_bin()
+
+    def new_bin(self):
+        kwargs = {"store_user_data": self.store_user_data}
+        if self.attrs is not None: kwargs["attrs"] = self.attrs
+        self.doc_bin = DocBin(**kwargs)
+
+    def add(self, doc):
+        self.doc_bin.add(doc)
+        if len(self.doc_bin) >= self.shard_size:
+            self.flush()
+
+    def merge(self, doc_bin):
+        # Add a whole DocBin (e.g. from a worker process); rotates like add()
+        self.doc_bin.merge(doc_bin)
+        if len(self.doc_bin) >= self.shard_size:
+            self.flush()
+
+    def flush(self):
+        if not len(self.doc_bin): return
+        path = os.path.join(self.out_dir, f"{self.prefix}_{len(self.paths):05d}.spacy")
+        self.doc_bin.to_disk(path)
+        self.paths.append(path)
+        self.new_bin()
+
+    def close(self):
+        self.flush()
+        return self.paths
+
+
+class Throughput:
+    # docs/sec and words/sec, printed every `every` seconds while the run goes on
+    def __init__(self, every=10.0, log=print):
+        self.every, self.log = every, log
+        self.start = self.last = time.perf_counter()
+        self.docs = self.words = 0
+
+    def update(self, doc):
+        self.docs += 1
+        self.words += len(doc)
+        now = time.perf_counter()
+        if self.log and now - self.last >= self.every:
+            self.last = now
+            self.log(self.line())
+
+    def stats(self):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        return {"docs": self.docs, "words": self.words, "seconds": elapsed,
+                "docs_per_sec": self.docs / elapsed, "words_per_sec": self.words / elapsed}
+
+    def line(self):
+        s = self.stats()
+        return f"{s['docs']:>10} docs {s['docs_per_sec']:>9.1f} docs/s {s['words_per_sec']:>10.1f} words/s"
+
+
+def run_corpus(nlp, texts, out_dir, shard_size=10_000, n_process=1, batch_size="auto",
+               as_tuples=False, attrs=None, store_user_data=False, report_every=10.0, log=print):
+    # Stream texts through nlp.pipe into DocBin shards in out_dir.
+    # Returns the throughput stats plus the batch size used and the shard paths.
+    if isinstance(texts, str): texts = read_texts(texts)
+    if batch_size == "auto": batch_size, texts = auto_batch_size(texts)
+    writer = ShardWriter(out_dir, shard_size=shard_size, attrs=attrs, store_user_data=store_user_data or as_tuples)
+    meter = Throughput(every=report_every, log=log)
+    for item in nlp.pipe(texts, n_process=n_process, batch_size=batch_size, as_tuples=as_tuples):
+        if as_tuples:
+            doc, context = item
+            doc.user_data[CONTEXT_KEY] = context
+        else:
+            doc = item
+        writer.add(doc)
+        meter.update(doc)
+    stats = meter.stats()
+    stats.update(batch_size=batch_size, shards=writer.close())
+    if log: log(meter.line())
+    return stats
+
+
+def read_shards(vocab, paths, as_tuples=False):
+    # Read the Docs back one shard at a time; as_tuples: (doc, context) pairs
+    for path in paths:
+        for doc in DocBin().from_disk(path).get_docs(vocab):
+            yield (doc, doc.user_data.get(CONTEXT_KEY)) if as_tuples else doc
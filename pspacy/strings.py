@@ -0,0 +1,142 @@
+# Bounded StringStore for long-running workers
+    # Every new string a pipeline sees is interned into nlp.vocab.strings (and a
+    #   Lexeme into the vocab) and never freed, so workers fed user-generated text
+    #   grow without limit.
+    # BoundedPipeline checks the store every check_every Docs and, once it is
+    #   over max_strings / max_bytes, swaps in a fresh copy of the pipeline from
+    #   its registry snapshot: only the base model's strings remain. Docs already
+    #   handed out keep the old vocab alive until they are released.
+    # StringTable is a read-only hash -> string table in one memory-mapped file.
+    #   It is not attached to nlp.vocab: spaCy's StringStore can't be backed by a
+    #   file, so every process running a pipeline still holds its own store.
+    #   Processes that only turn hashes back into text (DocBin, to_columns output)
+    #   can use the table instead of loading a pipeline, and share one copy of it
+    #   through the page cache. Write it from a freshly loaded pipeline, before any
+    #   text is processed, so it holds only the base strings.
+################################################################################
+import itertools
+import mmap
+import os
+
+import numpy
+from spacy.symbols import IDS
+
+from .registry import load_pipeline, registry_key
+
+TABLE_MAGIC = b"PSPSTR01"
+
+
+def string_stats(strings):
+    # Number of strings and their UTF-8 size in bytes
+    return {"strings": len(strings), "bytes": sum(len(s.encode("utf8")) for s in strings)}
+
+
+class BoundedPipeline:
+    def __init__(self, name="en_core_web_sm", max_strings=None, max_bytes=None, check_every=1000,
+                 disable=(), exclude=()):
+        self.key = registry_key(name, disable, exclude)
+        self.max_strings, self.max_bytes, self.check_every = max_strings, max_bytes, check_every
+        self.compactions = 0
+        self.nlp = load_pipeline(self.key)["nlp"]
+        self.base = string_stats(self.nlp.vocab.strings)
+        self.since_check = 0
+
+    def __call__(self, text, **kwargs):
+        doc = self.nlp(text, **kwargs)
+        self.tick(1)
+        return doc
+
+    def pipe(self, texts, **kwargs):
+        # Like nlp.pipe; the budget is checked between chunks of check_every texts
+        texts = iter(texts)
+        while True:
+            chunk = list(itertools.islice(texts, self.check_every))
+            if not chunk: return
+            yield from self.nlp.pipe(chunk, **kwargs)
+            self.tick(len(chunk))
+
+    def tick(self, n_docs):
+        self.since_check += n_docs
+        if self.since_check >= self.check_every:
+            self.since_check = 0
+            if self.over_budget():
+                self.compact()
+
+    def over_budget(self):
+        strings = self.nlp.vocab.strings
+        if self.max_strings is not None and len(strings) > self.max_strings:
+            return True
+        return self.max_bytes is not None and string_stats(strings)["bytes"] > self.max_bytes
+
+    def compact(self):
+        # Drop every string the base model doesn't have by reloading from the snapshot
+        self.nlp = load_pipeline(self.key)["nlp"]
+        self.compactions += 1
+
+    def stats(self):
+        current = string_stats(self.nlp.vocab.strings)
+        return {**current, "base_strings": self.base["strings"], "base_bytes": self.base["bytes"],
+                "added_strings": current["strings"] - self.base["strings"], "compactions": self.compactions}
+
+
+def write_string_table(strings, path):
+    # strings: a StringStore. Symbol names (POS/DEP labels etc.) are added so their
+    #   ids resolve too.
+    table = {strings[s]: s for s in strings}
+    table.update((key, name) for name, key in IDS.items() if name)
+    items = sorted((key, s.encode("utf8")) for key, s in table.items())
+    hashes = numpy.asarray([key for key, _ in items], dtype="uint64")
+    offsets = numpy.zeros(len(items) + 1, dtype="uint64")
+    offsets[1:] = numpy.cumsum([len(data) for _, data in items])
+    with open(path, "wb") as f:
+        f.write(TABLE_MAGIC)
+        f.write(numpy.asarray([len(items)], dtype="uint64").tobytes())
+        f.write(hashes.tobytes())
+        f.write(offsets.tobytes())
+        f.write(b"".join(data for _, data in items))
+
+
+class StringTable:
+    # Read-only, memory-mapped view of a file written by write_string_table()
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.buffer[:8] != TABLE_MAGIC:
+            raise ValueError(f"{path} is not a string table")
+        n = int(numpy.frombuffer(self.buffer, dtype="uint64", count=1, offset=8)[0])
+        self.hashes = numpy.frombuffer(self.buffer, dtype="uint64", count=n, offset=16)
+        self.offsets = numpy.frombuffer(self.buffer, dtype="uint64", count=n + 1, offset=16 + 8 * n)
+        self.blob_start = 16 + 8 * n + 8 * (n + 1)
+        self.path = path
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def index(self, key):
+        i = int(numpy.searchsorted(self.hashes, numpy.uint64(key)))
+        return i if i < len(self.hashes) and self.hashes[i] == key else -1
+
+    def __contains__(self, key):
+        return self.index(key) >= 0
+
+    def __getitem__(self, key):
+        i = self.index(key)
+        if i < 0:
+            raise KeyError(key)
+        start, end = self.blob_start + int(self.offsets[i]), self.blob_start + int(self.offsets[i + 1])
+        return self.buffer[start:end].decode("utf8")
+
+    def lookup(self, keys, default=None):
+        # Batch lookup of many hashes; missing ones give default
+        keys = numpy.asarray(keys, dtype="uint64")
+        idx = numpy.minimum(numpy.searchsorted(self.hashes, keys), max(len(self.hashes) - 1, 0))
+        found = (self.hashes[idx] == keys) if len(self.hashes) else numpy.zeros(len(keys), dtype=bool)
+        return [self[key] if hit else default for key, hit in zip(keys.tolist(), found.tolist())]
+
+    @property
+    def nbytes(self):
+        return os.path.getsize(self.path)
+
+    def close(self):
+        self.hashes = self.offsets = None
+        self.buffer.close()
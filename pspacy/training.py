@@ -0,0 +1,93 @@
+# Training with cached Examples
+    # The chapter 4 loop calls nlp.make_doc and Example.from_dict for every batch
+    #   of every epoch. ExampleStore converts (text, {"entities": [...]}) data into
+    #   Examples once and can save/load them as a DocBin of reference Docs.
+    # train() shuffles a list of indices instead of the data, grows the batch size
+    #   with spacy.util.compounding, and logs words/s, examples/s and seconds per
+    #   epoch next to the losses.
+    # Reusing Example objects across epochs is safe: nlp.update only writes to
+    #   the predicted Docs of components listed in annotating_components.
+################################################################################
+import random
+import time
+
+from spacy.tokens import Doc, DocBin
+from spacy.training import Example
+from spacy.util import compounding, minibatch
+
+
+class ExampleStore:
+    def __init__(self, examples=()):
+        self.examples = list(examples)
+
+    def __len__(self):
+        return len(self.examples)
+
+    def __getitem__(self, i):
+        return self.examples[i]
+
+    @classmethod
+    def from_data(cls, nlp, data, batch_size=1000):
+        # data: [(text, {"entities": [(start, end, label), ...]}), ...]
+        texts = [text for text, _ in data]
+        docs = nlp.tokenizer.pipe(texts, batch_size=batch_size)
+        return cls(Example.from_dict(doc, annots) for doc, (_, annots) in zip(docs, data))
+
+    @property
+    def n_words(self):
+        return sum(len(eg.predicted) for eg in self.examples)
+
+    def to_disk(self, path):
+        doc_bin = DocBin(store_user_data=False)
+        for eg in self.examples:
+            doc_bin.add(eg.reference)
+        doc_bin.to_disk(path)
+
+    @classmethod
+    def from_disk(cls, nlp, path):
+        # The predicted side is rebuilt from the stored tokens, no tokenizer run
+        examples = []
+        for reference in DocBin().from_disk(path).get_docs(nlp.vocab):
+            words = [token.text for token in reference]
+            spaces = [bool(token.whitespace_) for token in reference]
+            examples.append(Example(Doc(nlp.vocab, words=words, spaces=spaces), reference))
+        return cls(examples)
+
+
+def batch_sizes(start=4.0, stop=32.0, compound=1.001):
+    # Compounding batch size schedule; pass start == stop for a fixed size
+    if start == stop:
+        while True: yield int(start)
+    yield from compounding(start, stop, compound)
+
+
+def train(nlp, store, n_iter=10, start=4.0, stop=32.0, compound=1.001, drop=0.2, sgd=None,
+          seed=0, log=print, sizes=None):
+    # Train nlp on an ExampleStore; returns one stats dict per epoch.
+    # sizes: a batch_sizes() iterator to continue (e.g. across calls of one epoch each)
+    rng = random.Random(seed)
+    order = list(range(len(store)))
+    sizes = batch_sizes(start, stop, compound) if sizes is None else sizes
+    history = []
+    for itn in range(n_iter):
+        rng.shuffle(order)
+        losses = {}
+        n_examples = n_words = 0
+        epoch_start = time.perf_counter()
+        for batch in minibatch(order, size=sizes):
+            examples = [store.examples[i] for i in batch]
+            nlp.update(examples, drop=drop, sgd=sgd, losses=losses)
+            n_examples += len(examples)
+            n_words += sum(len(eg.predicted) for eg in examples)
+        seconds = time.perf_counter() - epoch_start
+        stats = {
+            "epoch": itn, "losses": dict(losses), "seconds": seconds,
+            "examples_per_sec": n_examples / max(seconds, 1e-9),
+            "words_per_sec": n_words / max(seconds, 1e-9),
+        }
+        history.append(stats)
+        if log:
+            loss_text = " ".join(f"{name}={loss:.3f}" for name, loss in losses.items())
+            log(f"epoch {itn:>3}  {loss_text}  {stats['examples_per_sec']:>8.1f} ex/s"
+                f"  {stats['words_per_sec']:>9.1f} words/s  {seconds:.2f}s")
+    return history
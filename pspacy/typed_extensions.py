@@ -0,0 +1,194 @@
+# Array-backed Token and Span extensions
+    # Token.set_extension(name, default=...) stores every value set in doc.user_data
+    #   under its own ("._.", name, idx, None) key: one tuple, one dict entry and
+    #   one boxed value per token.
+    # set_typed_extension() declares a dtype ("bool", "int", "float" or "string")
+    #   and keeps the values of one Doc in a single NumPy array:
+    #   - Token: one row per token, created on first write (reads before that
+    #     return the default)
+    #   - Span: sorted (start, end) token offsets with one value each, and the
+    #     token count of the Doc they were set on
+    #   "string" values are stored as StringStore hashes.
+    # token._.name keeps working, and get_values()/set_values() read and write all
+    #   tokens (or a list of spans) at once. The arrays sit in doc.user_data, so
+    #   DocBin(store_user_data=True) writes them as packed binary; add Docs with
+    #   add_doc() so the "string" values go into the DocBin's strings too.
+    # Both are tied to the token count: after retokenizing a Doc, reads and writes
+    #   raise instead of attaching values to the wrong tokens or spans. Re-create
+    #   them with set_values(doc, name, values) for all tokens, or with
+    #   set_values(doc, name, values, spans, replace=True).
+################################################################################
+import numpy
+from spacy.tokens import Span, Token
+
+DTYPES = {"bool": "bool", "int": "int64", "float": "float64", "string": "uint64"}
+DEFAULTS = {"bool": False, "int": 0, "float": 0.0, "string": ""}
+KEY = "pspacy.typed" # doc.user_data[(KEY, "Token" | "Span", name)]
+EXTENSIONS = {} # (cls name, ext name) -> (dtype, default)
+
+
+def set_typed_extension(cls, name, dtype, default=None, force=False):
+    if cls not in (Token, Span):
+        raise ValueError("typed extensions are for Token or Span")
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype must be one of {tuple(DTYPES)}, got {dtype!r}")
+    default = DEFAULTS[dtype] if default is None else default
+    EXTENSIONS[(cls.__name__, name)] = (dtype, default)
+    if cls is Token:
+        getter = lambda token: get_token_value(token, name)
+        setter = lambda token, value: set_token_value(token, name, value)
+    else:
+        getter = lambda span: get_values(span.doc, name, [span])[0]
+        setter = lambda span, value: set_values(span.doc, name, [value], [span])
+    cls.set_extension(name, getter=getter, setter=setter, force=force)
+
+
+def declared(kind, name):
+    if (kind, name) not in EXTENSIONS:
+        raise KeyError(f"no typed {kind} extension {name!r}, see set_typed_extension()")
+    return EXTENSIONS[(kind, name)]
+
+
+def stored(doc, key):
+    # Span data is a (keys, values, n_tokens) tuple; Doc.to_bytes/from_bytes
+    # (DocBin, nlp.pipe with n_process > 1) turns it into a list
+    data = doc.user_data.get(key)
+    if isinstance(data, list):
+        data = doc.user_data[key] = tuple(data)
+    return data
+
+
+def writable(doc, key):
+    # arrays read back from a DocBin are read-only buffers
+    data = stored(doc, key)
+    if isinstance(data, tuple):
+        keys, values, n_tokens = data
+        keys, values = (array if array.flags.writeable else array.copy() for array in (keys, values))
+        data = doc.user_data[key] = (keys, values, n_tokens)
+    elif not data.flags.writeable:
+        data = doc.user_data[key] = data.copy()
+    return data
+
+
+def encode(doc, dtype, values):
+    if dtype == "string":
+        return numpy.asarray([doc.vocab.strings.add(value) for value in values], dtype="uint64")
+    return numpy.asarray(values, dtype=DTYPES[dtype])
+
+
+def decode(doc, dtype, array):
+    if dtype == "string":
+        return [doc.vocab.strings[value] if value else "" for value in array.tolist()]
+    return array.tolist()
+
+
+def token_array(doc, name, create=False):
+    dtype, default = declared("Token", name)
+    key = (KEY, "Token", name)
+    if key not in doc.user_data:
+        if not create: return None
+        doc.user_data[key] = numpy.full(len(doc), encode(doc, dtype, [default])[0], dtype=DTYPES[dtype])
+    array = writable(doc, key) if create else doc.user_data[key]
+    check_rows(doc, name, array)
+    return array
+
+
+def check_rows(doc, name, array):
+    if len(array) != len(doc):
+        raise ValueError(f"typed extension {name!r} has {len(array)} rows for {len(doc)} tokens (retokenized?)")
+
+
+def check_spans(doc, name, n_tokens):
+    if n_tokens != len(doc):
+        raise ValueError(f"typed extension {name!r} was set on {n_tokens} tokens, the Doc has {len(doc)} (retokenized?)")
+
+
+def get_token_value(token, name):
+    array = token.doc.user_data.get((KEY, "Token", name))
+    if array is None: return declared("Token", name)[1]
+    check_rows(token.doc, name, array)
+    value = array[token.i].item()
+    if declared("Token", name)[0] == "string":
+        return token.doc.vocab.strings[value] if value else ""
+    return value
+
+
+def set_token_value(token, name, value):
+    doc = token.doc
+    array = doc.user_data.get((KEY, "Token", name))
+    if array is None or not array.flags.writeable:
+        array = token_array(doc, name, create=True)
+    array[token.i] = doc.vocab.strings.add(value) if declared("Token", name)[0] == "string" else value
+
+
+def span_keys(doc, spans):
+    starts = numpy.asarray([span.start for span in spans], dtype="int64")
+    ends = numpy.asarray([span.end for span in spans], dtype="int64")
+    return starts * (len(doc) + 1) + ends
+
+
+def get_values(doc, name, spans=None, raw=False):
+    # spans=None: the Token array (a copy of the defaults if nothing was set yet);
+    # otherwise one value per span. raw=True skips decoding (hashes for "string").
+    if spans is None:
+        dtype, default = declared("Token", name)
+        array = token_array(doc, name)
+        if array is None: array = numpy.full(len(doc), encode(doc, dtype, [default])[0], dtype=DTYPES[dtype])
+        return array if raw else decode(doc, dtype, array)
+    dtype, default = declared("Span", name)
+    keys = span_keys(doc, spans)
+    default = encode(doc, dtype, [default])[0]
+    values = numpy.full(len(keys), default, dtype=DTYPES[dtype])
+    data = stored(doc, (KEY, "Span", name))
+    if data is not None:
+        check_spans(doc, name, data[2])
+    if data is not None and len(data[0]):
+        stored_keys, stored_values, _ = data
+        pos = numpy.minimum(numpy.searchsorted(stored_keys, keys), len(stored_keys) - 1)
+        found = stored_keys[pos] == keys
+        values[found] = stored_values[pos[found]]
+    return values if raw else decode(doc, dtype, values)
+
+
+def set_values(doc, name, values, spans=None, replace=False):
+    # Bulk write: values for every token (spans=None) or one per span.
+    # replace=True drops the values set before (needed after retokenizing).
+    if spans is None:
+        dtype = declared("Token", name)[0]
+        values = values if isinstance(values, numpy.ndarray) and dtype != "string" else encode(doc, dtype, values)
+        key = (KEY, "Token", name)
+        if key in doc.user_data and len(doc.user_data[key]) != len(doc):
+            del doc.user_data[key] # every row is rewritten
+        token_array(doc, name, create=True)[:] = values
+        return
+    dtype = declared("Span", name)[0]
+    keys = span_keys(doc, spans)
+    values = values if isinstance(values, numpy.ndarray) and dtype != "string" else encode(doc, dtype, values)
+    key = (KEY, "Span", name)
+    if replace: doc.user_data.pop(key, None)
+    if key in doc.user_data:
+        old_keys, old_values, n_tokens = writable(doc, key)
+        check_spans(doc, name, n_tokens)
+        keep = ~numpy.isin(old_keys, keys)
+        keys = numpy.concatenate([old_keys[keep], keys])
+        values = numpy.concatenate([old_values[keep], values])
+    # last write wins for repeated spans
+    keys, first = numpy.unique(keys[::-1], return_index=True)
+    doc.user_data[key] = (keys, values[::-1][first], len(doc))
+
+
+def typed_nbytes(doc):
+    # bytes held by the typed arrays of a Doc
+    total = 0
+    for key, data in doc.user_data.items():
+        if isinstance(key, tuple) and key[:1] == (KEY,):
+            total += data[0].nbytes + data[1].nbytes if isinstance(data, (tuple, list)) else data.nbytes
+    return total
+
+
+def add_doc(doc_bin, doc):
+    doc_bin.add(doc)
+    for key, data in doc.user_data.items():
+        if isinstance(key, tuple) and key[:1] == (KEY,) and declared(key[1], key[2])[0] == "string":
+            hashes = data[1] if isinstance(data, (tuple, list)) else data
+            doc_bin.strings.update(doc.vocab.strings[h] for h in numpy.unique(hashes).tolist() if h)
@@ -0,0 +1,127 @@
+# Parallel weak labeling
+    # Bootstraps NER training data from Matcher rules (a RuleBundle) over large raw
+    #   corpora: texts are deduplicated by content hash, matched in a process pool,
+    #   overlapping matches resolved (pspacy.ents policies) and the labeled Docs
+    #   written straight to DocBin shards that ExampleStore.from_disk can read.
+    # At most 2 * n_process chunks are in flight, so the input is read lazily.
+    # With n_process > 1 on Windows/macOS (spawn), call it under
+    #   if __name__ == "__main__":
+################################################################################
+import collections
+import hashlib
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import spacy
+from spacy.tokens import DocBin, Span
+
+from .ents import resolve_overlaps
+from .rules import RuleBundle
+from .streams import ShardWriter, read_texts
+
+DOC_ATTRS = ["ORTH", "SPACY", "ENT_IOB", "ENT_TYPE"]
+WORKER = {} # per-process nlp and matcher
+
+
+def text_hash(text):
+    return hashlib.blake2b(text.encode("utf8"), digest_size=16).digest()
+
+
+def dedupe(texts, seen=None, counter=None):
+    # Drop texts whose content was already seen; counter["duplicates"] counts them
+    seen = set() if seen is None else seen
+    for text in texts:
+        key = text_hash(text)
+        if key in seen:
+            if counter is not None: counter["duplicates"] += 1
+            continue
+        seen.add(key)
+        yield text
+
+
+def load_model(model):
+    # "blank:en" for a tokenizer-only pipeline, otherwise a name for get_nlp()
+    if model.startswith("blank:"):
+        return spacy.blank(model.split(":", 1)[1])
+    from .registry import get_nlp
+    return get_nlp(model)
+
+
+def init_worker(model, bundle_bytes, policy):
+    nlp = load_model(model)
+    WORKER.update(nlp=nlp, matcher=RuleBundle().from_bytes(bundle_bytes).matcher(nlp.vocab), policy=policy)
+
+
+def label_chunk(texts):
+    # Label one chunk; returns (DocBin bytes, stats)
+    nlp, matcher, policy = WORKER["nlp"], WORKER["matcher"], WORKER["policy"]
+    doc_bin = DocBin(attrs=DOC_ATTRS)
+    stats = {"docs": 0, "labeled_docs": 0, "overlaps": 0, "spans": collections.Counter(), "docs_with": collections.Counter()}
+    for doc in nlp.pipe(texts):
+        spans = [Span(doc, start, end, label=match_id) for match_id, start, end in matcher(doc)]
+        kept = resolve_overlaps(spans, policy=policy)
+        doc.ents = kept
+        doc_bin.add(doc)
+        labels = [span.label_ for span in kept]
+        stats["docs"] += 1
+        stats["labeled_docs"] += bool(kept)
+        stats["overlaps"] += len(spans) - len(kept)
+        stats["spans"].update(labels)
+        stats["docs_with"].update(set(labels))
+    return doc_bin.to_bytes(), stats
+
+
+def chunks(items, size):
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, size))
+        if not chunk: return
+        yield chunk
+
+
+def weak_label(texts, bundle, out_dir, model="blank:en", n_process=1, chunk_size=1000,
+               shard_size=50_000, policy="longest"):
+    # texts: iterable or path (see read_texts); bundle: RuleBundle or bundle file path.
+    # Returns coverage stats per label; shard paths under "shards".
+    if isinstance(texts, str): texts = read_texts(texts)
+    if isinstance(bundle, str): bundle = RuleBundle.from_disk(bundle)
+    bundle_bytes = bundle.to_bytes(spacy.blank("en").vocab)
+    totals = {"docs": 0, "labeled_docs": 0, "overlaps": 0, "spans": collections.Counter(), "docs_with": collections.Counter()}
+    counter = collections.Counter()
+    writer = ShardWriter(out_dir, shard_size=shard_size, attrs=DOC_ATTRS, prefix="weak")
+
+    def collect(result):
+        bytes_data, stats = result
+        writer.merge(DocBin(attrs=DOC_ATTRS).from_bytes(bytes_data))
+        for key in ("docs", "labeled_docs", "overlaps"): totals[key] += stats[key]
+        totals["spans"].update(stats["spans"])
+        totals["docs_with"].update(stats["docs_with"])
+
+    work = chunks(dedupe(texts, counter=counter), chunk_size)
+    if n_process == 1:
+        init_worker(model, bundle_bytes, policy)
+        for chunk in work: collect(label_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(n_process, initializer=init_worker, initargs=(model, bundle_bytes, policy)) as pool:
+            pending = collections.deque()
+            for chunk in work:
+                pending.append(pool.submit(label_chunk, chunk))
+                if len(pending) >= 2 * n_process:
+                    collect(pending.popleft().result())
+            while pending:
+                collect(pending.popleft().result())
+    return coverage_report(totals, counter["duplicates"], writer.close())
+
+
+def coverage_report(totals, duplicates, shards):
+    docs = max(totals["docs"], 1)
+    labels = {
+        label: {"spans": totals["spans"][label], "docs": totals["docs_with"][label],
+                "doc_coverage": totals["docs_with"][label] / docs}
+        for label in sorted(totals["spans"])
+    }
+    return {
+        "docs": totals["docs"], "duplicates": duplicates, "labeled_docs": totals["labeled_docs"],
+        "coverage": totals["labeled_docs"] / docs, "overlaps_dropped": totals["overlaps"],
+        "labels": labels, "shards": shards,
+    }